@@ -0,0 +1,377 @@
+"""
+Adaptive-step Dormand-Prince 5(4) integrator, batched over ships.
+
+Every row of the state (one ship) has its own time and step size, so ships making a close pass of
+the Earth or Moon take small steps while ships coasting through empty space take large ones. All
+rows are still advanced together with vectorised NumPy operations. Output is sampled at arbitrary
+times using the 4th order dense-output interpolant of the method, so frames do not need to line up
+with the integration steps.
+
+Usage: `python adaptive.py leo_to_moon` propagates the LEO-to-Moon swarm and writes it to
+`data/leo_to_moon_adaptive_ships.npy` (same layout as `data/leo_to_moon_ships.npy`).
+"""
+
+import argparse
+import time
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from propagator import FictitiousForce, accelerations
+
+# rhs(t, y) with t of shape (rows,) and y of shape (rows, dim).
+Rhs = Callable[[np.ndarray, np.ndarray], np.ndarray]
+# event(t, y) with the same shapes as `Rhs`, returning one value per row.
+EventFunction = Callable[[np.ndarray, np.ndarray], np.ndarray]
+# Body positions either fixed, shape (bodies, 2), or a function of per-ship time returning
+# (ships, bodies, 2).
+Bodies = Union[np.ndarray, Callable[[np.ndarray], np.ndarray]]
+
+# Butcher tableau.
+C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1])
+A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+]
+B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+# Difference between the 5th and 4th order solutions. Includes the FSAL stage.
+E = np.array([-71 / 57600, 0, 71 / 16695, -71 / 1920, 17253 / 339200, -22 / 525, 1 / 40])
+# Dense output coefficients (Hairer, Norsett & Wanner).
+P = np.array([
+    [1, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10.
+
+class Solution:
+    """
+    Result of `dopri5`.
+
+    - `y`: states sampled at `t_eval`, shape `(len(t_eval), rows, out_dims)`.
+    - `steps`: number of accepted steps for each row.
+    - `rejected`: number of rejected steps for each row.
+    - `nfev`: total number of row evaluations of the right hand side.
+    - `t_event`, `y_event`: time and state at which each row hit the terminal event (`nan` if it
+      never did).
+    """
+
+    def __init__(self, y: np.ndarray, steps: np.ndarray, rejected: np.ndarray, nfev: int, t_event: np.ndarray, y_event: np.ndarray):
+        self.y = y
+        self.steps = steps
+        self.rejected = rejected
+        self.nfev = nfev
+        self.t_event = t_event
+        self.y_event = y_event
+
+def _rms(x: np.ndarray) -> np.ndarray:
+    return np.sqrt(np.mean(x * x, axis=-1))
+
+def _dense(q: np.ndarray, y_old: np.ndarray, h: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Evaluate the dense output of steps starting at `y_old` with size `h` at fractions `x` of the
+    step.
+    """
+    powers = np.cumprod(np.repeat(x[:, None], 4, axis=1), axis=1)
+    return y_old + h[:, None] * np.einsum("rdp,rp->rd", q, powers)
+
+def _locate_event(event: EventFunction, q: np.ndarray, t_old: np.ndarray, y_old: np.ndarray, h: np.ndarray, g_old: np.ndarray, g_new: np.ndarray, iterations: int = 60) -> np.ndarray:
+    """
+    Fraction of the step at which `event` crosses zero, found with the Illinois variant of regula
+    falsi on the dense output.
+    """
+    lo, hi = np.zeros(len(h)), np.ones(len(h))
+    g_lo, g_hi = g_old.copy(), g_new.copy()
+    side = np.zeros(len(h), dtype=np.int8)
+    x = hi
+    for _ in range(iterations):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = (lo * g_hi - hi * g_lo) / (g_hi - g_lo)
+        x = np.where(np.isfinite(x), np.clip(x, lo, hi), (lo + hi) / 2)
+        g = event(t_old + x * h, _dense(q, y_old, h, x))
+        same_as_lo = np.sign(g) == np.sign(g_lo)
+        lo = np.where(same_as_lo, x, lo)
+        hi = np.where(same_as_lo, hi, x)
+        g_hi = np.where(same_as_lo & (side == 1), g_hi / 2, np.where(same_as_lo, g_hi, g))
+        g_lo = np.where(~same_as_lo & (side == -1), g_lo / 2, np.where(same_as_lo, g, g_lo))
+        side = np.where(same_as_lo, 1, -1).astype(np.int8)
+        if np.all((hi - lo < 1e-14) | (g == 0)):
+            break
+    return x
+
+def _initial_step(rhs: Rhs, t0: np.ndarray, y0: np.ndarray, f0: np.ndarray, direction: float, rtol: float, atol: float) -> np.ndarray:
+    """
+    Per-row initial step size. Same heuristic as Hairer's `hinit`.
+    """
+    scale = atol + np.abs(y0) * rtol
+    d0 = _rms(y0 / scale)
+    d1 = _rms(f0 / scale)
+    h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+    y1 = y0 + direction * h0[:, None] * f0
+    f1 = rhs(t0 + direction * h0, y1)
+    d2 = _rms((f1 - f0) / scale) / h0
+    h1 = np.where(
+        (d1 <= 1e-15) & (d2 <= 1e-15),
+        np.maximum(1e-6, h0 * 1e-3),
+        (0.01 / np.maximum(np.maximum(d1, d2), 1e-300)) ** (1 / 5),
+    )
+    return np.minimum(100 * h0, h1)
+
+def dopri5(
+    rhs: Rhs,
+    t0: float,
+    y0: np.ndarray,
+    t_eval: np.ndarray,
+    rtol: float = 1e-9,
+    atol: float = 1e-12,
+    h_max: float = np.inf,
+    max_steps: int = 10_000_000,
+    out: Optional[np.ndarray] = None,
+    event: Optional[EventFunction] = None,
+    event_direction: int = 0,
+    out_dims: Optional[int] = None,
+) -> Solution:
+    """
+    Integrate `dy/dt = rhs(t, y)` for every row of `y0` (shape `(rows, dim)`) from `t0` and sample
+    the solution at the (monotonic) times `t_eval`. Integration runs backwards in time if
+    `t_eval` is decreasing.
+
+    Only the first `out_dims` components of the state are sampled (default: all of them), e.g. the
+    positions of a long run whose velocities are not needed. `out` can be a preallocated array of
+    shape `(len(t_eval), rows, out_dims)`.
+
+    If `event` is given, each row stops as soon as the event function crosses zero (only
+    decreasing crossings if `event_direction` is -1, only increasing if +1). The crossing is
+    located on the dense output. The remaining samples of a stopped row hold the state at the
+    event.
+    """
+    y0 = np.array(y0, dtype=np.float64)
+    t_eval = np.asarray(t_eval, dtype=np.float64)
+    rows, dim = y0.shape
+    num_eval = len(t_eval)
+    t_end = t_eval[-1]
+    direction = 1. if t_end >= t0 else -1.
+    assert np.all(direction * np.diff(t_eval) >= 0), "t_eval should be monotonic"
+
+    out_dims = dim if out_dims is None else out_dims
+    if out is None:
+        out = np.empty((num_eval, rows, out_dims))
+    assert out.shape == (num_eval, rows, out_dims)
+
+    t = np.full(rows, float(t0))
+    y = y0.copy()
+    f = rhs(t, y)
+    nfev = rows
+    h = np.minimum(_initial_step(rhs, t, y, f, direction, rtol, atol), h_max)
+    nfev += rows
+    steps = np.zeros(rows, dtype=np.int64)
+    rejected = np.zeros(rows, dtype=np.int64)
+    t_event = np.full(rows, np.nan)
+    y_event = np.full((rows, dim), np.nan)
+    g = event(t, y) if event is not None else None
+
+    # Samples at (or before) the start time are just the initial state.
+    next_eval = np.full(rows, int(np.searchsorted(direction * t_eval, direction * t0, side="right")))
+    out[:next_eval[0]] = y0[:, :out_dims]
+
+    active = np.nonzero(next_eval < num_eval)[0]
+    k = np.empty((7, rows, dim))
+    while len(active) > 0:
+        if steps[active].max() >= max_steps:
+            raise RuntimeError(f"exceeded {max_steps} steps")
+
+        ta, ya, fa = t[active], y[active], f[active]
+        # Don't step past the end.
+        ha = np.minimum(h[active], direction * (t_end - ta))
+        step = direction * ha
+
+        ka = k[:, :len(active)]
+        ka[0] = fa
+        for s in range(1, 6):
+            dy = np.einsum("s,srd->rd", np.array(A[s]), ka[:s]) * step[:, None]
+            ka[s] = rhs(ta + C[s] * step, ya + dy)
+        y_new = ya + np.einsum("s,srd->rd", B, ka[:6]) * step[:, None]
+        t_new = ta + step
+        # Last step ends exactly at `t_end` to avoid rounding.
+        t_new = np.where(ha >= direction * (t_end - ta), t_end, t_new)
+        ka[6] = rhs(t_new, y_new)
+        nfev += 6 * len(active)
+
+        error = np.einsum("s,srd->rd", E, ka) * step[:, None]
+        scale = atol + np.maximum(np.abs(ya), np.abs(y_new)) * rtol
+        error_norm = _rms(error / scale)
+
+        accept = error_norm <= 1.
+        with np.errstate(divide="ignore"):
+            factor = np.where(
+                error_norm == 0.,
+                MAX_FACTOR,
+                np.clip(SAFETY * error_norm ** -0.2, MIN_FACTOR, MAX_FACTOR),
+            )
+        # Don't grow the step straight after a rejection.
+        factor = np.where(accept, factor, np.minimum(factor, 1.))
+        h[active] = np.minimum(ha * factor, h_max)
+
+        accepted = active[accept]
+        rejected[active[~accept]] += 1
+        if len(accepted) > 0:
+            # Dense output for every sample that falls inside the accepted steps.
+            q = np.einsum("srd,sp->rdp", ka[:, accept], P)
+            y_old = ya[accept]
+            t_old = ta[accept]
+            h_acc = step[accept]
+            t_acc = t_new[accept]
+            rows_acc = np.arange(len(accepted))
+
+            stopped = np.zeros(len(accepted), dtype=bool)
+            if event is not None:
+                g_old = g[accepted]
+                g_new = event(t_acc, y_new[accept])
+                # A row that starts exactly on the event surface is not stopped straight away.
+                if event_direction <= 0:
+                    stopped |= (g_old > 0) & (g_new <= 0)
+                if event_direction >= 0:
+                    stopped |= (g_old < 0) & (g_new >= 0)
+                g[accepted] = g_new
+                if stopped.any():
+                    x = _locate_event(event, q[stopped], t_old[stopped], y_old[stopped], h_acc[stopped], g_old[stopped], g_new[stopped])
+                    t_acc = t_acc.copy()
+                    t_acc[stopped] = t_old[stopped] + x * h_acc[stopped]
+                    t_event[accepted[stopped]] = t_acc[stopped]
+                    y_event[accepted[stopped]] = _dense(q[stopped], y_old[stopped], h_acc[stopped], x)
+
+            pending = direction * t_eval[np.minimum(next_eval[accepted], num_eval - 1)] <= direction * t_acc
+            pending &= next_eval[accepted] < num_eval
+            while pending.any():
+                sel = rows_acc[pending]
+                e = next_eval[accepted[sel]]
+                x = (t_eval[e] - t_old[sel]) / h_acc[sel]
+                out[e, accepted[sel]] = _dense(q[sel], y_old[sel], h_acc[sel], x)[:, :out_dims]
+                next_eval[accepted[sel]] += 1
+                e = next_eval[accepted]
+                pending = (e < num_eval) & (direction * t_eval[np.minimum(e, num_eval - 1)] <= direction * t_acc)
+
+            # Stopped rows hold their state at the event for the remaining samples.
+            for row in accepted[stopped]:
+                out[next_eval[row]:, row] = y_event[row, :out_dims]
+            next_eval[accepted[stopped]] = num_eval
+
+            t[accepted] = t_acc
+            y[accepted] = y_new[accept]
+            f[accepted] = ka[6, accept]
+            steps[accepted] += 1
+
+        active = active[next_eval[active] < num_eval]
+
+    return Solution(out, steps, rejected, nfev, t_event, y_event)
+
+def ship_rhs(masses: np.ndarray, bodies: Bodies, fictitious_force: Optional[FictitiousForce] = None) -> Rhs:
+    """
+    Right hand side for ships with state `[x, y, vx, vy]` moving in the field of `bodies`.
+    """
+    masses = np.asarray(masses, dtype=np.float64)
+
+    def rhs(t: np.ndarray, state: np.ndarray) -> np.ndarray:
+        r = state[:, :2]
+        v = state[:, 2:]
+        mass_positions = bodies(t) if callable(bodies) else bodies
+        a = accelerations(r, masses, mass_positions)
+        if fictitious_force is not None:
+            a += fictitious_force(r, v)
+        return np.concatenate([v, a], axis=1)
+    return rhs
+
+def tabulated_bodies(mass_positions_at_t: np.ndarray, dt: float, t0: float = 0.) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Turn body positions tabulated every `dt` into a function of (per-ship) time using 4-point
+    Lagrange interpolation. Returns positions of shape `(len(t), bodies, 2)`.
+    """
+    table = np.asarray(mass_positions_at_t)
+    n = len(table)
+    assert n >= 4, "need at least 4 tabulated time steps"
+
+    def bodies(t: np.ndarray) -> np.ndarray:
+        s = (np.asarray(t) - t0) / dt
+        i = np.clip(np.floor(s).astype(np.int64) - 1, 0, n - 4)
+        x = s - i
+        # Lagrange weights for nodes at 0, 1, 2, 3.
+        w = np.stack([
+            -(x - 1) * (x - 2) * (x - 3) / 6,
+            x * (x - 2) * (x - 3) / 2,
+            -x * (x - 1) * (x - 3) / 2,
+            x * (x - 1) * (x - 2) / 6,
+        ], axis=1)
+        nodes = table[i[:, None] + np.arange(4)]
+        return np.einsum("rj,rjbk->rbk", w, nodes)
+    return bodies
+
+def propagate_ships(
+    masses: np.ndarray,
+    bodies: Bodies,
+    ship_positions: np.ndarray,
+    ship_velocities: np.ndarray,
+    t_eval: np.ndarray,
+    fictitious_force: Optional[FictitiousForce] = None,
+    rtol: float = 1e-9,
+    atol: float = 1e-12,
+    h_max: float = np.inf,
+    velocity_data: bool = False,
+) -> tuple[np.ndarray, Optional[np.ndarray], Solution]:
+    """
+    Adaptive counterpart of `propagator.trace_ships`. Returns `(positions, velocities, solution)`
+    with positions (and velocities if `velocity_data` is set) sampled at `t_eval`, shape
+    `(len(t_eval), ships, 2)`, starting from `t_eval[0]`.
+    """
+    y0 = np.concatenate([np.asarray(ship_positions, dtype=np.float64), np.asarray(ship_velocities, dtype=np.float64)], axis=1)
+    rhs = ship_rhs(masses, bodies, fictitious_force)
+    solution = dopri5(rhs, t_eval[0], y0, t_eval, rtol=rtol, atol=atol, h_max=h_max)
+    positions = solution.y[..., :2]
+    velocities = solution.y[..., 2:] if velocity_data else None
+    return positions, velocities, solution
+
+if __name__ == "__main__":
+    import scenarios
+
+    parser = argparse.ArgumentParser(description="Propagate a scenario with adaptive time-stepping.")
+    parser.add_argument("scenario", choices=["leo_to_moon"])
+    parser.add_argument("--total-time", type=float, default=24.3)
+    parser.add_argument("--frame-dt", type=float, default=0.001, help="spacing of the output samples")
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--atol", type=float, default=1e-12)
+    args = parser.parse_args()
+
+    t_eval = np.arange(int(args.total_time / args.frame_dt)) * args.frame_dt
+    masses, body_positions, body_velocities = scenarios.leo_to_moon_bodies()
+    print("Tracing bodies")
+    bodies_at_t = scenarios.trace_bodies(masses, body_positions, body_velocities, t_eval)
+    ship_positions, ship_velocities = scenarios.leo_to_moon_ships(body_positions, body_velocities)
+
+    print(f"Tracing {len(ship_positions)} ships")
+    start = time.perf_counter()
+    positions, _, solution = propagate_ships(
+        masses,
+        tabulated_bodies(bodies_at_t, args.frame_dt),
+        ship_positions,
+        ship_velocities,
+        t_eval,
+        rtol=args.rtol,
+        atol=args.atol,
+    )
+    elapsed = time.perf_counter() - start
+    fixed_steps = len(t_eval) * len(ship_positions)
+    print(f"Done in {elapsed:.1f}s: {solution.steps.sum()} accepted steps ({solution.rejected.sum()} rejected), "
+          f"{solution.steps.sum() / fixed_steps:.2%} of the fixed-step work")
+
+    np.save("data/leo_to_moon_adaptive_bodies.npy", bodies_at_t)
+    np.save("data/leo_to_moon_adaptive_ships.npy", positions)
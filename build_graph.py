@@ -0,0 +1,185 @@
+"""
+Dependency graph between simulations, datasets and scene renders.
+
+The link between the simulations and the scenes that use them used to live only in the Makefiles
+(and `run-all-simulations` did not even run `manifolds_sun_earth`, which `Manifolds3Body` needs).
+Here it is derived automatically:
+
+- scene -> datasets: the `data/*.npy` and `.npz` paths named in the scene's source (see
+  `render_cache.scene_inputs`), optionally completed by tracing the `np.load` calls of a
+  `manim --dry_run` of the scene,
+- dataset -> simulation: the outputs declared in `sim_cache.SIMULATIONS`.
+
+For the requested scenes only the simulations they need are brought up to date through
+`sim_cache`, all at the same time, and each render starts as soon as its own simulations are done.
+Renders go through the render cache of `render_scheduler.py`, so unchanged scenes are restored
+instead of rendered.
+
+Usage:
+- `python build_graph.py LeoToMoon blog:Manifolds3Body -q h` builds two scenes (the deck defaults
+  to `slides`).
+- `python build_graph.py all --plan` prints the whole graph without running anything.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import sim_cache
+from render_cache import RenderCache, scene_inputs
+from render_scheduler import DECKS, DECKS_DIR, Job, deck_env, restore_cached, schedule
+
+# Runs a scene with `manim --dry_run`, recording every path passed to `np.load`. A missing dataset
+# still ends the run, so tracing finds the datasets up to the first one that does not exist yet.
+_TRACE_SCRIPT = """
+import atexit, json, sys
+import numpy as np
+
+out, argv = sys.argv[1], sys.argv[2:]
+loaded = []
+atexit.register(lambda: json.dump(loaded, open(out, "w")))
+original = np.load
+
+def load(file, *args, **kwargs):
+    loaded.append(str(file))
+    return original(file, *args, **kwargs)
+
+np.load = load
+from manim.__main__ import main
+sys.argv = ["manim"] + argv
+main()
+"""
+
+def traced_datasets(deck: str, scene: str) -> list[str]:
+    """
+    Datasets loaded by a dry run of `scene`.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out = f.name
+    try:
+        subprocess.run(
+            [sys.executable, "-c", _TRACE_SCRIPT, out, "-ql", "--dry_run", DECKS[deck]["file"], scene],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=deck_env(deck),
+        )
+        with open(out) as f:
+            loaded = json.load(f)
+    except (OSError, ValueError):
+        loaded = []
+    finally:
+        if os.path.exists(out):
+            os.remove(out)
+    return sorted({os.path.relpath(path) for path in loaded})
+
+def producers() -> dict[str, str]:
+    """
+    Dataset path -> simulation that writes it.
+    """
+    return {path: name for name, spec in sim_cache.SIMULATIONS.items() for path in spec["outputs"]}
+
+class BuildGraph:
+    """
+    Scenes with the datasets they read and the simulations that produce those datasets.
+    """
+
+    def __init__(self, scenes: list[tuple[str, str]], trace: bool = False):
+        self.scenes = scenes
+        produced_by = producers()
+        self.datasets: dict[tuple[str, str], list[str]] = {}
+        self.simulations: dict[tuple[str, str], list[str]] = {}
+        for deck, scene in scenes:
+            datasets = set(scene_inputs(DECKS[deck]["file"], scene)["datasets"])
+            if trace:
+                datasets |= set(traced_datasets(deck, scene))
+            unknown = sorted(path for path in datasets if path not in produced_by)
+            if unknown:
+                raise ValueError(f"{deck}:{scene} reads {', '.join(unknown)}, which no simulation produces")
+            self.datasets[(deck, scene)] = sorted(datasets)
+            self.simulations[(deck, scene)] = sorted({produced_by[path] for path in datasets})
+
+    def needed_simulations(self) -> list[str]:
+        """
+        The minimal set of simulations for all scenes of the graph, in registry order.
+        """
+        needed = set().union(*self.simulations.values()) if self.simulations else set()
+        return [name for name in sim_cache.SIMULATIONS if name in needed]
+
+    def describe(self) -> str:
+        lines = []
+        for deck, scene in self.scenes:
+            lines.append(f"{deck}:{scene}")
+            for path in self.datasets[(deck, scene)]:
+                lines.append(f"    {path} <- {producers()[path]}")
+        lines.append(f"simulations: {', '.join(self.needed_simulations()) or 'none'}")
+        return "\n".join(lines)
+
+def _render_when_ready(job: Job, dependencies: list[Future], cache: Optional[RenderCache]) -> bool:
+    for dependency in dependencies:
+        # Re-raises the failure of a simulation the scene depends on.
+        dependency.result()
+    todo = [job] if cache is None else restore_cached([job], cache)
+    return not schedule(todo, 1, float("inf"), cache=cache)
+
+def build(graph: BuildGraph, quality: str, workers: Optional[int] = None, use_cache: bool = True) -> dict[str, bool]:
+    """
+    Run the simulations of `graph` concurrently and render every scene once its simulations are
+    done. Returns whether each scene rendered successfully.
+    """
+    cache = RenderCache() if use_cache else None
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Simulations are queued first, so renders waiting on them never hold up their workers.
+        simulations = {name: pool.submit(sim_cache.ensure, [name]) for name in graph.needed_simulations()}
+        renders = {
+            f"{deck}:{scene}": pool.submit(
+                _render_when_ready, Job(deck, scene, quality),
+                [simulations[name] for name in graph.simulations[(deck, scene)]], cache,
+            )
+            for deck, scene in graph.scenes
+        }
+        results = {}
+        for target, future in renders.items():
+            try:
+                results[target] = future.result()
+            except Exception as e:
+                print(f"{target}: {e}")
+                results[target] = False
+    return results
+
+def parse_targets(targets: list[str]) -> list[tuple[str, str]]:
+    """
+    `Scene`, `deck:Scene` or `all` (every scene of every deck) as `(deck, scene)` pairs.
+    """
+    scenes = []
+    for target in targets:
+        if target == "all":
+            scenes.extend((deck, scene) for deck in DECKS for scene in DECKS[deck]["scenes"])
+            continue
+        deck, _, scene = target.rpartition(":")
+        deck = deck or "slides"
+        assert deck in DECKS and scene in DECKS[deck]["scenes"], f"unknown scene {target}"
+        scenes.append((deck, scene))
+    return list(dict.fromkeys(scenes))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build scenes with the minimal set of simulations they need.")
+    parser.add_argument("targets", nargs="+", help="Scene, deck:Scene or all")
+    parser.add_argument("-q", "--quality", default="h")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--trace", action="store_true", help="also trace np.load calls in a manim dry run")
+    parser.add_argument("--plan", action="store_true", help="print the graph without building")
+    parser.add_argument("--no-cache", action="store_true", help="render even if a cached render is up to date")
+    args = parser.parse_args()
+
+    graph = BuildGraph(parse_targets(args.targets), trace=args.trace)
+    print(graph.describe())
+    if not args.plan:
+        results = build(graph, args.quality, args.workers, use_cache=not args.no_cache)
+        decks = sorted({deck for deck, _ in graph.scenes})
+        print(f"Built {sum(results.values())} of {len(results)} scenes; restore a deck with "
+              f"`python render_scheduler.py <deck> --collect` ({', '.join(decks)}), snapshots are in {DECKS_DIR}/")
+        if not all(results.values()):
+            raise SystemExit(1)
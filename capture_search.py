@@ -0,0 +1,151 @@
+"""
+Search the LEO-to-Moon ship trajectories for the best ballistic capture candidates.
+
+Per-ship capture metrics are computed in a single out-of-core pass over the (memory-mapped)
+trajectories and stored in `data/leo_to_moon_capture_metrics.npy`. The metrics are then ranked into
+`data/leo_to_moon_capture_candidates.npy`, whose first row is the best ship. Re-ranking with
+different criteria only needs the metrics file, not the trajectories.
+
+`LeoToMoon`, `BallisticCapture` and `web_export.py` highlight the first row (`best_candidate`) and
+time their labels from its metrics (`arrival_time`), so they follow the ranking without retuning.
+
+Usage:
+- `python capture_search.py` computes the metrics and ranks them.
+- `python capture_search.py --rerank --rank-by min_energy` only re-ranks existing metrics.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import scenarios
+from events import trajectory_chunks
+
+METRICS_DTYPE = np.dtype([
+    ("ship", "i8"),
+    # Minimum two-body energy relative to the Moon while inside the Moon zone (inf if never).
+    ("min_energy", "f8"),
+    ("min_energy_time", "f8"),
+    # First time the ship is inside the Moon zone below escape velocity (nan if never).
+    ("capture_time", "f8"),
+    # Total time spent captured.
+    ("capture_duration", "f8"),
+    ("min_moon_distance", "f8"),
+])
+
+# Captured ships first, longest capture first, then the most tightly bound.
+DEFAULT_RANKING = ("-capture_duration", "min_energy")
+
+def capture_metrics(
+    ships: np.ndarray,
+    bodies: np.ndarray,
+    dt: float,
+    moon: int = 2,
+    moon_mass: float = scenarios.MOON_MASS,
+    zone_radius: float = scenarios.MOON_ZONE_RADIUS,
+    chunk_size: int = 500,
+) -> np.ndarray:
+    """
+    Per-ship capture metrics for trajectories `ships` (shape `(time_steps, ships, 2)`) moving among
+    `bodies`, sampled every `dt`. Only one chunk of time steps is in memory at a time.
+    """
+    time_steps, num_ships = ships.shape[:2]
+    metrics = np.zeros(num_ships, dtype=METRICS_DTYPE)
+    metrics["ship"] = np.arange(num_ships)
+    metrics["min_energy"] = np.inf
+    metrics["min_energy_time"] = np.nan
+    metrics["capture_time"] = np.nan
+    metrics["min_moon_distance"] = np.inf
+    ship_indices = np.arange(num_ships)
+
+    for start, state in trajectory_chunks(ships, bodies, dt, chunk_size):
+        # Drop the sample that overlaps with the next chunk.
+        last = len(state.r) if start + len(state.r) >= time_steps else len(state.r) - 1
+        t = state.t[:last, 0]
+        d = state.distance(moon)[:last]
+        energy = state.orbital_energy(moon, moon_mass)[:last]
+        in_zone = d < zone_radius
+
+        zone_energy = np.where(in_zone, energy, np.inf)
+        i = np.argmin(zone_energy, axis=0)
+        chunk_min = zone_energy[i, ship_indices]
+        better = chunk_min < metrics["min_energy"]
+        metrics["min_energy"][better] = chunk_min[better]
+        metrics["min_energy_time"][better] = t[i[better]]
+
+        captured = in_zone & (energy < 0)
+        metrics["capture_duration"] += np.count_nonzero(captured, axis=0) * dt
+        first = np.argmax(captured, axis=0)
+        new_capture = captured[first, ship_indices] & np.isnan(metrics["capture_time"])
+        metrics["capture_time"][new_capture] = t[first[new_capture]]
+
+        np.minimum(metrics["min_moon_distance"], d.min(axis=0), out=metrics["min_moon_distance"])
+
+    return metrics
+
+def rank(metrics: np.ndarray, by: tuple[str, ...] = DEFAULT_RANKING) -> np.ndarray:
+    """
+    Sort `metrics` by the fields in `by`, most significant first. Prefix a field with `-` to sort
+    it in descending order. NaNs sort last.
+    """
+    keys = []
+    for field in reversed(by):
+        descending = field.startswith("-")
+        values = metrics[field.lstrip("-")].astype(np.float64)
+        values = -values if descending else values
+        keys.append(np.where(np.isnan(values), np.inf, values))
+    return metrics[np.lexsort(keys)]
+
+def best_candidate(path: str = "data/leo_to_moon_capture_candidates.npy") -> np.void:
+    """
+    First row of a ranked candidate table: the best ship and its metrics. Only that row is read.
+    """
+    return np.load(path, mmap_mode="r")[0]
+
+def best_ship(path: str = "data/leo_to_moon_capture_candidates.npy") -> int:
+    """
+    Index of the best ship in a ranked candidate table.
+    """
+    return int(best_candidate(path)["ship"])
+
+def arrival_time(candidate: np.void, total_time: float) -> float:
+    """
+    Time at which the ship of `candidate` (a row of metrics) arrives at the Moon: when it is first
+    captured, or when it is most tightly bound if it never is. `total_time` if it never gets close.
+    """
+    for field in ("capture_time", "min_energy_time"):
+        if np.isfinite(candidate[field]):
+            return min(float(candidate[field]), total_time)
+    return total_time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank ballistic capture candidates.")
+    parser.add_argument("--ships", default="data/leo_to_moon_ships.npy")
+    parser.add_argument("--bodies", default="data/leo_to_moon_bodies.npy")
+    parser.add_argument("--dt", type=float, default=scenarios.LEO_TO_MOON_DT)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--metrics", default="data/leo_to_moon_capture_metrics.npy")
+    parser.add_argument("--out", default="data/leo_to_moon_capture_candidates.npy")
+    parser.add_argument("--rank-by", nargs="+", default=list(DEFAULT_RANKING))
+    parser.add_argument("--rerank", action="store_true", help="re-rank existing metrics without reading trajectories")
+    args = parser.parse_args()
+
+    if args.rerank:
+        metrics = np.load(args.metrics)
+    else:
+        ships = np.load(args.ships, mmap_mode="r")
+        bodies = np.load(args.bodies, mmap_mode="r")
+        start = time.perf_counter()
+        metrics = capture_metrics(ships, bodies, args.dt, chunk_size=args.chunk_size)
+        print(f"Computed metrics for {len(metrics)} ships in {time.perf_counter() - start:.1f}s")
+        np.save(args.metrics, metrics)
+
+    candidates = rank(metrics, tuple(args.rank_by))
+    np.save(args.out, candidates)
+
+    print(f"Captured ships: {np.count_nonzero(metrics['capture_duration'] > 0)}")
+    print("Best candidates:")
+    for row in candidates[:5]:
+        print(f"  ship {row['ship']}: captured for {row['capture_duration']:.3f} from t = {row['capture_time']:.3f}, "
+              f"min energy = {row['min_energy']:.5f}")
@@ -0,0 +1,94 @@
+"""
+Helpers for the circular restricted 3-body problem in the co-rotating COM frame.
+
+These follow the same conventions as the Rust simulations (see `src/halo_orbits_compute.rs`):
+`m1` sits at `-mu` and `m2` at `1 - mu` on the x-axis, where `mu = m1 * m2 / (m1 + m2)`, and the
+frame rotates with angular frequency `(m1 + m2) / m1`.
+"""
+
+import numpy as np
+
+def reduced_mass(m1: float, m2: float) -> float:
+    return m1 * m2 / (m1 + m2)
+
+def angular_velocity(m1: float, m2: float) -> float:
+    return (m1 + m2) / m1
+
+def primaries(m1: float, m2: float) -> np.ndarray:
+    """
+    Positions of the two primaries in the co-rotating COM frame. Shape is `(2, 2)`.
+    """
+    mu = reduced_mass(m1, m2)
+    return np.array([[-mu, 0.], [1. - mu, 0.]])
+
+def masses_from_mu(mu: float) -> tuple[float, float]:
+    """
+    Inverse of `reduced_mass` with `m1 = 1`.
+    """
+    return 1., mu / (1. - mu)
+
+def find_l1_x(m1: float, m2: float, epsilon: float = 1e-8) -> float:
+    """
+    Numerically find the x-coordinate of the L1 point by bisecting for the point between the two
+    masses where the net force is 0. Same algorithm as `find_l1_x` in the Rust code.
+    """
+    mu = reduced_mass(m1, m2)
+    x1 = -mu
+    x2 = 1. - mu
+    omega = angular_velocity(m1, m2)
+
+    search_start = 1e-4
+    low = x1 + search_start
+    high = x2 - search_start
+
+    a = np.inf
+    x = 0.
+    while abs(a) > epsilon:
+        x = (low + high) / 2.
+        a = -m1 / (x - x1) ** 2 + m2 / (x - x2) ** 2 + omega * omega * x
+        if a > 0.:
+            # Pulling towards m2. Move higher bound closer.
+            high = x
+        else:
+            # Pulling towards m1. Move lower bound closer.
+            low = x
+        if high - low < 1e-15:
+            break
+    return x
+
+def pseudo_potential(x, y, m1: float, m2: float):
+    """
+    Pseudo-potential `Omega = omega^2 r^2 / 2 + m1 / r1 + m2 / r2`. Works on arrays of any
+    (broadcastable) shape.
+    """
+    mu = reduced_mass(m1, m2)
+    omega = angular_velocity(m1, m2)
+    r1 = np.hypot(x + mu, y)
+    r2 = np.hypot(x - (1. - mu), y)
+    return omega * omega * (x * x + y * y) / 2. + m1 / r1 + m2 / r2
+
+def jacobi_constant(positions: np.ndarray, velocities: np.ndarray, m1: float, m2: float) -> np.ndarray:
+    """
+    Jacobi constant `C = 2 Omega - v^2` for positions and velocities of shape `(..., 2)`.
+    """
+    omega_field = pseudo_potential(positions[..., 0], positions[..., 1], m1, m2)
+    return 2. * omega_field - np.sum(velocities * velocities, axis=-1)
+
+def pseudo_potential_hessian(x, y, m1: float, m2: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Second derivatives `(Omega_xx, Omega_xy, Omega_yy)` of the pseudo-potential.
+    """
+    mu = reduced_mass(m1, m2)
+    omega = angular_velocity(m1, m2)
+    dx1 = x + mu
+    dx2 = x - (1. - mu)
+    r1_squared = dx1 * dx1 + y * y
+    r2_squared = dx2 * dx2 + y * y
+    k1 = m1 / r1_squared ** 1.5
+    k2 = m2 / r2_squared ** 1.5
+    l1 = 3. * k1 / r1_squared
+    l2 = 3. * k2 / r2_squared
+    omega_xx = omega * omega - k1 - k2 + l1 * dx1 * dx1 + l2 * dx2 * dx2
+    omega_yy = omega * omega - k1 - k2 + (l1 + l2) * y * y
+    omega_xy = (l1 * dx1 + l2 * dx2) * y
+    return omega_xx, omega_xy, omega_yy
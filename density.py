@@ -0,0 +1,88 @@
+"""
+Density-field rendering of large ship swarms.
+
+`LeoToMoon` draws every ship as a point of a `TrueDot`, so a frame costs time in the number of
+ships, and with 100k+ ships the picture is an overplotted blob anyway. `DensityField` instead bins
+the ship positions of a frame into a 2D histogram of the screen with one vectorised `bincount`,
+optionally split and weighted by ship status, and tone-maps it into an image:
+
+- brightness grows with `log(1 + count) / log(1 + saturation)`, so single ships stay visible
+  while dense streams do not clip. `saturation` is fixed rather than taken from each frame, so
+  brightness does not flicker as ships spread out;
+- the hue of a pixel is the mean of the status colours of its ships, weighted by `weights`
+  (e.g. to make the few captured ships stand out).
+
+Images are opaque RGB blended over the background, since the OpenGL renderer ignores the alpha
+of textures. The cost of a frame is bounded by the pixel grid rather than the ship count.
+`DensityImage` in `slides.py` shows the images as a single image mobject, e.g. in
+`LeoToMoonDensity`.
+
+Usage: `manim -qh slides.py LeoToMoonDensity --renderer opengl --write_to_movie`.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+def rgb(color: str) -> np.ndarray:
+    """
+    Colour `"#rrggbb"` as floats in `[0, 1]`.
+    """
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float32) / 255
+
+class DensityField:
+    """
+    Histogram of `width` x `height` bins over the frame of `frame_width` x `frame_height` scene
+    units centred on the origin, coloured with one colour per status.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        frame_width: float,
+        frame_height: float,
+        colors: Sequence[str],
+        background: str = "#000000",
+        weights: Optional[Sequence[float]] = None,
+        saturation: float = 16.,
+    ):
+        self.width = width
+        self.height = height
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.colors = np.array([rgb(color) for color in colors])
+        self.background = rgb(background)
+        self.weights = np.ones(len(colors)) if weights is None else np.asarray(weights, dtype=np.float64)
+        assert len(self.weights) == len(self.colors), "one weight per status colour"
+        self.saturation = saturation
+
+    def histogram(self, points: np.ndarray, status: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Weighted counts of `points` (shape `(n, 2)` in scene units) per bin and status, shape
+        `(height, width, statuses)`. Without `status` every point counts as status 0.
+        """
+        statuses = len(self.colors)
+        column = np.floor((points[:, 0] / self.frame_width + 0.5) * self.width).astype(np.int64)
+        # Row 0 is the top of the image.
+        row = np.floor((0.5 - points[:, 1] / self.frame_height) * self.height).astype(np.int64)
+        inside = (column >= 0) & (column < self.width) & (row >= 0) & (row < self.height)
+        bins = (row[inside] * self.width + column[inside]) * statuses
+        if status is not None:
+            bins += status[inside]
+        counts = np.bincount(bins, minlength=self.width * self.height * statuses)
+        return counts.reshape((self.height, self.width, statuses)) * self.weights
+
+    def render(self, points: np.ndarray, status: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Tone-mapped image of `points`, shape `(height, width, 3)` of `uint8`.
+        """
+        counts = self.histogram(points, status)
+        total = counts.sum(axis=-1)
+        occupied = total > 0
+        hue = counts[occupied] @ self.colors / total[occupied, None]
+        brightness = np.minimum(np.log1p(total[occupied]) / np.log1p(self.saturation), 1.)
+        image = np.empty((self.height, self.width, 3))
+        image[:] = self.background
+        image[occupied] = self.background + (hue - self.background) * brightness[:, None]
+        return np.rint(image * 255).astype(np.uint8)
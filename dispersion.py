@@ -0,0 +1,245 @@
+"""
+Monte-Carlo launch dispersion around a ballistic-capture ship.
+
+The capture in `LeoToMoon` and `BallisticCapture` comes from one ship of a deterministic grid whose
+whole velocity window is only `1e-4 * leo_v` wide. Here we sample perturbed injection states around
+that ship and classify every sample with the same latched criteria as `sweep.py`, to estimate how
+likely a real launch with injection errors is to be captured.
+
+Errors are drawn from independent normal distributions in the local frame of the nominal
+injection point relative to the Earth:
+
+- `radial` and `along_track`: position errors in Earth-Moon distances,
+- `speed`: relative error of the speed relative to the Earth,
+- `flight_path`: rotation of the velocity in radians.
+
+Samples are propagated in batches across a process pool. Each batch only keeps one chunk of
+trajectories in memory and is reduced to per-sample outcomes, which are streamed into a memory-mapped
+`.npy` file and into a 2D outcome map over speed and flight-path errors. As in `sweep.py`, the
+integrator and step size default to those recorded for `leo_to_moon` by `dt_tuner.py`.
+
+Usage: `python dispersion.py --samples 20000 --workers 8` writes `data/dispersion_<ship>.npy` and
+`data/dispersion_<ship>_map.npz`.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+
+import scenarios
+from capture_search import best_ship
+from dt_tuner import recommended
+from events import STATUS_CAPTURED, STATUS_DEFAULT, STATUS_REACHED_MOON, STATUS_RETURNED_TO_EARTH
+from propagator import METHODS, trace_planets
+from sweep import summarise
+
+ERRORS = ("radial", "along_track", "speed", "flight_path")
+
+DISPERSION_DTYPE = np.dtype([
+    ("sample", "i8"),
+    ("radial", "f8"),
+    ("along_track", "f8"),
+    ("speed", "f8"),
+    ("flight_path", "f8"),
+    ("min_moon_distance", "f8"),
+    ("min_moon_distance_time", "f8"),
+    ("capture_time", "f8"),
+    ("capture_duration", "f8"),
+    ("status", "u1"),
+])
+
+STATUSES = (STATUS_DEFAULT, STATUS_RETURNED_TO_EARTH, STATUS_REACHED_MOON, STATUS_CAPTURED)
+
+def nominal_state(ship: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Initial position and velocity of `ship` in the `src/leo_to_moon.rs` grid.
+    """
+    _, body_positions, body_velocities = scenarios.leo_to_moon_bodies()
+    positions, velocities = scenarios.leo_to_moon_ships(body_positions, body_velocities)
+    return positions[ship], velocities[ship]
+
+def sample_errors(batch: int, size: int, sigmas: dict[str, float], seed: int) -> np.ndarray:
+    """
+    Table of `size` samples with drawn errors and empty outcomes. Every batch has its own
+    random stream, so results do not depend on how batches are spread across workers.
+    """
+    rng = np.random.default_rng([seed, batch])
+    rows = np.zeros(size, dtype=DISPERSION_DTYPE)
+    rows["sample"] = batch * size + np.arange(size)
+    for name in ERRORS:
+        rows[name] = rng.normal(0., sigmas[name], size)
+    rows["min_moon_distance"] = np.inf
+    rows["min_moon_distance_time"] = np.nan
+    rows["capture_time"] = np.nan
+    return rows
+
+def perturb(rows: np.ndarray, position: np.ndarray, velocity: np.ndarray, earth_position: np.ndarray, earth_velocity: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Apply the errors of `rows` to the nominal state. Returns positions and velocities of shape
+    `(len(rows), 2)`.
+    """
+    r = position - earth_position
+    v = velocity - earth_velocity
+    radial = r / np.linalg.norm(r)
+    along = np.array([-radial[1], radial[0]])
+    positions = position + rows["radial"][:, None] * radial + rows["along_track"][:, None] * along
+
+    angle = rows["flight_path"]
+    c, s = np.cos(angle), np.sin(angle)
+    rotated = np.stack([c * v[0] - s * v[1], s * v[0] + c * v[1]], axis=1)
+    velocities = earth_velocity + (1. + rows["speed"])[:, None] * rotated
+    return positions, velocities
+
+def run_batch(
+    rows: np.ndarray,
+    ship: int,
+    dt: float,
+    total_time: float,
+    chunk_size: int,
+    method: str,
+) -> np.ndarray:
+    rows = rows.copy()
+    masses, body_positions, body_velocities = scenarios.leo_to_moon_bodies()
+    bodies_at_t = trace_planets(masses, body_positions, body_velocities, dt, int(total_time / dt))
+    position, velocity = nominal_state(ship)
+    ship_positions, ship_velocities = perturb(rows, position, velocity, body_positions[1], body_velocities[1])
+    summarise(rows, masses, bodies_at_t, ship_positions, ship_velocities, dt, chunk_size, method)
+    return rows
+
+class OutcomeMap:
+    """
+    Outcome counts per status on a grid of speed and flight-path errors, accumulated batch by
+    batch. Samples outside the grid are clamped to the edge cells.
+    """
+
+    def __init__(self, speed_edges: np.ndarray, flight_path_edges: np.ndarray):
+        self.speed_edges = speed_edges
+        self.flight_path_edges = flight_path_edges
+        self.counts = np.zeros((len(STATUSES), len(speed_edges) - 1, len(flight_path_edges) - 1), dtype=np.int64)
+
+    def add(self, rows: np.ndarray):
+        i = np.clip(np.searchsorted(self.speed_edges, rows["speed"]) - 1, 0, self.counts.shape[1] - 1)
+        j = np.clip(np.searchsorted(self.flight_path_edges, rows["flight_path"]) - 1, 0, self.counts.shape[2] - 1)
+        k = np.searchsorted(STATUSES, rows["status"])
+        np.add.at(self.counts, (k, i, j), 1)
+
+    def capture_probability(self) -> np.ndarray:
+        """
+        Fraction of captured samples per cell (nan for empty cells).
+        """
+        total = self.counts.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.counts[STATUSES.index(STATUS_CAPTURED)] / total
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            speed_edges=self.speed_edges,
+            flight_path_edges=self.flight_path_edges,
+            statuses=np.array(STATUSES),
+            counts=self.counts,
+            capture_probability=self.capture_probability(),
+        )
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> tuple[float, float]:
+    """
+    95% confidence interval for a binomial proportion, well behaved for probabilities near 0 or 1.
+    """
+    if trials == 0:
+        return 0., 1.
+    p = successes / trials
+    denominator = 1. + z * z / trials
+    centre = (p + z * z / (2. * trials)) / denominator
+    half_width = z * np.sqrt(p * (1. - p) / trials + z * z / (4. * trials * trials)) / denominator
+    return centre - half_width, centre + half_width
+
+def run_dispersion(
+    out: str,
+    ship: int,
+    samples: int,
+    sigmas: dict[str, float],
+    seed: int = 0,
+    batch_size: int = 250,
+    dt: float = 0.001,
+    total_time: float = 24.3,
+    chunk_size: int = 500,
+    method: str = "euler",
+    bins: int = 40,
+    workers: Optional[int] = None,
+) -> tuple[np.ndarray, OutcomeMap]:
+    """
+    Propagate `samples` (rounded up to whole batches) dispersed launches of `ship` and stream their
+    outcomes into `out` (a memory-mapped `.npy` table of `DISPERSION_DTYPE`). Returns the table and
+    the outcome map over `±3 sigma` of the speed and flight-path errors.
+    """
+    batches = -(-samples // batch_size)
+    table = np.lib.format.open_memmap(out, mode="w+", dtype=DISPERSION_DTYPE, shape=(batches * batch_size,))
+    outcome_map = OutcomeMap(
+        np.linspace(-3. * sigmas["speed"], 3. * sigmas["speed"], bins + 1),
+        np.linspace(-3. * sigmas["flight_path"], 3. * sigmas["flight_path"], bins + 1),
+    )
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_batch, sample_errors(batch, batch_size, sigmas, seed), ship, dt, total_time, chunk_size, method): batch
+            for batch in range(batches)
+        }
+        for i, future in enumerate(as_completed(futures)):
+            rows = future.result()
+            batch = futures[future]
+            table[batch * batch_size:(batch + 1) * batch_size] = rows
+            outcome_map.add(rows)
+            captured = outcome_map.counts[STATUSES.index(STATUS_CAPTURED)].sum()
+            done = outcome_map.counts.sum()
+            print(f"batch {batch} done ({i + 1}/{batches}, {time.perf_counter() - start_time:.0f}s): "
+                  f"{captured}/{done} captured")
+    table.flush()
+    return table, outcome_map
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte-Carlo launch dispersion around a capture trajectory.")
+    parser.add_argument("--ship", type=int, default=None, help="nominal ship; defaults to the best ship of capture_search.py")
+    parser.add_argument("--samples", type=int, default=10000)
+    parser.add_argument("--sigma-position", type=float, default=2.6e-6, help="position error in Earth-Moon distances (2.6e-6 is about 1 km)")
+    parser.add_argument("--sigma-speed", type=float, default=1e-5, help="relative speed error")
+    parser.add_argument("--sigma-flight-path", type=float, default=1e-4, help="flight-path angle error in radians")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=250)
+    parser.add_argument("--dt", type=float, default=None, help="defaults to the step size recommended by dt_tuner.py")
+    parser.add_argument("--method", choices=METHODS, default=None, help="defaults to the integrator recommended by dt_tuner.py")
+    parser.add_argument("--total-time", type=float, default=24.3)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--bins", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    ship = args.ship
+    if ship is None:
+        assert os.path.exists("data/leo_to_moon_capture_candidates.npy"), "run capture_search.py first or pass --ship"
+        ship = best_ship()
+    sigmas = {
+        "radial": args.sigma_position,
+        "along_track": args.sigma_position,
+        "speed": args.sigma_speed,
+        "flight_path": args.sigma_flight_path,
+    }
+    method, dt = recommended("leo_to_moon", "euler", scenarios.LEO_TO_MOON_DT, args.total_time)
+    method, dt = args.method or method, args.dt or dt
+    print(f"Dispersing ship {ship} with {args.samples} samples, integrating with {method}, dt = {dt}")
+    table, outcome_map = run_dispersion(
+        f"data/dispersion_{ship}.npy", ship, args.samples, sigmas,
+        seed=args.seed, batch_size=args.batch_size, dt=dt, total_time=args.total_time,
+        chunk_size=args.chunk_size, method=method, bins=args.bins, workers=args.workers,
+    )
+    outcome_map.save(f"data/dispersion_{ship}_map.npz")
+
+    total = len(table)
+    for code, name in [(STATUS_CAPTURED, "captured"), (STATUS_REACHED_MOON, "reached Moon"), (STATUS_RETURNED_TO_EARTH, "returned to Earth"), (STATUS_DEFAULT, "other")]:
+        count = int(np.count_nonzero(table["status"] == code))
+        low, high = wilson_interval(count, total)
+        print(f"{name}: {count}/{total} = {count / total:.2%} (95% CI {low:.2%} - {high:.2%})")
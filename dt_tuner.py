@@ -0,0 +1,175 @@
+"""
+Pick the cheapest integrator and step size for the LEO-to-Moon runs from measured accuracy.
+
+The Rust code hand-picks `dt = 0.001` for LEO-to-Moon, and `sweep.py` and `dispersion.py` repeat it
+for their fixed-step Python runs over the same 24.3 time units. Here we propagate a sample of the
+ships over the whole run with every method of `propagator.py` at several step sizes, and measure,
+vectorised across ships, the divergence from a tight-tolerance `adaptive.dopri5` reference
+trajectory.
+
+The cheapest (method, dt) pair within the accuracy budget is recorded in `data/dt_tuning.json`,
+together with the length of the tuning run. `recommended` reads it back so that `sweep.py` and
+`dispersion.py` can use the fastest acceptable settings, and refuses it for runs longer than the
+tuning run. The other simulations keep their step sizes: the planet demos and halo orbits are only
+run by the Rust binary, `regression.py` mirrors its step sizes on purpose, and the periodic orbits
+and manifolds are integrated adaptively.
+
+The trajectories pass close to the Moon and are chaotic over the capture window, so the divergence
+does not go to zero with the step size: it levels off at about 0.1-0.4 for every method, against
+about 300 for Euler at the Rust step size.
+
+Usage: `python dt_tuner.py leo_to_moon --max-divergence 0.5`
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+import ephemeris
+import scenarios
+from adaptive import propagate_ships
+from propagator import METHODS, FictitiousForce, trace_ships
+
+TUNING_PATH = "data/dt_tuning.json"
+
+class Scenario:
+    """
+    A representative propagation of a sample of ships, as long as the runs that use its step size.
+    """
+
+    def __init__(
+        self,
+        masses: np.ndarray,
+        bodies: ephemeris.Ephemeris,
+        ship_positions: np.ndarray,
+        ship_velocities: np.ndarray,
+        total_time: float,
+        rust_dt: float,
+        fictitious_force: Optional[FictitiousForce] = None,
+    ):
+        self.masses = masses
+        self.bodies = bodies
+        self.ship_positions = ship_positions
+        self.ship_velocities = ship_velocities
+        self.total_time = total_time
+        self.rust_dt = rust_dt
+        self.fictitious_force = fictitious_force
+
+def leo_to_moon(total_time: float = 24.3) -> Scenario:
+    masses, body_positions, body_velocities = scenarios.leo_to_moon_bodies()
+    table_dt = 0.0005
+    table = scenarios.trace_bodies(masses, body_positions, body_velocities, np.arange(int(total_time / table_dt) + 4) * table_dt)
+    bodies = ephemeris.Ephemeris.from_table(table, table_dt, masses)
+    r, v = scenarios.leo_to_moon_ships(body_positions, body_velocities)
+    return Scenario(masses, bodies, r[::40], v[::40], total_time, 0.001)
+
+SCENARIOS = {
+    "leo_to_moon": leo_to_moon,
+}
+
+def evaluate(scenario: Scenario, methods: tuple[str, ...], dts: list[float], checkpoints: int = 20) -> list[dict]:
+    """
+    Accuracy and cost of every (method, dt). Accuracy is measured at `checkpoints` roughly evenly
+    spaced times, rounded onto the grid of the largest dt, which every other dt needs to divide.
+    """
+    t_check = np.rint(np.linspace(0., scenario.total_time, checkpoints + 1) / max(dts)) * max(dts)
+    ref_r, _, _ = propagate_ships(
+        scenario.masses, scenario.bodies, scenario.ship_positions, scenario.ship_velocities, t_check,
+        fictitious_force=scenario.fictitious_force, rtol=1e-12, atol=1e-14,
+    )
+    scale = np.max(np.abs(ref_r - ref_r[0]))
+
+    results = []
+    for method in methods:
+        for dt in dts:
+            steps = int(round(scenario.total_time / dt)) + 1
+            index = np.rint(t_check / dt).astype(np.int64)
+            start = time.perf_counter()
+            positions = trace_ships(
+                scenario.masses, scenario.bodies, scenario.ship_positions, scenario.ship_velocities, dt, steps,
+                fictitious_force=scenario.fictitious_force, method=method,
+            )
+            elapsed = time.perf_counter() - start
+
+            error = np.linalg.norm(positions[index] - ref_r, axis=-1)
+            result = {
+                "method": method,
+                "dt": dt,
+                # Wall-clock seconds per unit of simulated time, for the sampled ships.
+                "cost": elapsed / scenario.total_time,
+                "max_divergence": float(np.nanmax(error)) if np.isfinite(error).all() else float("inf"),
+                "relative_divergence": float(np.nanmax(error) / scale) if np.isfinite(error).all() else float("inf"),
+            }
+            results.append(result)
+            print(f"{method:>6} dt = {dt:.2e}: divergence = {result['max_divergence']:.2e}, cost = {result['cost']:.3f}s")
+    return results
+
+def recommend(results: list[dict], max_divergence: float) -> Optional[dict]:
+    """
+    Cheapest result within the accuracy budget, or `None` if nothing meets it.
+    """
+    ok = [r for r in results if r["max_divergence"] <= max_divergence]
+    return min(ok, key=lambda r: r["cost"]) if ok else None
+
+def recommended(
+    scenario: str,
+    default_method: str,
+    default_dt: float,
+    total_time: Optional[float] = None,
+    path: str = TUNING_PATH,
+) -> tuple[str, float]:
+    """
+    `(method, dt)` recorded for `scenario`, or the defaults if it has not been tuned. With
+    `total_time`, a recommendation tuned over a shorter horizon is refused: errors grow with time,
+    so a step size that is accurate over the tuning run says nothing about a longer one.
+    """
+    if not os.path.exists(path):
+        return default_method, default_dt
+    with open(path) as f:
+        tuning = json.load(f).get(scenario, {})
+    entry = tuning.get("recommended")
+    if entry is None:
+        return default_method, default_dt
+    tuned_time = tuning.get("total_time")
+    if total_time is not None and (tuned_time is None or tuned_time < total_time):
+        print(f"warning: {scenario} was tuned over t = {tuned_time}, not the {total_time} of this run; "
+              f"using {default_method} with dt = {default_dt}")
+        return default_method, default_dt
+    return entry["method"], entry["dt"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find the cheapest integrator and step size within an accuracy budget.")
+    parser.add_argument("scenario", choices=SCENARIOS.keys())
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS)
+    parser.add_argument("--factors", type=float, nargs="+", default=[4., 2., 1., 0.5, 0.25], help="step sizes as multiples of the Rust step size")
+    parser.add_argument("--max-divergence", type=float, default=0.5, help="maximum position error against the reference")
+    parser.add_argument("--total-time", type=float, default=None, help="length of the tuning run (defaults to the scenario's)")
+    parser.add_argument("--out", default=TUNING_PATH)
+    args = parser.parse_args()
+
+    scenario = SCENARIOS[args.scenario](*([] if args.total_time is None else [args.total_time]))
+    dts = [scenario.rust_dt * factor for factor in args.factors]
+    results = evaluate(scenario, tuple(args.methods), dts)
+    best = recommend(results, args.max_divergence)
+    if best is None:
+        print("No setting meets the accuracy budget; try smaller step sizes")
+    else:
+        print(f"Recommended: {best['method']} with dt = {best['dt']:.2e} "
+              f"({best['dt'] / scenario.rust_dt:.2f}x the Rust step size)")
+
+    tuning = {}
+    if os.path.exists(args.out):
+        with open(args.out) as f:
+            tuning = json.load(f)
+    tuning[args.scenario] = {
+        "total_time": scenario.total_time,
+        "budget": {"max_divergence": args.max_divergence},
+        "recommended": None if best is None else {"method": best["method"], "dt": best["dt"]},
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(tuning, f, indent=2)
@@ -0,0 +1,193 @@
+"""
+Render the presentation and the blog version of a scene in a single pass.
+
+Most scenes of `slides.py` look the same in both decks apart from the background colour of their
+theme (see `themes.py`), yet `make build-video-all` and `make -f Makefile-blog build-video-all`
+load the same datasets, build the same mobjects and run the same updaters twice. Here such a scene
+is rendered once with the `slides` theme, and every frame is drawn a second time on the `blog`
+background into a second set of partial movie files. At the end `manim-slides` writes the slides of
+each deck from its own set of files: `slides/` for the presentation and `.cache/dual/<Scene>/slides/`
+for the blog, both then snapshotted into `.cache/decks/<deck>/`. The second draw reuses the scene
+state of the frame, so it costs a fraction of a second render.
+
+Scenes whose code reads `THEME` (e.g. `EffectivePotential`, which only shows the equations in the
+presentation) have different timelines and are rendered once per deck as usual. Everything runs in
+the pool of `render_scheduler.py`, with the render cache of `render_cache.py`.
+
+Usage: `python dual_render.py -q h --workers 4`, then `python render_scheduler.py slides --collect`
+(or `blog`).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Optional
+
+from render_cache import FileHashes, RenderCache, render_key, scene_inputs
+from render_scheduler import DECKS, DECKS_DIR, Job, restore_cached, schedule, snapshot
+from themes import THEMES
+
+DUAL_DIR = ".cache/dual"
+
+# Runs `manim` with the OpenGL renderer patched to draw every written frame twice: first on the
+# background given as the first argument, streamed into partial movie files of its own, then on the
+# scene's own background. After the usual slides, `manim-slides` also writes the slides made of the
+# second set of files into the folder given as the second argument.
+_DUAL_SCRIPT = """
+import os, sys
+from pathlib import Path
+from manim.renderer.opengl_renderer import OpenGLRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+from manim_slides.slide.base import BaseSlide
+
+background, folder, partial_dir, argv = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4:]
+os.makedirs(partial_dir, exist_ok=True)
+twins = {}
+
+update_frame = OpenGLRenderer.update_frame
+write_opengl_frame = SceneFileWriter.write_opengl_frame
+open_movie_pipe = SceneFileWriter.open_movie_pipe
+close_movie_pipe = SceneFileWriter.close_movie_pipe
+save_slides = BaseSlide._save_slides
+
+def patched_update_frame(self, scene):
+    if not self.skip_animations:
+        own = self._background_color
+        self.background_color = background
+        update_frame(self, scene)
+        self.twin_frame = self.get_raw_frame_buffer_object_data()
+        self._background_color = own
+    update_frame(self, scene)
+
+def patched_write_opengl_frame(self, renderer):
+    write_opengl_frame(self, renderer)
+    if getattr(self, "twin_process", None) is not None:
+        self.twin_process.stdin.write(renderer.twin_frame)
+
+def patched_open_movie_pipe(self, file_path=None):
+    open_movie_pipe(self, file_path)
+    own_path, own_process = self.partial_movie_file_path, self.writing_process
+    twin_path = os.path.join(partial_dir, os.path.basename(str(own_path)))
+    open_movie_pipe(self, twin_path)
+    self.twin_process = self.writing_process
+    twins[str(own_path)] = twin_path
+    self.partial_movie_file_path, self.writing_process = own_path, own_process
+
+def patched_close_movie_pipe(self):
+    close_movie_pipe(self)
+    self.twin_process.stdin.close()
+    self.twin_process.wait()
+    self.twin_process = None
+
+def patched_save_slides(self, *args, **kwargs):
+    save_slides(self, *args, **kwargs)
+    writer = self.renderer.file_writer
+    writer.partial_movie_files = [None if path is None else twins[str(path)] for path in writer.partial_movie_files]
+    type(self)._background_color = property(lambda _: background)
+    self._output_folder = Path(folder)
+    save_slides(self, *args, **kwargs)
+
+OpenGLRenderer.update_frame = patched_update_frame
+SceneFileWriter.write_opengl_frame = patched_write_opengl_frame
+SceneFileWriter.open_movie_pipe = patched_open_movie_pipe
+SceneFileWriter.close_movie_pipe = patched_close_movie_pipe
+BaseSlide._save_slides = patched_save_slides
+from manim.__main__ import main
+sys.argv = ["manim"] + argv
+main()
+"""
+
+def shares_timeline(deck_file: str, scene: str) -> bool:
+    """
+    Whether `scene` only depends on its theme through the background colour.
+    """
+    return "THEME" not in scene_inputs(deck_file, scene)["names"]
+
+def _relocate(folder: str, scene: str):
+    """
+    Point the clips in `<folder>/<Scene>.json` to `slides/files/<Scene>/`, where `collect` puts them.
+    """
+    path = os.path.join(folder, f"{scene}.json")
+    with open(path) as f:
+        presentation = json.load(f)
+    for slide in presentation["slides"]:
+        for field in ("file", "rev_file"):
+            slide[field] = os.path.join("slides", "files", scene, os.path.basename(slide[field]))
+    with open(path, "w") as f:
+        json.dump(presentation, f, indent=2)
+
+class DualJob(Job):
+    """
+    A scene of `deck` rendered together with the same scene of `twin_deck`.
+    """
+
+    def __init__(self, deck: str, twin_deck: str, scene: str, quality: str):
+        super().__init__(deck, scene, quality)
+        self.twin_deck = twin_deck
+        self.key = f"{deck}+{twin_deck}:{scene}:q{quality}"
+        self.twin_cache_key: Optional[str] = None
+        self.twin_inputs: Optional[dict] = None
+        self.folder = os.path.join(DUAL_DIR, scene, "slides")
+
+    def command(self) -> list[str]:
+        assert DECKS[self.deck]["file"] == DECKS[self.twin_deck]["file"]
+        return [
+            sys.executable, "-c", _DUAL_SCRIPT,
+            THEMES[DECKS[self.twin_deck]["theme"]]["background_color"], self.folder, os.path.join(DUAL_DIR, self.scene, "partial"),
+            *super().command()[1:], "--disable_caching",
+        ]
+
+    def finished(self, cache: Optional[RenderCache]):
+        super().finished(cache)
+        _relocate(self.folder, self.scene)
+        snapshot(self.twin_deck, self.scene, self.folder)
+        if cache is not None and self.twin_cache_key is not None:
+            cache.store(self.twin_deck, self.scene, self.twin_cache_key, os.path.join(DECKS_DIR, self.twin_deck), self.twin_inputs)
+
+def plan_jobs(deck: str, twin_deck: str, quality: str, cache: Optional[RenderCache]) -> list[Job]:
+    """
+    Jobs rendering every scene of both decks: one `DualJob` for each scene the decks share with the
+    same timeline, unless both of its renders are cached, and a `Job` for each other scene.
+    """
+    deck_file = DECKS[deck]["file"]
+    shared = [
+        scene for scene in DECKS[deck]["scenes"]
+        if scene in DECKS[twin_deck]["scenes"] and DECKS[twin_deck]["file"] == deck_file and shares_timeline(deck_file, scene)
+    ]
+    single = [Job(d, scene, quality) for d in (deck, twin_deck) for scene in DECKS[d]["scenes"] if scene not in shared]
+    jobs: list[Job] = single if cache is None else restore_cached(single, cache)
+
+    hashes = FileHashes()
+    for scene in shared:
+        job = DualJob(deck, twin_deck, scene, quality)
+        job.cache_key, job.inputs = render_key(deck, deck_file, scene, quality, hashes)
+        job.twin_cache_key, job.twin_inputs = render_key(twin_deck, deck_file, scene, quality, hashes)
+        if cache is not None and cache.has(deck, scene, job.cache_key) and cache.has(twin_deck, scene, job.twin_cache_key):
+            cache.restore(deck, scene, job.cache_key, os.path.join(DECKS_DIR, deck))
+            cache.restore(twin_deck, scene, job.twin_cache_key, os.path.join(DECKS_DIR, twin_deck))
+            print(f"{job.key}: unchanged, restored from the render cache")
+            continue
+        shutil.rmtree(os.path.join(DUAL_DIR, scene), ignore_errors=True)
+        jobs.append(job)
+    hashes.save()
+    return jobs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render both decks, drawing scenes they share in a single pass.")
+    parser.add_argument("-q", "--quality", default="h", help="manim quality flag (l, m, h, p, k)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--memory-per-worker", type=float, default=4., help="memory budget per worker in GB")
+    parser.add_argument("--no-cache", action="store_true", help="render every scene even if a cached render is up to date")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cache = None if args.no_cache else RenderCache()
+    jobs = plan_jobs("slides", "blog", args.quality, cache)
+    failed = schedule(jobs, args.workers, args.memory_per_worker * 1e9 * args.workers, cache=cache)
+    dual = sum(isinstance(job, DualJob) for job in jobs)
+    print(f"Rendered {len(jobs) - len(failed)} jobs ({dual} for both decks at once) in {time.perf_counter() - start:.0f}s")
+    if failed:
+        raise SystemExit(f"failed: {', '.join(job.key for job in failed)}")
@@ -0,0 +1,184 @@
+"""
+Body positions as functions of time instead of stored per-step tensors.
+
+An `Ephemeris` is a list of bodies, each of which can be evaluated at any time or vector of times:
+
+- `StaticBody`: fixed position, e.g. the planets of `SinglePlanet` and `MultiPlanet` or the
+  primaries in a co-rotating frame.
+- `CircularBody`: circular Keplerian orbit around another body.
+- `TableBody`: positions tabulated every `dt` (e.g. a `.npy` file written by the Rust code, which
+  may be memory-mapped), interpolated between samples.
+
+`Ephemeris` instances are callable with a vector of times and return positions of shape
+`(len(t), bodies, 2)`, so they can be passed as `bodies` to `adaptive.propagate_ships` and as
+`mass_positions` to `propagator.propagate_chunks`.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence
+
+import numpy as np
+
+import scenarios
+from cr3bp import primaries
+
+class Body(ABC):
+    @abstractmethod
+    def position(self, t: np.ndarray) -> np.ndarray:
+        """
+        Position at times `t` (shape `(n,)`), shape `(n, 2)`.
+        """
+
+    @abstractmethod
+    def velocity(self, t: np.ndarray) -> np.ndarray:
+        """
+        Velocity at times `t` (shape `(n,)`), shape `(n, 2)`.
+        """
+
+class StaticBody(Body):
+    def __init__(self, position: Sequence[float]):
+        self.r = np.asarray(position, dtype=np.float64)
+
+    def position(self, t: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(self.r, (len(t), 2))
+
+    def velocity(self, t: np.ndarray) -> np.ndarray:
+        return np.zeros((len(t), 2))
+
+class CircularBody(Body):
+    """
+    Circular orbit of `radius` around `center` with angular velocity `omega` (negative for
+    clockwise), at angle `phase` at `t = 0`.
+    """
+
+    def __init__(self, center: Body, radius: float, omega: float, phase: float = 0.):
+        self.center = center
+        self.radius = radius
+        self.omega = omega
+        self.phase = phase
+
+    @classmethod
+    def kepler(cls, center: Body, central_mass: float, radius: float, phase: float = 0.) -> "CircularBody":
+        """
+        Circular orbit with the Keplerian angular velocity `sqrt(central_mass / radius^3)`.
+        """
+        return cls(center, radius, np.sqrt(central_mass / radius ** 3), phase)
+
+    def _angle(self, t: np.ndarray) -> np.ndarray:
+        return self.phase + self.omega * np.asarray(t, dtype=np.float64)
+
+    def position(self, t: np.ndarray) -> np.ndarray:
+        angle = self._angle(t)
+        offset = self.radius * np.stack([np.cos(angle), np.sin(angle)], axis=-1)
+        return self.center.position(t) + offset
+
+    def velocity(self, t: np.ndarray) -> np.ndarray:
+        angle = self._angle(t)
+        offset = self.radius * self.omega * np.stack([-np.sin(angle), np.cos(angle)], axis=-1)
+        return self.center.velocity(t) + offset
+
+class TableBody(Body):
+    """
+    Positions tabulated every `dt` from `t0`, shape `(time_steps, 2)`. Positions and velocities are
+    interpolated with cubic Hermite polynomials using central-difference slopes. Only the samples
+    around the requested times are read, so `table` can be memory-mapped.
+    """
+
+    def __init__(self, table: np.ndarray, dt: float, t0: float = 0.):
+        assert len(table) >= 2, "need at least 2 tabulated time steps"
+        self.table = table
+        self.dt = dt
+        self.t0 = t0
+
+    def _samples(self, t: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        n = len(self.table)
+        s = (np.asarray(t, dtype=np.float64) - self.t0) / self.dt
+        i = np.clip(np.floor(s).astype(np.int64), 0, n - 2)
+        x = (s - i)[:, None]
+        # Rows i - 1 ... i + 2, clamped at the ends.
+        rows = np.clip(i[:, None] + np.arange(-1, 3), 0, n - 1)
+        p = np.asarray(self.table[rows.ravel()], dtype=np.float64).reshape((len(i), 4, 2))
+        # Central-difference slopes per sample, one-sided at the ends of the table.
+        m0 = (p[:, 2] - p[:, 0]) / np.where(rows[:, 2] - rows[:, 0] == 0, 1, rows[:, 2] - rows[:, 0])[:, None]
+        m1 = (p[:, 3] - p[:, 1]) / np.where(rows[:, 3] - rows[:, 1] == 0, 1, rows[:, 3] - rows[:, 1])[:, None]
+        return x, p[:, 1], p[:, 2], m0, m1
+
+    def position(self, t: np.ndarray) -> np.ndarray:
+        x, p0, p1, m0, m1 = self._samples(t)
+        x2, x3 = x * x, x * x * x
+        return (2 * x3 - 3 * x2 + 1) * p0 + (x3 - 2 * x2 + x) * m0 + (-2 * x3 + 3 * x2) * p1 + (x3 - x2) * m1
+
+    def velocity(self, t: np.ndarray) -> np.ndarray:
+        x, p0, p1, m0, m1 = self._samples(t)
+        x2 = x * x
+        return ((6 * x2 - 6 * x) * p0 + (3 * x2 - 4 * x + 1) * m0 + (-6 * x2 + 6 * x) * p1 + (3 * x2 - 2 * x) * m1) / self.dt
+
+class Ephemeris:
+    def __init__(self, bodies: list[Body], masses: Optional[Sequence[float]] = None):
+        self.bodies = bodies
+        self.masses = None if masses is None else np.asarray(masses, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.bodies)
+
+    def __call__(self, t: np.ndarray) -> np.ndarray:
+        return self.positions(t)
+
+    def positions(self, t) -> np.ndarray:
+        """
+        Positions of all bodies at times `t`, shape `(len(t), bodies, 2)`. A scalar `t` gives
+        shape `(bodies, 2)`.
+        """
+        t_ = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        r = np.stack([body.position(t_) for body in self.bodies], axis=1)
+        return r if np.ndim(t) else r[0]
+
+    def velocities(self, t) -> np.ndarray:
+        t_ = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        v = np.stack([body.velocity(t_) for body in self.bodies], axis=1)
+        return v if np.ndim(t) else v[0]
+
+    @classmethod
+    def from_table(cls, table: np.ndarray, dt: float, masses: Optional[Sequence[float]] = None, t0: float = 0.) -> "Ephemeris":
+        """
+        Table-backed ephemeris from positions of shape `(time_steps, bodies, 2)`, e.g.
+        `np.load("data/leo_to_moon_bodies.npy", mmap_mode="r")` with `scenarios.LEO_TO_MOON_DT`.
+        """
+        return cls([TableBody(table[:, i], dt, t0) for i in range(table.shape[1])], masses)
+
+def single_planet() -> Ephemeris:
+    """
+    The planet of `src/single_planet.rs`.
+    """
+    return Ephemeris([StaticBody([0., 0.])], [1.])
+
+def multi_planet() -> Ephemeris:
+    """
+    The three planets of `src/multi_planet.rs`.
+    """
+    return Ephemeris([StaticBody([-1., 0.]), StaticBody([0., 0.]), StaticBody([1., 0.])], [1., 1., 1.])
+
+def rotating_primaries(m1: float, m2: float) -> Ephemeris:
+    """
+    The two primaries of the circular restricted 3-body problem in the co-rotating COM frame.
+    """
+    r1, r2 = primaries(m1, m2)
+    return Ephemeris([StaticBody(r1), StaticBody(r2)], [m1, m2])
+
+def leo_to_moon_circular() -> Ephemeris:
+    """
+    Circular approximation of the Sun-Earth-Moon system of `src/leo_to_moon.rs`: the Earth-Moon
+    barycentre moves on a circle around a fixed Sun and the Earth and Moon on circles around the
+    barycentre, starting in the same configuration as `scenarios.leo_to_moon_bodies`.
+
+    The Rust initial conditions make the Moon orbit slightly eccentric, so use the table-backed
+    ephemeris when positions must match the traced ships exactly.
+    """
+    m0, m1, m2 = scenarios.SUN_MASS, scenarios.EARTH_MASS, scenarios.MOON_MASS
+    sun = StaticBody([0., 0.])
+    barycentre = CircularBody.kepler(sun, m0, scenarios.SUN_EARTH_DISTANCE)
+    mu = m1 * m2 / (m1 + m2)
+    omega = np.sqrt(m1 + m2)
+    earth = CircularBody(barycentre, mu, omega, np.pi)
+    moon = CircularBody(barycentre, 1. - mu, omega)
+    return Ephemeris([sun, earth, moon], [m0, m1, m2])
@@ -0,0 +1,297 @@
+"""
+Vectorised event detection over ship trajectories.
+
+Event functions are evaluated for all ships over chunks of time steps at once. A sign change of an
+event function between two samples marks a crossing, which is then located precisely by
+root-finding on a cubic Hermite interpolant of the trajectory. The result is a table of events
+sorted by time.
+
+The per-step ship status derived from the events (`LeoToMoonStatus`) goes to its own file rather
+than over the status written by `src/leo_to_moon.rs`, which the Rust code leaves at 0 for every ship.
+`LeoToMoon` colours its ships with the event status.
+
+Usage: `python events.py` reads `data/leo_to_moon_ships.npy` and `data/leo_to_moon_bodies.npy` and
+writes `data/leo_to_moon_events.npy` and `data/leo_to_moon_events_status.npy`.
+"""
+
+import argparse
+import time
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+import scenarios
+
+EVENT_DTYPE = np.dtype([
+    ("time", "f8"), ("ship", "i8"), ("event", "U24"), ("x", "f8"), ("y", "f8"), ("vx", "f8"), ("vy", "f8"),
+])
+
+# Ship status codes used by `LeoToMoon` in `slides.py`.
+STATUS_DEFAULT = 0
+STATUS_RETURNED_TO_EARTH = 1
+STATUS_REACHED_MOON = 2
+STATUS_CAPTURED = 3
+
+class State:
+    """
+    Kinematic state of ships and bodies.
+
+    `r` and `v` have shape `(..., 2)`; `bodies_r` and `bodies_v` have shape `(..., bodies, 2)`
+    where the leading dimensions broadcast against those of `r`.
+    """
+
+    def __init__(self, t: np.ndarray, r: np.ndarray, v: np.ndarray, bodies_r: np.ndarray, bodies_v: np.ndarray):
+        self.t = t
+        self.r = r
+        self.v = v
+        self.bodies_r = bodies_r
+        self.bodies_v = bodies_v
+
+    def relative_position(self, body: int) -> np.ndarray:
+        return self.r - self.bodies_r[..., body, :]
+
+    def relative_velocity(self, body: int) -> np.ndarray:
+        return self.v - self.bodies_v[..., body, :]
+
+    def distance(self, body: int) -> np.ndarray:
+        return np.linalg.norm(self.relative_position(body), axis=-1)
+
+    def orbital_energy(self, body: int, mass: float) -> np.ndarray:
+        """
+        Two-body specific orbital energy relative to `body`. Negative when the relative speed is
+        below the escape velocity `sqrt(2 * mass / d)`.
+        """
+        v_rel = self.relative_velocity(body)
+        return np.sum(v_rel * v_rel, axis=-1) / 2 - mass / self.distance(body)
+
+class Event:
+    """
+    An event happens when `g(state)` crosses zero. `direction` restricts detection to decreasing
+    (-1) or increasing (+1) crossings; 0 detects both.
+    """
+
+    def __init__(self, name: str, g: Callable[[State], np.ndarray], direction: int = 0):
+        self.name = name
+        self.g = g
+        self.direction = direction
+
+def distance_event(name: str, body: int, radius: float, direction: int = -1) -> Event:
+    """
+    Distance to `body` crosses `radius`. Detects entering by default.
+    """
+    return Event(name, lambda state: state.distance(body) - radius, direction)
+
+def capture_event(name: str, body: int, mass: float, zone_radius: float) -> Event:
+    """
+    Ship is within `zone_radius` of `body` and slower than the escape velocity relative to it.
+    This corrects the capture check in `src/leo_to_moon_compute.rs`, which subtracts the Moon's
+    displacement over one step rather than its velocity (it does not divide by `dt`), so the two can
+    classify a ship differently and the status of `events.py` need not match the Rust status.
+    """
+    def g(state: State) -> np.ndarray:
+        # Both conditions hold exactly when the larger of the two is negative.
+        return np.maximum(state.orbital_energy(body, mass), state.distance(body) - zone_radius)
+    return Event(name, g, -1)
+
+def leo_to_moon_events() -> list[Event]:
+    # Body indices: 0 = Sun, 1 = Earth, 2 = Moon.
+    return [
+        distance_event("moon_zone_entry", 2, scenarios.MOON_ZONE_RADIUS, -1),
+        distance_event("moon_zone_exit", 2, scenarios.MOON_ZONE_RADIUS, +1),
+        capture_event("moon_capture", 2, scenarios.MOON_MASS, scenarios.MOON_ZONE_RADIUS),
+        distance_event("earth_soi_exit", 1, scenarios.EARTH_SOI_RADIUS, +1),
+        distance_event("earth_soi_entry", 1, scenarios.EARTH_SOI_RADIUS, -1),
+    ]
+
+def _central_differences(x: np.ndarray, dt: float) -> np.ndarray:
+    """
+    Velocities from positions sampled every `dt` along axis 0.
+    """
+    v = np.empty_like(x)
+    v[1:-1] = (x[2:] - x[:-2]) / (2 * dt)
+    v[0] = (x[1] - x[0]) / dt
+    v[-1] = (x[-1] - x[-2]) / dt
+    return v
+
+def trajectory_chunks(ships: np.ndarray, bodies: np.ndarray, dt: float, chunk_size: int = 500) -> Iterator[tuple[int, State]]:
+    """
+    Yield `(first_time_step, state)` for consecutive chunks of time steps. Consecutive chunks
+    overlap by one sample so that crossings between chunks are not missed.
+
+    Velocities are not stored in the data files so they are computed with central differences.
+    `ships` and `bodies` may be memory-mapped; only one chunk is read at a time.
+    """
+    time_steps = len(ships)
+    assert len(bodies) == time_steps, "ship data and bodies data should have the same number of time steps"
+    for start in range(0, time_steps - 1, chunk_size):
+        end = min(start + chunk_size + 1, time_steps)
+        # One extra sample on each side for the differences.
+        lo, hi = max(start - 1, 0), min(end + 1, time_steps)
+        r = np.asarray(ships[lo:hi], dtype=np.float64)
+        b = np.asarray(bodies[lo:hi], dtype=np.float64)
+        v = _central_differences(r, dt)[start - lo:end - lo]
+        bv = _central_differences(b, dt)[start - lo:end - lo]
+        r = r[start - lo:end - lo]
+        b = b[start - lo:end - lo]
+        t = (start + np.arange(end - start)) * dt
+        yield start, State(t[:, None], r, v, b[:, None], bv[:, None])
+
+def _hermite(s: np.ndarray, h: float, x0, v0, x1, v1) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Cubic Hermite interpolation at `s` in `[0, 1]` of an interval of length `h`. Returns position
+    and velocity.
+    """
+    s = s.reshape(s.shape + (1,) * (x0.ndim - s.ndim))
+    s2 = s * s
+    s3 = s2 * s
+    x = (2 * s3 - 3 * s2 + 1) * x0 + (s3 - 2 * s2 + s) * h * v0 + (-2 * s3 + 3 * s2) * x1 + (s3 - s2) * h * v1
+    v = ((6 * s2 - 6 * s) * x0 + (3 * s2 - 4 * s + 1) * h * v0 + (-6 * s2 + 6 * s) * x1 + (3 * s2 - 2 * s) * h * v1) / h
+    return x, v
+
+def _locate(event: Event, state: State, steps: np.ndarray, ships: np.ndarray, g0: np.ndarray, g1: np.ndarray, dt: float, iterations: int = 40) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the crossing times of `event` for the intervals starting at the chunk-local `steps` for
+    `ships`, using the Illinois variant of regula falsi on the Hermite interpolant. Returns the
+    crossing times, positions and velocities.
+    """
+    r0, r1 = state.r[steps, ships], state.r[steps + 1, ships]
+    v0, v1 = state.v[steps, ships], state.v[steps + 1, ships]
+    b0, b1 = state.bodies_r[steps, 0], state.bodies_r[steps + 1, 0]
+    bv0, bv1 = state.bodies_v[steps, 0], state.bodies_v[steps + 1, 0]
+    t0 = state.t[steps, 0]
+
+    def evaluate(s: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        r, v = _hermite(s, dt, r0, v0, r1, v1)
+        br, bv = _hermite(s, dt, b0, bv0, b1, bv1)
+        return event.g(State(t0 + s * dt, r, v, br, bv)), r, v
+
+    lo = np.zeros(len(steps))
+    hi = np.ones(len(steps))
+    g_lo, g_hi = g0.copy(), g1.copy()
+    # Which side was kept in the last iteration, for the Illinois modification.
+    side = np.zeros(len(steps), dtype=np.int8)
+    s = lo
+    for _ in range(iterations):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = (lo * g_hi - hi * g_lo) / (g_hi - g_lo)
+        s = np.where(np.isfinite(s), np.clip(s, lo, hi), (lo + hi) / 2)
+        g, _, _ = evaluate(s)
+        same_as_lo = np.sign(g) == np.sign(g_lo)
+        lo = np.where(same_as_lo, s, lo)
+        hi = np.where(same_as_lo, hi, s)
+        g_hi = np.where(same_as_lo & (side == 1), g_hi / 2, np.where(same_as_lo, g_hi, g))
+        g_lo = np.where(~same_as_lo & (side == -1), g_lo / 2, np.where(same_as_lo, g, g_lo))
+        side = np.where(same_as_lo, 1, -1).astype(np.int8)
+        if np.all(hi - lo < 1e-10):
+            break
+    _, r, v = evaluate(s)
+    return t0 + s * dt, r, v
+
+def detect_events(
+    ships: np.ndarray,
+    bodies: np.ndarray,
+    dt: float,
+    events: list[Event],
+    chunk_size: int = 500,
+    on_chunk: Optional[Callable[[int, dict[str, np.ndarray]], None]] = None,
+) -> np.ndarray:
+    """
+    Detect every crossing of `events` in the trajectories `ships` (shape `(time_steps, ships, 2)`)
+    moving among `bodies` (shape `(time_steps, bodies, 2)`) sampled every `dt`.
+
+    Returns a structured array with fields `time`, `ship`, `event`, `x`, `y`, `vx`, `vy`, sorted by
+    time and then ship.
+
+    `on_chunk(first_time_step, values)` is called with the event function values of every chunk,
+    excluding the overlapping last sample, so callers can compute additional per-step reductions in
+    the same pass.
+    """
+    found = []
+    for start, state in trajectory_chunks(ships, bodies, dt, chunk_size):
+        values = {}
+        for event in events:
+            g = event.g(state)
+            values[event.name] = g
+            # A sample exactly on zero ends the crossing into it, so it is not counted twice.
+            crossing = np.zeros(g[1:].shape, dtype=bool)
+            if event.direction <= 0:
+                crossing |= (g[:-1] > 0) & (g[1:] <= 0)
+            if event.direction >= 0:
+                crossing |= (g[:-1] < 0) & (g[1:] >= 0)
+            steps, ship_indices = np.nonzero(crossing)
+            if len(steps) == 0:
+                continue
+            times, positions, velocities = _locate(event, state, steps, ship_indices, g[steps, ship_indices], g[steps + 1, ship_indices], dt)
+            table = np.empty(len(steps), dtype=EVENT_DTYPE)
+            table["time"] = times
+            table["ship"] = ship_indices
+            table["event"] = event.name
+            table["x"] = positions[:, 0]
+            table["y"] = positions[:, 1]
+            table["vx"] = velocities[:, 0]
+            table["vy"] = velocities[:, 1]
+            found.append(table)
+        if on_chunk is not None:
+            last = len(state.r) if start + len(state.r) >= len(ships) else len(state.r) - 1
+            on_chunk(start, {name: g[:last] for name, g in values.items()})
+
+    if not found:
+        return np.empty(0, dtype=EVENT_DTYPE)
+    table = np.concatenate(found)
+    return table[np.lexsort((table["ship"], table["time"]))]
+
+class LeoToMoonStatus:
+    """
+    Per-step ship status for `LeoToMoon`, computed from the event function values.
+
+    - Returned to Earth: latched once a ship re-enters the Earth SOI after leaving it.
+    - Reached Moon: latched once a ship enters the Moon zone.
+    - Captured by Moon: while the ship is inside the Moon zone below escape velocity.
+    """
+
+    def __init__(self, out: np.ndarray):
+        self.out = out
+        num_ships = out.shape[1]
+        self.left_earth = np.zeros(num_ships, dtype=bool)
+        self.returned = np.zeros(num_ships, dtype=bool)
+        self.reached_moon = np.zeros(num_ships, dtype=bool)
+
+    def __call__(self, start: int, values: dict[str, np.ndarray]):
+        outside_earth = values["earth_soi_exit"] > 0
+        in_moon_zone = values["moon_zone_entry"] < 0
+        captured = values["moon_capture"] < 0
+
+        # Latches accumulate along the time axis.
+        left_earth = self.left_earth | np.logical_or.accumulate(outside_earth, axis=0)
+        returned = self.returned | np.logical_or.accumulate(left_earth & ~outside_earth, axis=0)
+        reached_moon = self.reached_moon | np.logical_or.accumulate(in_moon_zone, axis=0)
+
+        status = np.full(captured.shape, STATUS_DEFAULT, dtype=np.uint8)
+        status[returned] = STATUS_RETURNED_TO_EARTH
+        status[reached_moon] = STATUS_REACHED_MOON
+        status[captured] = STATUS_CAPTURED
+        self.out[start:start + len(status)] = status
+
+        self.left_earth, self.returned, self.reached_moon = left_earth[-1], returned[-1], reached_moon[-1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect SOI entry, Earth return and ballistic capture events.")
+    parser.add_argument("--ships", default="data/leo_to_moon_ships.npy")
+    parser.add_argument("--bodies", default="data/leo_to_moon_bodies.npy")
+    parser.add_argument("--dt", type=float, default=scenarios.LEO_TO_MOON_DT)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--events-out", default="data/leo_to_moon_events.npy")
+    parser.add_argument("--status-out", default="data/leo_to_moon_events_status.npy")
+    args = parser.parse_args()
+
+    ships = np.load(args.ships, mmap_mode="r")
+    bodies = np.load(args.bodies, mmap_mode="r")
+    status = np.lib.format.open_memmap(args.status_out, mode="w+", dtype=np.uint8, shape=ships.shape[:2])
+
+    start = time.perf_counter()
+    table = detect_events(ships, bodies, args.dt, leo_to_moon_events(), args.chunk_size, on_chunk=LeoToMoonStatus(status))
+    status.flush()
+    print(f"Found {len(table)} events in {time.perf_counter() - start:.1f}s")
+    for name in np.unique(table["event"]):
+        print(f"  {name}: {np.count_nonzero(table['event'] == name)}")
+    np.save(args.events_out, table)
@@ -0,0 +1,178 @@
+"""
+Precomputed atlas of Hill regions (forbidden regions) for the restricted 3-body problem.
+
+A point is forbidden for a given Jacobi constant `C` when `2 * Omega(x, y) < C`. Instead of
+re-evaluating the potential field every time, we rasterise the forbidden region once over a grid of
+`(mu, C)` pairs and store all the masks bit-packed in a single `.npz` file together with the
+lookup index.
+
+Jacobi constants are sampled relative to the L1 value of each `mu`, in units of `mu^(2/3)` (the
+natural scale of the Hill region), so the same offsets are meaningful for both the Sun-Earth and
+Earth-Moon systems.
+
+`EffectivePotential` in `slides.py` shades the forbidden region at the energy of L1 from
+`data/hill_atlas_earth_moon.npz`, which `sim_cache.py` builds.
+
+Usage: `python hill_atlas.py earth_moon` or `python hill_atlas.py sun_earth`.
+"""
+
+import argparse
+
+import numpy as np
+
+from cr3bp import find_l1_x, masses_from_mu, pseudo_potential, reduced_mass
+
+# Default atlas layouts for the systems used in the slides.
+PRESETS = {
+    "earth_moon": {
+        "system_mu": reduced_mass(1., 0.0123),
+        "mu_range": (0.005, 0.03),
+        "center": (0., 0.),
+        "half_width": 1.5,
+    },
+    "sun_earth": {
+        "system_mu": reduced_mass(1., 1. / 333000.),
+        "mu_range": (1e-6, 1e-5),
+        # Centered on Earth.
+        "center": (1. - reduced_mass(1., 1. / 333000.), 0.),
+        "half_width": 0.03,
+    },
+}
+
+def l1_jacobi_constant(mu: float) -> float:
+    m1, m2 = masses_from_mu(mu)
+    l1_x = find_l1_x(m1, m2)
+    return float(2. * pseudo_potential(l1_x, 0., m1, m2))
+
+def build_atlas(
+    mus: np.ndarray,
+    jacobi_offsets: np.ndarray,
+    center: tuple[float, float],
+    half_width: float,
+    resolution: int,
+    verbose: bool = False,
+) -> dict[str, np.ndarray]:
+    """
+    Rasterise the forbidden regions for every combination of `mus` and `jacobi_offsets`.
+
+    Returns the arrays that make up the atlas file:
+    - `masks`: bit-packed forbidden masks of shape `(len(mus), len(jacobi_offsets), resolution, ceil(resolution / 8))`.
+    - `mus`: sorted mass parameters.
+    - `jacobi`: absolute Jacobi constant for each mask, shape `(len(mus), len(jacobi_offsets))`.
+    - `extent`: `[x_min, x_max, y_min, y_max]` of the raster.
+    """
+    mus = np.sort(np.asarray(mus, dtype=np.float64))
+    jacobi_offsets = np.sort(np.asarray(jacobi_offsets, dtype=np.float64))
+
+    extent = np.array([
+        center[0] - half_width, center[0] + half_width,
+        center[1] - half_width, center[1] + half_width,
+    ])
+    # Sample at pixel centers.
+    pixel = 2 * half_width / resolution
+    xs = extent[0] + pixel * (np.arange(resolution) + 0.5)
+    ys = extent[2] + pixel * (np.arange(resolution) + 0.5)
+    x, y = np.meshgrid(xs, ys)
+
+    masks = np.empty((len(mus), len(jacobi_offsets), resolution, (resolution + 7) // 8), dtype=np.uint8)
+    jacobi = np.empty((len(mus), len(jacobi_offsets)))
+    for i, mu in enumerate(mus):
+        m1, m2 = masses_from_mu(mu)
+        # The potential only needs to be evaluated once per mu. Every Jacobi constant is then a
+        # single comparison against this field.
+        field = 2. * pseudo_potential(x, y, m1, m2)
+        jacobi[i] = l1_jacobi_constant(mu) + jacobi_offsets * mu ** (2 / 3)
+        forbidden = field[None] < jacobi[i][:, None, None]
+        masks[i] = np.packbits(forbidden, axis=-1)
+        if verbose:
+            print(f"mu = {mu:.6g}: rasterised {len(jacobi_offsets)} masks")
+
+    return {
+        "masks": masks,
+        "mus": mus,
+        "jacobi": jacobi,
+        "extent": extent,
+        "resolution": np.array(resolution),
+    }
+
+class HillAtlas:
+    """
+    Read-only view over an atlas written by `build_atlas`.
+
+    Lookups snap to the nearest `mu` and then the nearest Jacobi constant for that `mu`.
+    """
+
+    def __init__(self, path: str):
+        data = np.load(path)
+        self.masks = data["masks"]
+        self.mus = data["mus"]
+        self.jacobi = data["jacobi"]
+        self.extent = data["extent"]
+        self.resolution = int(data["resolution"])
+
+    def index(self, mu: float, jacobi: float) -> tuple[int, int]:
+        i = _nearest(self.mus, mu)
+        j = _nearest(self.jacobi[i], jacobi)
+        return i, j
+
+    def forbidden(self, mu: float, jacobi: float) -> np.ndarray:
+        """
+        Unpacked forbidden mask of shape `(resolution, resolution)`. Row 0 is the lowest y.
+        """
+        i, j = self.index(mu, jacobi)
+        return np.unpackbits(self.masks[i, j], axis=-1, count=self.resolution).astype(bool)
+
+    def is_accessible(self, mu: float, jacobi: float, points: np.ndarray) -> np.ndarray:
+        """
+        Whether each point in `points` (shape `(..., 2)`) is in the allowed region. Reads the
+        packed bits directly so nothing needs to be unpacked. Points outside the atlas extent are
+        reported as accessible.
+        """
+        i, j = self.index(mu, jacobi)
+        points = np.asarray(points)
+        x_min, x_max, y_min, y_max = self.extent
+        ix = np.floor((points[..., 0] - x_min) / (x_max - x_min) * self.resolution).astype(np.int64)
+        iy = np.floor((points[..., 1] - y_min) / (y_max - y_min) * self.resolution).astype(np.int64)
+        inside = (ix >= 0) & (ix < self.resolution) & (iy >= 0) & (iy < self.resolution)
+        ix = np.clip(ix, 0, self.resolution - 1)
+        iy = np.clip(iy, 0, self.resolution - 1)
+        byte = self.masks[i, j, iy, ix >> 3]
+        bit = (byte >> (7 - (ix & 7))) & 1
+        return ~inside | (bit == 0)
+
+    def rgba(self, mu: float, jacobi: float, color=(0.5, 0.5, 0.5), opacity: float = 0.5) -> np.ndarray:
+        """
+        Forbidden region as an RGBA image (`uint8`, top row first) suitable for an `ImageMobject`
+        spanning `extent`.
+        """
+        mask = self.forbidden(mu, jacobi)[::-1]
+        image = np.zeros((*mask.shape, 4), dtype=np.uint8)
+        image[mask, :3] = (np.asarray(color) * 255).astype(np.uint8)
+        image[mask, 3] = int(opacity * 255)
+        return image
+
+def _nearest(values: np.ndarray, x: float) -> int:
+    if len(values) == 1:
+        return 0
+    i = int(np.clip(np.searchsorted(values, x), 1, len(values) - 1))
+    return i - 1 if x - values[i - 1] <= values[i] - x else i
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the Hill-region atlas.")
+    parser.add_argument("system", choices=PRESETS.keys())
+    parser.add_argument("--num-mu", type=int, default=8)
+    parser.add_argument("--offsets", type=float, nargs=3, default=(-4.5, 1.5, 61),
+                        metavar=("MIN", "MAX", "COUNT"), help="Jacobi offsets from L1 in units of mu^(2/3)")
+    parser.add_argument("--resolution", type=int, default=512)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    preset = PRESETS[args.system]
+    # Always include the exact mu of the system itself.
+    mus = np.union1d(np.geomspace(*preset["mu_range"], args.num_mu), [preset["system_mu"]])
+    offsets = np.linspace(args.offsets[0], args.offsets[1], int(args.offsets[2]))
+
+    atlas = build_atlas(mus, offsets, preset["center"], preset["half_width"], args.resolution, verbose=True)
+    out = args.out or f"data/hill_atlas_{args.system}.npz"
+    np.savez_compressed(out, **atlas)
+    print(f"Wrote {atlas['masks'].size} bytes of masks to {out}")
@@ -0,0 +1,189 @@
+"""
+Invariant manifolds of L1 Lyapunov orbits from the eigenvectors of the monodromy matrix.
+
+`src/manifolds_earth_moon.rs` and `src/manifolds_sun_earth.rs` perturb the velocity of 40 points
+on the orbit in four fixed directions, so most of their ships are not on a manifold at all. Here
+the state-transition matrix is integrated once around the orbit. Its value after one period, the
+monodromy matrix, has a real eigenvalue pair `lambda > 1` and `1 / lambda` whose eigenvectors span
+the unstable and stable directions. `Phi(t)` carries these directions to every other point on the
+orbit, and each branch is seeded by stepping `epsilon` along `±` the local direction.
+
+All branches are propagated in a single batch. Stable branches run backwards in time, which in
+forward time is the same motion with the Coriolis force reversed (the same trick the Rust code uses
+by flipping `omega`). Branches can be stopped at a section `x = c` or `y = c`.
+
+Usage: `python manifolds.py earth_moon` writes
+`data/manifolds_earth_moon_eigen_{orbit,unstable,stable,l1}.npy` in the same layout and with the
+same frame step (`FRAME_DT`) as the `data/manifolds_earth_moon_*.npy` of the Rust simulation: the
+orbit is sampled on the same frames as the branches, so the two can be animated together.
+"""
+
+import argparse
+import time
+from typing import Optional
+
+import numpy as np
+
+from adaptive import EventFunction, Rhs, dopri5
+from cr3bp import angular_velocity, find_l1_x, primaries
+from periodic_orbits import SYSTEMS, correct, variational_rhs, with_identity_stm
+from propagator import accelerations
+
+# Time step of the Rust simulations, which the scenes assume for every frame.
+FRAME_DT = 0.00005
+
+MANIFOLDS = {
+    # Same orbits as the Rust simulations.
+    "earth_moon": {"distance": 0.01, "vy0_guess": 0.0893, "epsilon": 1e-5, "total_time": 4.},
+    "sun_earth": {"distance": 0.0015, "vy0_guess": 0.012, "epsilon": 1e-5, "total_time": 3.},
+}
+
+def section(axis: str, value: float) -> EventFunction:
+    """
+    Event function for the section `x = value` or `y = value`.
+    """
+    column = {"x": 0, "y": 1}[axis]
+    return lambda t, y: y[:, column] - value
+
+def orbit_with_stm(m1: float, m2: float, x0: float, vy0: float, t_eval: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    States (shape `(len(t_eval), 4)`) and state-transition matrices (shape `(len(t_eval), 4, 4)`)
+    along the orbit starting at `(x0, 0)` with velocity `(0, vy0)`.
+    """
+    y0 = with_identity_stm(np.array([x0, 0., 0., vy0]))
+    solution = dopri5(variational_rhs(m1, m2), 0., y0, t_eval, rtol=1e-12, atol=1e-13)
+    y = solution.y[:, 0]
+    return y[:, :4], y[:, 4:].reshape((-1, 4, 4))
+
+def eigendirections(monodromy: np.ndarray) -> tuple[float, np.ndarray, np.ndarray]:
+    """
+    Returns `(lambda, unstable, stable)` where `lambda > 1` is the unstable eigenvalue of the
+    monodromy matrix and `unstable`, `stable` are the real eigenvectors of `lambda` and
+    `1 / lambda`.
+    """
+    eigenvalues, eigenvectors = np.linalg.eig(monodromy)
+    real = np.abs(eigenvalues.imag) < 1e-8 * np.abs(eigenvalues).max()
+    magnitude = np.where(real, np.abs(eigenvalues), np.nan)
+    unstable = np.nanargmax(magnitude)
+    stable = np.nanargmin(magnitude)
+    return eigenvalues[unstable].real, eigenvectors[:, unstable].real, eigenvectors[:, stable].real
+
+def seed_branches(states: np.ndarray, stm: np.ndarray, direction: np.ndarray, epsilon: float) -> np.ndarray:
+    """
+    Initial states of the `+` and `-` branches, shape `(2 * points, 4)`, displaced by `epsilon` in
+    position along `direction` carried to each point by the STM.
+    """
+    local = np.einsum("pij,j->pi", stm, direction)
+    local /= np.linalg.norm(local[:, :2], axis=1, keepdims=True)
+    return np.concatenate([states + epsilon * local, states - epsilon * local])
+
+def manifold_rhs(m1: float, m2: float) -> Rhs:
+    """
+    Equations of motion in the co-rotating frame for states `[x, y, vx, vy, sign]`, where the
+    constant `sign` multiplies the Coriolis force. A sign of `-1` integrates the row backwards in
+    time. Keeping the sign in the state lets `dopri5` drop finished rows freely.
+    """
+    masses = np.array([m1, m2])
+    bodies = primaries(m1, m2)
+    omega = angular_velocity(m1, m2)
+
+    def rhs(t: np.ndarray, state: np.ndarray) -> np.ndarray:
+        r, v, sign = state[:, :2], state[:, 2:4], state[:, 4]
+        a = accelerations(r, masses, bodies) + omega * omega * r
+        a[:, 0] += sign * 2. * omega * v[:, 1]
+        a[:, 1] -= sign * 2. * omega * v[:, 0]
+        return np.concatenate([v, a, np.zeros((len(state), 1))], axis=1)
+    return rhs
+
+def compute_manifolds(
+    m1: float,
+    m2: float,
+    x0: float,
+    vy0: float,
+    period: float,
+    points_per_branch: int = 100,
+    epsilon: float = 1e-5,
+    total_time: float = 4.,
+    frame_dt: float = FRAME_DT,
+    event: Optional[EventFunction] = None,
+    event_direction: int = 0,
+) -> dict[str, np.ndarray]:
+    """
+    Compute the stable and unstable manifolds of a Lyapunov orbit. Each manifold has two branches of
+    `points_per_branch` trajectories sampled every `frame_dt` for `total_time`. Trajectories that
+    reach the `event` section hold their position there.
+
+    Returns a dict with `orbit` (shape `(frames, 1, 2)`, going round the orbit for the whole
+    `total_time`), `unstable` and `stable` (shape `(frames, 2 * points_per_branch, 2)`) and the
+    eigenvalue `lambda`.
+    """
+    phases = np.linspace(0., period, points_per_branch, endpoint=False)
+    orbit_t = np.append(phases, period)
+    states, stm = orbit_with_stm(m1, m2, x0, vy0, orbit_t)
+    eigenvalue, unstable_direction, stable_direction = eigendirections(stm[-1])
+
+    unstable = seed_branches(states[:-1], stm[:-1], unstable_direction, epsilon)
+    stable = seed_branches(states[:-1], stm[:-1], stable_direction, epsilon)
+    # Backwards in time: reverse the velocity and the Coriolis force.
+    stable[:, 2:] *= -1.
+    coriolis_sign = np.concatenate([np.ones(len(unstable)), -np.ones(len(stable))])
+    seeds = np.concatenate([np.concatenate([unstable, stable]), coriolis_sign[:, None]], axis=1)
+
+    # Sections are defined on positions, so they can be shared by both directions of time.
+    t_eval = np.arange(int(total_time / frame_dt)) * frame_dt
+    # Only the positions are kept: all states at every frame would take 2.5 times the memory.
+    positions = dopri5(
+        manifold_rhs(m1, m2), 0., seeds, t_eval,
+        rtol=1e-10, atol=1e-12, event=event, event_direction=event_direction, out_dims=2,
+    ).y
+
+    # On the same frames as the branches, round the orbit as many times as they take.
+    orbit, _ = orbit_with_stm(m1, m2, x0, vy0, t_eval)
+    return {
+        "orbit": orbit[:, None, :2],
+        "unstable": positions[:, :len(unstable)],
+        "stable": positions[:, len(unstable):],
+        "lambda": np.array(eigenvalue),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute invariant manifolds of an L1 Lyapunov orbit.")
+    parser.add_argument("system", choices=MANIFOLDS.keys())
+    parser.add_argument("--points-per-branch", type=int, default=100)
+    parser.add_argument("--epsilon", type=float, default=None)
+    parser.add_argument("--total-time", type=float, default=None)
+    parser.add_argument("--frame-dt", type=float, default=FRAME_DT)
+    parser.add_argument("--section", default=None, help="stop branches at a section, e.g. 'x=0.9877'")
+    args = parser.parse_args()
+
+    system = SYSTEMS[args.system]
+    options = MANIFOLDS[args.system]
+    m1, m2 = system["m1"], system["m2"]
+    l1_x = find_l1_x(m1, m2)
+    x0 = l1_x - options["distance"]
+    vy0, period, converged = correct(m1, m2, x0, options["vy0_guess"])
+    assert converged[0], "could not find the periodic orbit"
+    print(f"Orbit: x0 = {x0}, vy0 = {vy0[0]}, period = {period[0]}")
+
+    event = None
+    if args.section is not None:
+        axis, value = args.section.split("=")
+        event = section(axis.strip(), float(value))
+
+    start = time.perf_counter()
+    manifolds = compute_manifolds(
+        m1, m2, x0, vy0[0], period[0],
+        points_per_branch=args.points_per_branch,
+        epsilon=args.epsilon or options["epsilon"],
+        total_time=args.total_time or options["total_time"],
+        frame_dt=args.frame_dt,
+        event=event,
+    )
+    print(f"Unstable eigenvalue {manifolds['lambda']:.1f}, propagated in {time.perf_counter() - start:.1f}s")
+
+    # Next to the Rust manifolds of the same orbit, which the slides use.
+    prefix = f"data/manifolds_{args.system}_eigen"
+    np.save(f"{prefix}_orbit.npy", manifolds["orbit"])
+    np.save(f"{prefix}_unstable.npy", manifolds["unstable"])
+    np.save(f"{prefix}_stable.npy", manifolds["stable"])
+    np.save(f"{prefix}_l1.npy", np.array([l1_x, 0.]))
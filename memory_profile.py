@@ -0,0 +1,304 @@
+"""
+Profile the memory of a scene, phase by phase.
+
+The data-heavy scenes hold several copies of their trajectories at once: the loaded arrays, the
+frame transforms (`ship_data -= earth_pos` on a float64 tensor of several GB), the `np.pad` copies
+of every frame and the points that `TracedPath` accumulates while rendering. Here a scene is
+rendered in a `manim` process instrumented with `tracemalloc` (numpy reports its array buffers to
+it) and a checkpoint is taken at every phase boundary:
+
+- `load`, `transform`, `build`: the phases announced by the scene's own `print("Loading data")`,
+  `print("Transforming ...")` / `print("Creating ...")` and `print("Done!")`, and the code building
+  mobjects before the first animation or between two animations;
+- `play <n>`: every `self.play()` or `self.wait()`, with its line in the scene file;
+- `save`: `manim-slides` concatenating the clips.
+
+At each checkpoint are recorded the RSS and its peak during the phase (from `/proc/self/status`,
+the peak being reset between phases where the kernel allows it), the memory traced by `tracemalloc`
+and its peak, and the lines whose retained allocations grew the most. Allocations are attributed
+to the innermost frame of their traceback that lies in this repository, so a copy made inside
+`np.pad` is reported at the `np.pad` call of the scene.
+
+Reports go to `.cache/memory/<deck>/<Scene>.q<quality>.json` (and `.txt`). `render_scheduler.py`
+reserves the measured peak of a scene, less the memory of `tracemalloc` itself, instead of its
+estimate from dataset sizes. With `--baseline <dir>` the peaks of every phase are compared with an
+earlier report, to catch a change that adds a copy of a trajectory tensor.
+
+`tracemalloc` makes the render several times slower, so this is opt-in and `-q l` is usually
+enough (only `TracedPath` grows with the frame rate).
+
+Usage: `python memory_profile.py slides LeoToMoon HaloOrbits -q l`.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from render_scheduler import DECKS, LOG_DIR, MEMORY_DIR, deck_env, memory_report_path
+
+# Traceback depth kept by `tracemalloc`, enough to get from numpy's internals back to the scene.
+TRACEBACK_DEPTH = 16
+# Lines listed per phase in the report.
+TOP_LINES = 8
+# Allocations are only attributed to lines in phases whose traced memory grew (or peaked) by at
+# least this much, and only allocations of at least `MIN_ALLOCATION` bytes.
+MIN_PHASE_GROWTH = 1e6
+MIN_ALLOCATION = 1 << 16
+
+# Runs `manim` on the scene with `tracemalloc` started and checkpoints at every phase boundary,
+# writing the phases to the JSON file given as first argument. Arguments: `<out> <depth> <top>
+# <min growth> <min allocation> <slides folder> <scene file> <manim args>`.
+_PROFILE_SCRIPT = """
+import builtins, json, os, resource, sys, time, tracemalloc
+from pathlib import Path
+
+out, depth, top, min_growth, min_allocation, folder, deck_file = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4]), int(sys.argv[5]), sys.argv[6], os.path.abspath(sys.argv[7])
+argv = sys.argv[8:]
+root = os.getcwd()
+phase_names = {"Loading": "load", "Transforming": "transform", "Creating": "transform", "Done": "build"}
+
+from manim.__main__ import main
+from manim.scene.scene import Scene
+from manim_slides.slide.base import BaseSlide
+# Started after importing `manim`: fewer traces make the snapshots faster.
+tracemalloc.start(depth)
+
+def status():
+    fields = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    fields[key] = int(value.split()[0]) * 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        fields = {"VmRSS": peak, "VmHWM": peak}
+    return fields["VmRSS"], fields["VmHWM"]
+
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def owner(traceback):
+    for frame in reversed(traceback):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(root) and "site-packages" not in path:
+            return f"{os.path.relpath(path, root)}:{frame.lineno}"
+    return f"{traceback[-1].filename}:{traceback[-1].lineno}"
+
+def large_allocations():
+    # Grouping every trace of a `manim` process takes seconds, and the copies we look for are large.
+    owners = {}
+    for trace in tracemalloc.take_snapshot().traces:
+        if trace.size >= min_allocation:
+            key = owner(trace.traceback)
+            owners[key] = owners.get(key, 0) + trace.size
+    return owners
+
+def caller_line():
+    frame = sys._getframe(1)
+    while frame is not None and os.path.abspath(frame.f_code.co_filename) != deck_file:
+        frame = frame.f_back
+    return None if frame is None else frame.f_lineno
+
+state = {"name": "build", "line": None, "plays": 0, "start": time.perf_counter(), "traced": 0,
+         "owners": {}, "rss_reset": reset_peak_rss()}
+phases = []
+
+def checkpoint(next_name, next_line=None):
+    traced, traced_peak = tracemalloc.get_traced_memory()
+    rss, peak_rss = status()
+    growth = traced - state["traced"]
+    if traced_peak - state["traced"] >= min_growth or abs(growth) >= min_growth:
+        owners = large_allocations()
+        lines = {key: size - state["owners"].get(key, 0) for key, size in owners.items()}
+        state["owners"] = owners
+    else:
+        lines = {}
+    phases.append({
+        "phase": state["name"], "line": state["line"], "seconds": time.perf_counter() - state["start"],
+        "rss": rss, "peak_rss": peak_rss, "traced": traced, "traced_peak": traced_peak, "traced_growth": growth,
+        "tracemalloc": tracemalloc.get_tracemalloc_memory(),
+        "top": sorted(([line, size] for line, size in lines.items() if size > 0), key=lambda item: -item[1])[:top],
+    })
+    tracemalloc.reset_peak()
+    if state["rss_reset"]:
+        reset_peak_rss()
+    state.update(name=next_name, line=next_line, start=time.perf_counter(), traced=tracemalloc.get_traced_memory()[0])
+
+print_ = builtins.print
+def patched_print(*args, **kwargs):
+    line = caller_line()
+    if line is not None and args and isinstance(args[0], str):
+        name = phase_names.get(args[0].split()[0].rstrip("!"), args[0])
+        checkpoint(name, line)
+    print_(*args, **kwargs)
+
+play = Scene.play
+def patched_play(self, *args, **kwargs):
+    state["plays"] += 1
+    checkpoint(f"play {state['plays']}", caller_line())
+    play(self, *args, **kwargs)
+    checkpoint("build")
+
+render = Scene.render
+def patched_render(self, *args, **kwargs):
+    try:
+        return render(self, *args, **kwargs)
+    finally:
+        checkpoint("save")
+
+save_slides = BaseSlide._save_slides
+def patched_save_slides(self, *args, **kwargs):
+    self._output_folder = Path(folder)
+    save_slides(self, *args, **kwargs)
+
+builtins.print = patched_print
+Scene.play = patched_play
+Scene.render = patched_render
+BaseSlide._save_slides = patched_save_slides
+sys.argv = ["manim"] + argv
+try:
+    main()
+finally:
+    checkpoint("end")
+    with open(out, "w") as f:
+        json.dump({"phases": phases, "peak_rss_reset": state["rss_reset"]}, f, indent=2)
+"""
+
+def profile(deck: str, scene: str, quality: str, depth: int = TRACEBACK_DEPTH, top: int = TOP_LINES, min_growth: float = MIN_PHASE_GROWTH) -> Optional[dict]:
+    """
+    Render `scene` of `deck` instrumented and write its report. Returns the report, or `None` if
+    the render failed.
+    """
+    folder = os.path.join(MEMORY_DIR, deck)
+    os.makedirs(folder, exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
+    out = os.path.join(folder, f"{scene}.tmp.json")
+    command = [
+        sys.executable, "-c", _PROFILE_SCRIPT, out, str(depth), str(top), str(min_growth), str(MIN_ALLOCATION), os.path.join(folder, "slides"), DECKS[deck]["file"],
+        f"-q{quality}", DECKS[deck]["file"], scene, "--renderer", "opengl", "--write_to_movie",
+        "--disable_caching", "--media_dir", os.path.join(MEMORY_DIR, "media"),
+    ]
+    start = time.perf_counter()
+    log_path = os.path.join(LOG_DIR, f"{deck}_{scene}_memory.log")
+    with open(log_path, "w") as log:
+        code = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, env=deck_env(deck)).returncode
+    if code != 0 or not os.path.exists(out):
+        print(f"{deck}:{scene}: FAILED (exit code {code}), see {log_path}")
+        return None
+    with open(out) as f:
+        report = json.load(f)
+    os.remove(out)
+    phases = report["phases"]
+    report.update(
+        deck=deck, scene=scene, quality=quality, seconds=time.perf_counter() - start,
+        peak_rss=max(phase["peak_rss"] for phase in phases),
+        # What the scene needs without `tracemalloc`, whose own memory is part of the RSS.
+        peak_rss_untraced=max(phase["peak_rss"] - phase["tracemalloc"] for phase in phases),
+        peak_traced=max(phase["traced_peak"] for phase in phases),
+    )
+    path = memory_report_path(deck, scene, quality)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    with open(path.removesuffix(".json") + ".txt", "w") as f:
+        f.write(format_report(report))
+    return report
+
+def _mb(size: float) -> str:
+    return f"{size / 1e6:,.0f} MB"
+
+def format_report(report: dict) -> str:
+    """
+    Table of the phases of a report, each followed by the lines that retained the most memory.
+    """
+    lines = [
+        f"{report['deck']}:{report['scene']} at -q{report['quality']}: peak RSS {_mb(report['peak_rss'])} "
+        f"({_mb(report['peak_rss_untraced'])} without tracemalloc), peak traced {_mb(report['peak_traced'])}",
+    ]
+    if not report["peak_rss_reset"]:
+        lines.append("Peak RSS could not be reset between phases: it is the peak of the process so far.")
+    lines.append("")
+    lines.append(f"{'phase':<14}{'line':>6}{'time':>9}{'RSS':>12}{'peak RSS':>12}{'traced':>12}{'peak':>12}{'growth':>12}")
+    for phase in report["phases"]:
+        line = "" if phase["line"] is None else str(phase["line"])
+        lines.append(
+            f"{phase['phase'][:13]:<14}{line:>6}{phase['seconds']:>8.1f}s{_mb(phase['rss']):>12}{_mb(phase['peak_rss']):>12}"
+            f"{_mb(phase['traced']):>12}{_mb(phase['traced_peak']):>12}{_mb(phase['traced_growth']):>12}"
+        )
+        for owner, size in phase["top"]:
+            if size >= MIN_PHASE_GROWTH:
+                lines.append(f"{'':<20}+{_mb(size):>10}  {owner}")
+    return "\n".join(lines) + "\n"
+
+def _phase_keys(report: dict) -> dict[str, dict]:
+    """
+    Phases of a report by name, numbered when a name repeats (`build`, `build 2`, ...).
+    """
+    keys, seen = {}, {}
+    for phase in report["phases"]:
+        seen[phase["phase"]] = seen.get(phase["phase"], 0) + 1
+        count = seen[phase["phase"]]
+        keys[phase["phase"] if count == 1 else f"{phase['phase']} {count}"] = phase
+    return keys
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Phases whose traced peak, and scenes whose peak RSS, grew by more than `tolerance` (a fraction)
+    and at least `MIN_PHASE_GROWTH` over `baseline`.
+    """
+    def grew(new: float, old: float) -> bool:
+        return new - old >= max(tolerance * old, MIN_PHASE_GROWTH)
+
+    regressions = []
+    name = f"{report['deck']}:{report['scene']}"
+    if grew(report["peak_rss_untraced"], baseline["peak_rss_untraced"]):
+        regressions.append(f"{name}: peak RSS {_mb(baseline['peak_rss_untraced'])} -> {_mb(report['peak_rss_untraced'])}")
+    old_phases = _phase_keys(baseline)
+    for key, phase in _phase_keys(report).items():
+        if key in old_phases and grew(phase["traced_peak"], old_phases[key]["traced_peak"]):
+            regressions.append(f"{name}: {key} (line {phase['line']}) peak traced {_mb(old_phases[key]['traced_peak'])} -> {_mb(phase['traced_peak'])}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the memory of scenes phase by phase.")
+    parser.add_argument("deck", choices=DECKS.keys())
+    parser.add_argument("scenes", nargs="+")
+    parser.add_argument("-q", "--quality", default="l", help="manim quality flag (l, m, h, p, k)")
+    parser.add_argument("--depth", type=int, default=TRACEBACK_DEPTH, help="traceback depth kept by tracemalloc")
+    parser.add_argument("--top", type=int, default=TOP_LINES, help="lines reported per phase")
+    parser.add_argument("--baseline", help="directory of earlier reports (e.g. a copy of .cache/memory) to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative growth over the baseline reported as a regression")
+    args = parser.parse_args()
+
+    unknown = set(args.scenes) - set(DECKS[args.deck]["scenes"])
+    assert not unknown, f"unknown scenes: {', '.join(sorted(unknown))}"
+
+    failed, regressions = [], []
+    # One scene at a time, so that renders do not compete for memory.
+    for scene in args.scenes:
+        report = profile(args.deck, scene, args.quality, args.depth, args.top)
+        if report is None:
+            failed.append(scene)
+            continue
+        print(format_report(report))
+        if args.baseline is not None:
+            path = os.path.join(args.baseline, args.deck, os.path.basename(memory_report_path(args.deck, scene, args.quality)))
+            if os.path.exists(path):
+                with open(path) as f:
+                    regressions += compare(report, json.load(f), args.tolerance)
+            else:
+                print(f"{args.deck}:{scene}: no baseline in {args.baseline}")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if failed or regressions:
+        raise SystemExit(f"failed: {', '.join(failed)}" if failed else f"{len(regressions)} memory regressions")
@@ -0,0 +1,194 @@
+"""
+Natural-parameter continuation of the planar Lyapunov family around L1.
+
+Starting close to L1, we march outwards in distance to L1, seeding each differential correction
+(see `periodic_orbits.py`) from a secant extrapolation of the previously converged orbits. The step
+grows while the predictions are good and is halved when a correction fails.
+
+The family is stored as a table sorted by distance with the initial state, period, Jacobi constant
+and stability index of every orbit. `OrbitFamily` interpolates the table so that scenes and
+manifold generators can look up an orbit for any amplitude without solving for it.
+
+Usage: `python orbit_family.py earth_moon` writes `data/lyapunov_family_earth_moon.npy`.
+"""
+
+import argparse
+import time
+from typing import Optional
+
+import numpy as np
+
+from adaptive import dopri5
+from cr3bp import find_l1_x, jacobi_constant
+from periodic_orbits import SYSTEMS, correct, linear_guess, variational_rhs, with_identity_stm
+
+FAMILY_DTYPE = np.dtype([
+    # Distance of the starting point to the left of L1.
+    ("distance", "f8"),
+    ("x0", "f8"),
+    ("vy0", "f8"),
+    ("period", "f8"),
+    ("jacobi", "f8"),
+    # `(|lambda_max| + 1 / |lambda_max|) / 2` of the monodromy matrix. Unstable if > 1.
+    ("stability", "f8"),
+])
+
+CONTINUATION = {
+    "earth_moon": {"start": 0.001, "stop": 0.06, "step": 0.002, "max_step": 0.005},
+    "sun_earth": {"start": 0.0001, "stop": 0.003, "step": 0.0001, "max_step": 0.0002},
+}
+
+def monodromy(m1: float, m2: float, x0: np.ndarray, vy0: np.ndarray, period: np.ndarray) -> np.ndarray:
+    """
+    State-transition matrices over one full period for each orbit. Shape `(orbits, 4, 4)`.
+    """
+    x0, vy0, period = np.atleast_1d(x0), np.atleast_1d(vy0), np.atleast_1d(period)
+    states = np.stack([x0, np.zeros_like(x0), np.zeros_like(x0), vy0], axis=1)
+    rhs = variational_rhs(m1, m2)
+    matrices = np.empty((len(x0), 4, 4))
+    # Each orbit has its own period, so the end times differ.
+    for i in range(len(x0)):
+        solution = dopri5(rhs, 0., with_identity_stm(states[i]), np.array([0., period[i]]), rtol=1e-12, atol=1e-13)
+        matrices[i] = solution.y[-1, 0, 4:].reshape((4, 4))
+    return matrices
+
+def stability_index(matrices: np.ndarray) -> np.ndarray:
+    """
+    Stability index from monodromy matrices of shape `(..., 4, 4)`.
+    """
+    largest = np.abs(np.linalg.eigvals(matrices)).max(axis=-1)
+    return (largest + 1. / largest) / 2.
+
+def continue_family(
+    m1: float,
+    m2: float,
+    start: float,
+    stop: float,
+    step: float,
+    max_step: float,
+    min_step: Optional[float] = None,
+    verbose: bool = True,
+) -> np.ndarray:
+    """
+    March along the Lyapunov family from `start` to `stop` (distances to L1) and return the family
+    table. The step starts at `step`, never exceeds `max_step`, and continuation stops early if it
+    has to drop below `min_step` (default `step / 64`).
+    """
+    min_step = step / 64. if min_step is None else min_step
+    l1_x = find_l1_x(m1, m2)
+    distances: list[float] = []
+    velocities: list[float] = []
+    periods: list[float] = []
+
+    d = start
+    guess = linear_guess(m1, m2, d)
+    while True:
+        vy0, period, converged = correct(m1, m2, l1_x - d, guess, max_iterations=8)
+        if converged[0]:
+            if velocities:
+                # Grow the step while the predictor is accurate.
+                error = abs(vy0[0] - guess) / abs(vy0[0])
+                step = min(max_step, step * (1.5 if error < 1e-3 else 1.))
+            distances.append(d)
+            velocities.append(vy0[0])
+            periods.append(period[0])
+            if verbose:
+                print(f"d = {d:.6f}, vy0 = {vy0[0]:.12f}, period = {period[0]:.6f}, step = {step:.2e}")
+            if d >= stop:
+                break
+        else:
+            if not distances:
+                raise RuntimeError(f"could not converge the first orbit at distance {d}")
+            step /= 2.
+            if step < min_step:
+                print(f"stopping continuation at d = {distances[-1]}: step fell below {min_step}")
+                break
+
+        d = min(distances[-1] + step, stop)
+        if len(distances) == 1:
+            guess = velocities[-1] * d / distances[-1]
+        else:
+            slope = (velocities[-1] - velocities[-2]) / (distances[-1] - distances[-2])
+            guess = velocities[-1] + slope * (d - distances[-1])
+
+    family = np.zeros(len(distances), dtype=FAMILY_DTYPE)
+    family["distance"] = distances
+    family["x0"] = l1_x - family["distance"]
+    family["vy0"] = velocities
+    family["period"] = periods
+    positions = np.stack([family["x0"], np.zeros(len(family))], axis=1)
+    velocities_0 = np.stack([np.zeros(len(family)), family["vy0"]], axis=1)
+    family["jacobi"] = jacobi_constant(positions, velocities_0, m1, m2)
+    family["stability"] = stability_index(monodromy(m1, m2, family["x0"], family["vy0"], family["period"]))
+    return family
+
+class OrbitFamily:
+    """
+    Interpolated lookup into a family table written by `continue_family`.
+    """
+
+    def __init__(self, path: str, m1: Optional[float] = None, m2: Optional[float] = None):
+        self.table = np.load(path)
+        self.m1 = m1
+        self.m2 = m2
+
+    def _interp(self, field: str, distance, key: str = "distance"):
+        order = np.argsort(self.table[key])
+        return np.interp(distance, self.table[key][order], self.table[field][order], left=np.nan, right=np.nan)
+
+    def vy0(self, distance, refine: bool = False):
+        """
+        Initial velocity of the orbit at `distance` to L1. With `refine`, the interpolated value is
+        polished with a few Newton steps, which needs `m1` and `m2`.
+        """
+        vy0 = self._interp("vy0", distance)
+        if not refine:
+            return vy0
+        if self.m1 is None or self.m2 is None:
+            raise ValueError("refining orbits requires m1 and m2")
+        x0 = self._interp("x0", distance)
+        vy0, _, _ = correct(self.m1, self.m2, x0, vy0)
+        return vy0 if np.ndim(distance) else vy0[0]
+
+    def period(self, distance):
+        return self._interp("period", distance)
+
+    def jacobi(self, distance):
+        return self._interp("jacobi", distance)
+
+    def stability(self, distance):
+        return self._interp("stability", distance)
+
+    def distance_for_jacobi(self, jacobi):
+        """
+        Distance to L1 of the orbit with the given Jacobi constant.
+        """
+        return self._interp("distance", jacobi, key="jacobi")
+
+    def initial_state(self, distance, refine: bool = False) -> np.ndarray:
+        """
+        `[x, y, vx, vy]` of the orbit at `distance` in the co-rotating frame, shape `(..., 4)`.
+        """
+        x0 = self._interp("x0", distance)
+        vy0 = self.vy0(distance, refine=refine)
+        zeros = np.zeros_like(x0)
+        return np.stack([x0, zeros, zeros, vy0], axis=-1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the L1 Lyapunov orbit family by continuation.")
+    parser.add_argument("system", choices=SYSTEMS.keys())
+    parser.add_argument("--start", type=float, default=None)
+    parser.add_argument("--stop", type=float, default=None)
+    args = parser.parse_args()
+
+    system = SYSTEMS[args.system]
+    options = dict(CONTINUATION[args.system])
+    if args.start is not None:
+        options["start"] = args.start
+    if args.stop is not None:
+        options["stop"] = args.stop
+
+    start_time = time.perf_counter()
+    family = continue_family(system["m1"], system["m2"], **options)
+    print(f"Found {len(family)} orbits in {time.perf_counter() - start_time:.1f}s")
+    np.save(f"data/lyapunov_family_{args.system}.npy", family)
@@ -0,0 +1,255 @@
+"""
+Single-shooting differential corrector for planar Lyapunov orbits around L1.
+
+This replaces the bracketing search of `find_velocity_for_distance_to_l1` in
+`src/halo_orbits_compute.rs`. An orbit starts on the x-axis at `x0 = L1 - distance` with velocity
+`(0, vy0)`. By symmetry it is periodic if it crosses the x-axis again perpendicularly, i.e. with
+`vx = 0`, at half the period. We propagate the state together with its state-transition matrix
+(STM) up to that crossing and apply Newton's method to `vy0`, which converges quadratically.
+
+Usage: `python periodic_orbits.py earth_moon` solves the orbits shown in `HaloOrbits` and writes
+`data/halo_orbits_corrected.npy` and `data/halo_orbits_corrected_l1.npy` in the same format as
+`data/halo_orbits.npy` and `data/halo_orbits_l1.npy` of `src/halo_orbits.rs`.
+"""
+
+import argparse
+from typing import Optional
+
+import numpy as np
+
+from adaptive import Rhs, dopri5
+from cr3bp import angular_velocity, find_l1_x, primaries, pseudo_potential_hessian
+from propagator import accelerations, fictitious_force_rotating_frame
+
+# State layout: [x, y, vx, vy, STM (4 x 4, row-major)].
+STATE_DIM = 4 + 16
+
+SYSTEMS = {
+    "earth_moon": {
+        "m1": 1.,
+        "m2": 0.0123,
+        "distances": [0.0100, 0.0150, 0.0200, 0.0250, 0.0300, 0.0350, 0.0400],
+    },
+    "sun_earth": {
+        "m1": 1.,
+        "m2": 1. / 333000.,
+        "distances": [0.0005, 0.001, 0.0015, 0.002],
+    },
+}
+
+# Factors applied to an initial `vy0` guess whose orbit never comes back to the x-axis, in order.
+GUESS_SCALES = 1. + 0.05 * np.array([1., -1., 2., -2., 4., -4., 8., -8.])
+
+def rotating_frame_rhs(m1: float, m2: float) -> Rhs:
+    """
+    Equations of motion in the co-rotating frame for states `[x, y, vx, vy]`.
+    """
+    masses = np.array([m1, m2])
+    bodies = primaries(m1, m2)
+    fictitious_force = fictitious_force_rotating_frame(angular_velocity(m1, m2))
+
+    def rhs(t: np.ndarray, state: np.ndarray) -> np.ndarray:
+        r, v = state[:, :2], state[:, 2:4]
+        a = accelerations(r, masses, bodies) + fictitious_force(r, v)
+        return np.concatenate([v, a], axis=1)
+    return rhs
+
+def jacobian(m1: float, m2: float, r: np.ndarray) -> np.ndarray:
+    """
+    Jacobian of the equations of motion at positions `r` (shape `(n, 2)`). Shape `(n, 4, 4)`.
+    """
+    omega = angular_velocity(m1, m2)
+    omega_xx, omega_xy, omega_yy = pseudo_potential_hessian(r[:, 0], r[:, 1], m1, m2)
+    a = np.zeros((len(r), 4, 4))
+    a[:, 0, 2] = 1.
+    a[:, 1, 3] = 1.
+    a[:, 2, 0] = omega_xx
+    a[:, 2, 1] = omega_xy
+    a[:, 3, 0] = omega_xy
+    a[:, 3, 1] = omega_yy
+    a[:, 2, 3] = 2. * omega
+    a[:, 3, 2] = -2. * omega
+    return a
+
+def variational_rhs(m1: float, m2: float) -> Rhs:
+    """
+    Equations of motion together with the variational equations `dPhi/dt = A(t) Phi`.
+    """
+    rhs = rotating_frame_rhs(m1, m2)
+
+    def f(t: np.ndarray, state: np.ndarray) -> np.ndarray:
+        stm = state[:, 4:].reshape((-1, 4, 4))
+        d_stm = jacobian(m1, m2, state[:, :2]) @ stm
+        return np.concatenate([rhs(t, state[:, :4]), d_stm.reshape((-1, 16))], axis=1)
+    return f
+
+def with_identity_stm(states: np.ndarray) -> np.ndarray:
+    states = np.atleast_2d(states)
+    stm = np.broadcast_to(np.eye(4).ravel(), (len(states), 16))
+    return np.concatenate([states, stm], axis=1)
+
+def linear_guess(m1: float, m2: float, distances: np.ndarray) -> np.ndarray:
+    """
+    Initial `vy0` guesses from the linearised dynamics at L1: the in-plane center eigenvector fixes
+    the ratio between the x amplitude and the y velocity.
+    """
+    l1_x = find_l1_x(m1, m2)
+    eigenvalues, eigenvectors = np.linalg.eig(jacobian(m1, m2, np.array([[l1_x, 0.]]))[0])
+    center = np.argmax(np.abs(eigenvalues.imag) * (np.abs(eigenvalues.real) < 1e-9))
+    mode = eigenvectors[:, center] / eigenvectors[0, center]
+    # The orbit starts at an x offset of `-distance`.
+    return np.real(mode[3]) * -np.asarray(distances)
+
+def half_period_crossing(m1: float, m2: float, states: np.ndarray, t_max: float = 10., rtol: float = 1e-12, atol: float = 1e-13):
+    """
+    Propagate `states` (with their STM) until they next cross the x-axis downwards. Returns the
+    `dopri5` solution; `t_event` and `y_event` hold the crossing.
+    """
+    y0 = with_identity_stm(states)
+    return dopri5(
+        variational_rhs(m1, m2), 0., y0, np.array([0., t_max]),
+        rtol=rtol, atol=atol,
+        event=lambda t, y: y[:, 1], event_direction=-1,
+    )
+
+def correct(
+    m1: float,
+    m2: float,
+    x0: np.ndarray,
+    vy0: np.ndarray,
+    tolerance: float = 1e-11,
+    max_iterations: int = 40,
+    min_damping: float = 1. / 64.,
+    verbose: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Newton differential correction of `vy0` so that the orbits starting at `(x0, 0)` with velocity
+    `(0, vy0)` are periodic. All orbits are corrected together.
+
+    Far from L1 a full Newton step from a rough guess can overshoot onto an orbit that never comes
+    back to the x-axis, so steps that do not reduce `|vx|` at the crossing are halved (down to
+    `min_damping`). If the initial guess itself never comes back there is no step to halve yet, so
+    the guess is scaled by `GUESS_SCALES` in turn until one crosses. Close to the solution the full
+    step is always taken and convergence is quadratic.
+
+    Returns `(vy0, period, converged)`.
+    """
+    x0 = np.atleast_1d(np.asarray(x0, dtype=np.float64))
+    accepted = np.array(np.broadcast_to(vy0, x0.shape), dtype=np.float64)
+    trial = accepted.copy()
+    residual = np.full(x0.shape, np.inf)
+    step = np.zeros(x0.shape)
+    damping = np.ones(x0.shape)
+    attempts = np.zeros(x0.shape, dtype=np.int64)
+    period = np.full(x0.shape, np.nan)
+    converged = np.zeros(x0.shape, dtype=bool)
+    failed = np.zeros(x0.shape, dtype=bool)
+    rhs = rotating_frame_rhs(m1, m2)
+
+    for iteration in range(max_iterations):
+        todo = np.nonzero(~converged & ~failed)[0]
+        if len(todo) == 0:
+            break
+        states = np.stack([x0[todo], np.zeros(len(todo)), np.zeros(len(todo)), trial[todo]], axis=1)
+        solution = half_period_crossing(m1, m2, states)
+
+        y = solution.y_event
+        stm = y[:, 4:].reshape((-1, 4, 4))
+        vx, vy = y[:, 2], y[:, 3]
+        ax = rhs(solution.t_event, np.nan_to_num(y[:, :4]))[:, 2]
+        # d(vx)/d(vy0) along the perturbed crossing, accounting for the shift of the crossing time.
+        dvx_dvy0 = stm[:, 2, 3] - ax / vy * stm[:, 1, 3]
+
+        better = np.isfinite(solution.t_event) & (np.abs(vx) < residual[todo])
+        good, bad = todo[better], todo[~better]
+
+        accepted[good] = trial[good]
+        residual[good] = np.abs(vx[better])
+        period[good] = 2 * solution.t_event[better]
+        converged[good] = residual[good] < tolerance
+        step[good] = -vx[better] / dvx_dvy0[better]
+        damping[good] = 1.
+
+        damping[bad] /= 2.
+        failed[bad] = damping[bad] < min_damping
+        trial[:] = accepted + damping * step
+        # No crossing yet: `accepted` is still the initial guess.
+        unstarted = bad[np.isinf(residual[bad])]
+        attempts[unstarted] += 1
+        failed[unstarted] = attempts[unstarted] > len(GUESS_SCALES)
+        retry = unstarted[~failed[unstarted]]
+        trial[retry] = accepted[retry] * GUESS_SCALES[attempts[retry] - 1]
+
+        if verbose:
+            print(f"iteration {iteration}: max |vx| at crossing = {np.max(residual[todo]):.3e}, {len(bad)} steps halved")
+
+    if failed.any():
+        print(f"{np.count_nonzero(failed)} orbits could not be corrected")
+    return accepted, period, converged
+
+def lyapunov_orbits(m1: float, m2: float, distances: np.ndarray, vy0_guess: Optional[np.ndarray] = None, verbose: bool = False):
+    """
+    Solve for the Lyapunov orbits at `distances` to the left of L1. Returns `(x0, vy0, period)`.
+
+    With explicit `vy0_guess`es all orbits are corrected in one batch. Otherwise the orbits are
+    solved in order of increasing distance: the first from the linearised dynamics and each
+    following one from a linear extrapolation of the previous solutions, which keeps every guess
+    well inside the basin of the orbit we want.
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    x0 = find_l1_x(m1, m2) - distances
+    if vy0_guess is not None:
+        vy0, period, converged = correct(m1, m2, x0, vy0_guess, verbose=verbose)
+    else:
+        vy0 = np.full(distances.shape, np.nan)
+        period = np.full(distances.shape, np.nan)
+        converged = np.zeros(distances.shape, dtype=bool)
+        solved = []
+        for i in np.argsort(distances):
+            if len(solved) == 0:
+                guess = linear_guess(m1, m2, distances[i])
+            elif len(solved) == 1:
+                j = solved[-1]
+                guess = vy0[j] * distances[i] / distances[j]
+            else:
+                j, k = solved[-2:]
+                guess = vy0[k] + (vy0[k] - vy0[j]) * (distances[i] - distances[k]) / (distances[k] - distances[j])
+            vy0[i], period[i], converged[i] = (a[0] for a in correct(m1, m2, x0[i], guess, verbose=verbose))
+            if converged[i]:
+                solved.append(i)
+    if not converged.all():
+        print(f"warning: {np.count_nonzero(~converged)} orbits did not converge")
+    return x0, vy0, period
+
+def sample_orbits(m1: float, m2: float, x0: np.ndarray, vy0: np.ndarray, t_eval: np.ndarray) -> np.ndarray:
+    """
+    Positions of the orbits at `t_eval`, shape `(len(t_eval), orbits, 2)`.
+    """
+    states = np.stack([x0, np.zeros_like(x0), np.zeros_like(x0), vy0], axis=1)
+    solution = dopri5(rotating_frame_rhs(m1, m2), t_eval[0], states, t_eval, rtol=1e-12, atol=1e-13)
+    return solution.y[..., :2]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve for planar Lyapunov orbits around L1.")
+    parser.add_argument("system", choices=SYSTEMS.keys())
+    parser.add_argument("--distances", type=float, nargs="+", default=None)
+    parser.add_argument("--total-time", type=float, default=4.)
+    parser.add_argument("--frame-dt", type=float, default=0.00005)
+    args = parser.parse_args()
+
+    system = SYSTEMS[args.system]
+    m1, m2 = system["m1"], system["m2"]
+    distances = np.array(args.distances or system["distances"])
+    x0, vy0, period = lyapunov_orbits(m1, m2, distances, verbose=True)
+
+    print("=== Final results ===")
+    for d, v, p in zip(distances, vy0, period):
+        print(f"d = {d}, v = {v}, period = {p}")
+
+    t_eval = np.arange(int(args.total_time / args.frame_dt)) * args.frame_dt
+    positions = sample_orbits(m1, m2, x0, vy0, t_eval)
+    l1 = np.array([find_l1_x(m1, m2), 0.])
+    suffix = "" if args.system == "earth_moon" else f"_{args.system}"
+    # Next to the Rust output of the same orbits, which the slides use.
+    np.save(f"data/halo_orbits_corrected{suffix}.npy", positions)
+    np.save(f"data/halo_orbits_corrected{suffix}_l1.npy", l1)
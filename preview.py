@@ -0,0 +1,346 @@
+"""
+Headless previews of simulation output, without manim.
+
+The scenes of `compute_preview.py` need a full manim OpenGL scene and `interactive_embed()` just to
+look at a new simulation run. The previews here draw the same swarms, trails and bodies straight
+from the trajectory arrays into a NumPy RGB buffer:
+
+- ships are splatted as small discs with one fancy-indexing assignment per frame,
+- trails and paths are rasterised by sampling every segment at one-pixel spacing, all segments of
+  a frame at once,
+- trails accumulate on a persistent layer, so each frame only draws the steps since the previous
+  frame.
+
+The view matches the slide: the same `scale` as the manim scene, with the 8 units high manim frame
+mapped onto the image. Frames are written as PNG files, or together as an animated PNG (APNG),
+encoded with `zlib` so no imaging library is needed. Labels and text are not drawn.
+
+Usage:
+- `python preview.py LeoToMoonTest` writes `previews/LeoToMoonTest.png`, an animation of 60 frames.
+- `python preview.py HaloOrbitsPreview --frames 1 --end 0.5 --width 1920 --height 1080` writes the
+  state halfway through as a still image.
+- `python preview.py Manifolds3BodyPreview --frames-dir previews/manifolds/` writes numbered PNGs.
+"""
+
+import argparse
+import os
+import struct
+import time
+import zlib
+from typing import Callable, Optional
+
+import numpy as np
+
+from density import rgb
+
+# Colours of the manim constants used by the scenes.
+BLACK = "#000000"
+WHITE = "#FFFFFF"
+YELLOW = "#FFFF00"
+BLUE = "#58C4DD"
+GRAY = "#888888"
+RED = "#FC6255"
+LIMEGREEN = "#89FE05"
+
+# Height of the manim frame in scene units.
+FRAME_HEIGHT = 8.
+
+def _disc(radius: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Integer pixel offsets covering a disc of `radius` pixels (at least the centre pixel).
+    """
+    r = int(np.ceil(radius))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    inside = dx ** 2 + dy ** 2 <= max(radius, 0.5) ** 2
+    return dx[inside], dy[inside]
+
+class Canvas:
+    """
+    RGB image of the scene plane, centred on the origin, `scale` times the manim scene units.
+    """
+
+    def __init__(self, width: int, height: int, scale: float, background: str = BLACK):
+        self.width = width
+        self.height = height
+        self.pixels_per_unit = height / FRAME_HEIGHT * scale
+        self.image = np.empty((height, width, 3), dtype=np.float32)
+        self.image[:] = rgb(background)
+
+    def copy(self) -> "Canvas":
+        canvas = Canvas.__new__(Canvas)
+        canvas.width, canvas.height, canvas.pixels_per_unit = self.width, self.height, self.pixels_per_unit
+        canvas.image = self.image.copy()
+        return canvas
+
+    def _pixels(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x = points[:, 0] * self.pixels_per_unit + self.width / 2
+        y = self.height / 2 - points[:, 1] * self.pixels_per_unit
+        return x, y
+
+    def _blend(self, x: np.ndarray, y: np.ndarray, color: str, opacity: float):
+        x, y = np.rint(x).astype(np.int64), np.rint(y).astype(np.int64)
+        visible = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        x, y = x[visible], y[visible]
+        if opacity >= 1:
+            self.image[y, x] = rgb(color)
+        else:
+            self.image[y, x] = self.image[y, x] * (1 - opacity) + rgb(color) * opacity
+
+    def dots(self, points: np.ndarray, color: str, radius: float = 1., opacity: float = 1.):
+        """
+        Discs of `radius` pixels at `points` (in scene units).
+        """
+        x, y = self._pixels(points)
+        dx, dy = _disc(radius)
+        self._blend((x[:, None] + dx).ravel(), (y[:, None] + dy).ravel(), color, opacity)
+
+    def segments(self, starts: np.ndarray, ends: np.ndarray, color: str, width: float = 1., opacity: float = 1.):
+        """
+        Straight segments from `starts` to `ends`, each sampled every pixel along its length.
+        """
+        x0, y0 = self._pixels(starts)
+        x1, y1 = self._pixels(ends)
+        # Segments leaving the image by far (e.g. ships escaping) are dropped rather than sampled.
+        margin = 2 * max(self.width, self.height)
+        keep = np.isfinite(x0 + y0 + x1 + y1) & (np.maximum(np.abs(x0), np.abs(x1)) < margin) & (np.maximum(np.abs(y0), np.abs(y1)) < margin)
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+        samples = np.ceil(np.hypot(x1 - x0, y1 - y0)).astype(np.int64) + 1
+        segment = np.repeat(np.arange(len(samples)), samples)
+        first = np.cumsum(samples) - samples
+        t = (np.arange(samples.sum()) - first[segment]) / np.maximum(samples[segment] - 1, 1)
+        x = x0[segment] + t * (x1 - x0)[segment]
+        y = y0[segment] + t * (y1 - y0)[segment]
+        dx, dy = _disc(width / 2)
+        self._blend((x[:, None] + dx).ravel(), (y[:, None] + dy).ravel(), color, opacity)
+
+    def paths(self, points: np.ndarray, color: str, width: float = 1., opacity: float = 1.):
+        """
+        Polylines through `points` of shape `(steps, paths, 2)`.
+        """
+        points = np.asarray(points)
+        if len(points) > 1:
+            self.segments(points[:-1].reshape(-1, 2), points[1:].reshape(-1, 2), color, width, opacity)
+
+    def circle(self, center: np.ndarray, radius: float, color: str, width: float = 1.):
+        angles = np.linspace(0, 2 * np.pi, 512)
+        points = np.asarray(center) + radius * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        self.paths(points[:, None], color, width)
+
+    def to_uint8(self) -> np.ndarray:
+        return (np.clip(self.image, 0, 1) * 255 + 0.5).astype(np.uint8)
+
+class Preview:
+    """
+    Layers of a preview, all indexed by the time step of the trajectories.
+
+    - `swarms`: `(positions (T, N, 2), colour, trail colour or None, trail opacity)`, ships drawn
+      as dots, with trails accumulating from the first step,
+    - `bodies`: `(positions (T, 2), colour, radius in pixels)`,
+    - `paths`: `(positions (T, N, 2), colour, width, opacity)`, whole trajectories drawn every frame,
+    - `markers`: functions drawing fixed geometry (points, circles, lines) on a canvas.
+
+    If `rotation` is given, the whole scene is rotated about the origin by `rotation(t)` radians,
+    `t` going from 0 to 1 over the preview.
+    """
+
+    def __init__(self, scale: float, steps: int, rotation: Optional[Callable[[float], float]] = None):
+        self.scale = scale
+        self.steps = steps
+        self.rotation = rotation
+        self.swarms: list[tuple[np.ndarray, str, Optional[str], float]] = []
+        self.bodies: list[tuple[np.ndarray, str, float]] = []
+        self.paths: list[tuple[np.ndarray, str, float, float]] = []
+        self.markers: list[Callable[[Canvas], None]] = []
+
+def _rotate(points: np.ndarray, angle: float) -> np.ndarray:
+    c, s = np.cos(angle), np.sin(angle)
+    return points @ np.array([[c, s], [-s, c]])
+
+def render(preview: Preview, width: int, height: int, frames: int, start: float = 0., end: float = 1., background: str = BLACK):
+    """
+    Yield `frames` images (`uint8`, `(height, width, 3)`) of `preview` from fraction `start` to
+    `end` of the run, time steps being chosen like the `ValueTracker` of the slides.
+    """
+    trails = Canvas(width, height, preview.scale, background)
+    drawn = 0
+    for t in np.linspace(start, end, frames) if frames > 1 else [end]:
+        step = int((preview.steps - 1) * t)
+        angle = preview.rotation(t) if preview.rotation is not None else 0.
+        place = (lambda points: _rotate(points, angle)) if angle else (lambda points: points)
+
+        # Trails are drawn once per step, except in rotating previews where the layer cannot be kept.
+        if preview.rotation is not None:
+            trails = Canvas(width, height, preview.scale, background)
+            drawn = 0
+        for data, _, trail_color, opacity in preview.swarms:
+            if trail_color is not None and step > drawn:
+                trails.paths(place(data[drawn:step + 1]), trail_color, opacity=opacity)
+        drawn = max(drawn, step)
+
+        canvas = trails.copy()
+        for draw in preview.markers:
+            draw(canvas)
+        for data, color, path_width, opacity in preview.paths:
+            canvas.paths(place(data), color, path_width, opacity)
+        for data, color, _, _ in preview.swarms:
+            canvas.dots(place(data[step]), color)
+        for data, color, radius in preview.bodies:
+            canvas.dots(place(data[step]), color, radius)
+        yield canvas.to_uint8()
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+def _png_data(image: np.ndarray) -> bytes:
+    # Filter type 0 (none) in front of every row.
+    rows = np.concatenate([np.zeros((image.shape[0], 1), dtype=np.uint8), image.reshape(image.shape[0], -1)], axis=1)
+    return zlib.compress(rows.tobytes(), 6)
+
+def _png_header(image: np.ndarray) -> bytes:
+    height, width = image.shape[:2]
+    return b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+def write_png(path: str, image: np.ndarray):
+    with open(path, "wb") as f:
+        f.write(_png_header(image) + _png_chunk(b"IDAT", _png_data(image)) + _png_chunk(b"IEND", b""))
+
+def write_apng(path: str, images: list[np.ndarray], fps: float):
+    """
+    Animated PNG looping over `images`. Viewers without APNG support show the first frame.
+    """
+    height, width = images[0].shape[:2]
+    chunks = [_png_header(images[0]), _png_chunk(b"acTL", struct.pack(">II", len(images), 0))]
+    sequence = 0
+    for i, image in enumerate(images):
+        delay = struct.pack(">HH", 100, int(round(100 * fps)))
+        chunks.append(_png_chunk(b"fcTL", struct.pack(">IIIII", sequence, width, height, 0, 0) + delay + b"\x00\x00"))
+        sequence += 1
+        if i == 0:
+            chunks.append(_png_chunk(b"IDAT", _png_data(image)))
+        else:
+            chunks.append(_png_chunk(b"fdAT", struct.pack(">I", sequence) + _png_data(image)))
+            sequence += 1
+    chunks.append(_png_chunk(b"IEND", b""))
+    with open(path, "wb") as f:
+        f.write(b"".join(chunks))
+
+def _earth_frame(bodies: np.ndarray, ships: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Positions relative to the Earth (body 1), as in `compute_preview.py`.
+    earth = bodies[:, 1:2]
+    return bodies - earth, ships - earth
+
+def _leo_to_moon(prefix: str, scale: float, best: bool) -> Preview:
+    bodies = np.load(f"data/{prefix}_bodies.npy")
+    ships = np.load(f"data/{prefix}_ships.npy")
+    bodies, ships = _earth_frame(bodies, ships.reshape((len(bodies), -1, 2)))
+    preview = Preview(scale, len(bodies))
+    preview.swarms.append((ships, WHITE, None, 1.))
+    colors = [YELLOW, BLUE, GRAY]
+    for i in range(bodies.shape[1]):
+        preview.bodies.append((bodies[:, i], colors[i % len(colors)], 4.))
+    if best:
+        best_ship = np.load(f"data/{prefix}_best_ship.npy")[0]
+        preview.swarms.append((ships[:, best_ship:best_ship + 1], LIMEGREEN, LIMEGREEN, 1.))
+        # Earth SOI (L1 distance) circle.
+        preview.markers.append(lambda canvas: canvas.circle([0., 0.], 3.902, BLUE, 2.))
+    return preview
+
+def leo_to_moon_compute() -> Preview:
+    return _leo_to_moon("leo_to_moon_compute", 3, best=False)
+
+def leo_to_moon_test() -> Preview:
+    return _leo_to_moon("leo_to_moon_test", 1, best=True)
+
+def halo_orbits() -> Preview:
+    search = np.load("data/halo_orbits_sun_earth_search.npy")
+    l1 = np.array([0.9900268049994121, 0])
+    search = search - l1
+    np.clip(search[:, :, 1], 0, None, out=search[:, :, 1])
+    mu = 1 / 333000 / (1 + 1 / 333000)
+    earth = np.array([1 - mu, 0]) - l1
+    sun = np.array([-mu, 0]) - l1
+    earth_moon_mu = 0.0123 / (1 + 0.0123)
+    moon = earth + np.array([1 - earth_moon_mu, 0]) / 387.6
+
+    preview = Preview(200, len(search))
+    preview.swarms.append((search, WHITE, WHITE, 1.))
+    preview.markers.append(lambda canvas: canvas.paths(np.array([[[-8., 0.]], [[8., 0.]]]) / 200, WHITE))
+    preview.markers.append(lambda canvas: canvas.dots(np.array([[0., 0.], earth, sun, moon]), GRAY, 4.))
+    preview.markers.append(lambda canvas: canvas.dots(np.zeros((1, 2)), WHITE, 4.))
+    return preview
+
+def manifolds_3body() -> Preview:
+    orbit = np.load("data/manifolds_sun_earth_orbit.npy")
+    unstable = np.load("data/manifolds_sun_earth_unstable.npy")
+    stable = np.load("data/manifolds_sun_earth_stable.npy")
+    l1 = np.load("data/manifolds_sun_earth_l1.npy")
+    mu = 1 / 333000 / (1 + 1 / 333000)
+    earth = np.array([1 - mu, 0])
+
+    preview = Preview(200, len(unstable))
+    preview.swarms.append((unstable - earth, RED, RED, 0.5))
+    preview.swarms.append((stable - earth, BLUE, BLUE, 0.5))
+    orbit = orbit[:, :1] - earth
+    # The orbit has its own number of steps; it is resampled onto those of the manifolds.
+    orbit = orbit[np.linspace(0, len(orbit) - 1, len(unstable)).astype(np.int64)]
+    preview.swarms.append((orbit, LIMEGREEN, LIMEGREEN, 1.))
+    preview.markers.append(lambda canvas: canvas.dots(np.array([l1 - earth]), WHITE, 2.))
+    preview.markers.append(lambda canvas: canvas.dots(np.zeros((1, 2)), GRAY, 4.))
+    return preview
+
+def manifolds_3body_earth_moon() -> Preview:
+    orbit = np.load("data/manifolds_earth_moon_orbit.npy")
+    unstable = np.load("data/manifolds_earth_moon_unstable.npy")
+    stable = np.load("data/manifolds_earth_moon_stable.npy")
+    earth = np.array([-0.0123 / (1 + 0.0123), 0])
+    # Whole trajectories in the rotating frame, turning once with the Earth-Moon frame.
+    preview = Preview(6, 1, rotation=lambda t: 2 * np.pi * t)
+    preview.paths.append((unstable - earth, RED, 1., 0.5))
+    preview.paths.append((stable - earth, BLUE, 1., 0.5))
+    preview.paths.append((orbit[:, :1] - earth, LIMEGREEN, 2., 1.))
+    preview.bodies.append((np.zeros((1, 2)), GRAY, 4.))
+    preview.bodies.append((np.array([[1., 0.]]), GRAY, 4.))
+    return preview
+
+PREVIEWS: dict[str, Callable[[], Preview]] = {
+    "LeoToMoonCompute": leo_to_moon_compute,
+    "LeoToMoonTest": leo_to_moon_test,
+    "HaloOrbitsPreview": halo_orbits,
+    "Manifolds3BodyPreview": manifolds_3body,
+    "Manifolds3BodyEarthMoon": manifolds_3body_earth_moon,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render previews of simulation output without manim.")
+    parser.add_argument("preview", choices=PREVIEWS.keys())
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--height", type=int, default=540)
+    parser.add_argument("--frames", type=int, default=60, help="number of frames, 1 for a still image")
+    parser.add_argument("--fps", type=float, default=20.)
+    parser.add_argument("--start", type=float, default=0., help="first frame, as a fraction of the run")
+    parser.add_argument("--end", type=float, default=1., help="last frame, as a fraction of the run")
+    parser.add_argument("--background", default=BLACK)
+    parser.add_argument("-o", "--output", default=None, help="PNG or animated PNG (default: previews/<preview>.png)")
+    parser.add_argument("--frames-dir", default=None, help="write numbered PNG frames into this directory instead")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    preview = PREVIEWS[args.preview]()
+    loaded = time.perf_counter()
+    images = render(preview, args.width, args.height, args.frames, args.start, args.end, args.background)
+    if args.frames_dir is not None:
+        os.makedirs(args.frames_dir, exist_ok=True)
+        for i, image in enumerate(images):
+            write_png(os.path.join(args.frames_dir, f"{i:05}.png"), image)
+        output = args.frames_dir
+    else:
+        output = args.output or os.path.join("previews", f"{args.preview}.png")
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        images = list(images)
+        if len(images) == 1:
+            write_png(output, images[0])
+        else:
+            write_apng(output, images, args.fps)
+    print(f"Wrote {args.frames} frames of {args.preview} to {output} "
+          f"(loaded in {loaded - start:.1f}s, drawn in {time.perf_counter() - loaded:.1f}s)")
@@ -0,0 +1,313 @@
+"""
+Golden-data regression tests and throughput benchmark for the simulations.
+
+Each case regenerates a reduced-size version of a scenario with the Python propagators (fewer
+ships and shorter runs than `make run-all-simulations`) and reduces it to a small summary:
+positions at checkpoints, L1 points, corrected orbits, section crossing times and capture
+indices. Summaries are compared against the golden files in `golden/<case>.npz` within the
+tolerances of `TOLERANCES`, so any change to the propagation path can be checked in one command.
+
+The `rust_*` cases run reduced versions of the Rust simulations (`--total-time`, `--ships` and
+`--first-ship` of `./target/release/simulation`) in a temporary directory and compare them with the
+golden file of their Python mirror, within the looser `RUST_TOLERANCES`: both integrate with the same
+semi-implicit Euler step but round differently. `rust_leo_to_moon` also checks that
+`capture_search.py` ranks the ship shown by `LeoToMoon` and `BallisticCapture` first. The halo orbit
+and manifold binaries take no reduced options and are only covered through their mirrors. If the
+binary is not built, the `rust_*` cases are skipped with a message.
+
+Every run also records the wall time and ship-steps per second of each case, appended to
+`.cache/benchmarks.jsonl` together with the current git revision.
+
+Usage:
+- `python regression.py` runs all cases and exits with status 1 if any differs from its golden file.
+- `python regression.py leo_to_moon --update` regenerates the golden file of a case.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+import scenarios
+from capture_search import capture_metrics, rank
+from cr3bp import find_l1_x
+from events import STATUS_CAPTURED
+from manifolds import MANIFOLDS, compute_manifolds
+from periodic_orbits import SYSTEMS, correct
+from propagator import simulate_ships, trace_planets, trace_ships
+from sections import crossings, line_section
+from sim_cache import SIMULATION, record_benchmark
+from sweep import summarise
+
+GOLDEN_DIR = "golden"
+
+# `(rtol, atol)` per summary key; keys not listed must match exactly.
+TOLERANCES = {
+    "positions": (1e-9, 1e-9),
+    "l1_x": (1e-12, 1e-12),
+    "vy0": (1e-9, 1e-12),
+    "period": (1e-9, 1e-12),
+    "unstable": (1e-7, 1e-9),
+    "stable": (1e-7, 1e-9),
+    "crossing_times": (1e-6, 1e-9),
+    "capture_time": (0., 1e-9),
+    "min_moon_distance": (1e-6, 1e-9),
+}
+
+# Tolerances of the Rust cases against the golden files of their Python mirrors.
+RUST_TOLERANCES = {
+    "positions": (1e-6, 1e-8),
+}
+
+# A case returns its summary and the number of ship-steps it propagated.
+Case = Callable[[], tuple[dict[str, np.ndarray], int]]
+
+def _checkpoints(time_steps: int, count: int = 10) -> np.ndarray:
+    return np.linspace(0, time_steps - 1, count).astype(np.int64)
+
+def _planet_case(mass_positions: list[list[float]], start: list[float], total_time: float) -> tuple[dict[str, np.ndarray], int]:
+    dt = 0.005
+    time_steps = int(total_time / dt)
+    num_ships = 10
+    masses = np.ones(len(mass_positions))
+    ship_positions = np.tile(start, (num_ships, 1)).astype(np.float64)
+    ship_velocities = np.zeros((num_ships, 2))
+    ship_velocities[:, 1] = np.linspace(1.0, 1.5, num_ships)
+    positions = trace_ships(masses, np.array(mass_positions, dtype=np.float64), ship_positions, ship_velocities, dt, time_steps)
+    return {"positions": positions[_checkpoints(time_steps)]}, time_steps * num_ships
+
+def single_planet() -> tuple[dict[str, np.ndarray], int]:
+    return _planet_case([[0., 0.]], [1., 0.], 10.)
+
+def multi_planet() -> tuple[dict[str, np.ndarray], int]:
+    return _planet_case([[-1., 0.], [0., 0.], [1., 0.]], [2., 0.], 10.)
+
+def leo_to_moon() -> tuple[dict[str, np.ndarray], int]:
+    """
+    Ships 700 to 799, around the capture ship of the slides, for the full 24.3 time units. This
+    checks the Python mirror only: it rounds differently from the Rust tracer and captures ship 749
+    rather than the slides' ship, which `rust_leo_to_moon` pins.
+    """
+    dt = 0.001
+    time_steps = int(24.3 / dt)
+    masses, body_positions, body_velocities = scenarios.leo_to_moon_bodies()
+    bodies_at_t = trace_planets(masses, body_positions, body_velocities, dt, time_steps)
+    ship_positions, ship_velocities = scenarios.leo_to_moon_ships(body_positions, body_velocities)
+    ships = np.arange(700, 800)
+
+    rows = np.zeros(len(ships), dtype=[
+        ("min_moon_distance", "f8"), ("min_moon_distance_time", "f8"),
+        ("capture_time", "f8"), ("capture_duration", "f8"), ("status", "u1"),
+    ])
+    rows["min_moon_distance"] = np.inf
+    rows["min_moon_distance_time"] = np.nan
+    rows["capture_time"] = np.nan
+    summarise(rows, masses, bodies_at_t, ship_positions[ships], ship_velocities[ships], dt, chunk_size=1000)
+
+    # Positions early on, before the chaotic part of the trajectories amplifies rounding errors.
+    early_steps = 2000
+    positions = trace_ships(masses, bodies_at_t, ship_positions[ships[::10]], ship_velocities[ships[::10]], dt, early_steps)
+    return {
+        "positions": positions[_checkpoints(early_steps)],
+        "captured_ships": ships[rows["status"] == STATUS_CAPTURED],
+        "status": rows["status"],
+        "capture_time": rows["capture_time"],
+        "min_moon_distance": rows["min_moon_distance"],
+    }, time_steps * len(ships) + early_steps * len(ships[::10])
+
+def _halo_case(system: str, distances: list[float], guesses: list[float]) -> tuple[dict[str, np.ndarray], int]:
+    m1, m2 = SYSTEMS[system]["m1"], SYSTEMS[system]["m2"]
+    l1_x = find_l1_x(m1, m2)
+    vy0, period, converged = correct(m1, m2, l1_x - np.array(distances), np.array(guesses))
+    assert converged.all(), f"{system} orbits did not converge"
+
+    # Fixed-step orbit of the Rust simulation for half a period.
+    dt = 0.00005
+    total_time = period[0] / 2
+    positions, _ = simulate_ships(total_time, m1, m2, np.array([[-distances[0], 0.]]), np.array([[0., vy0[0]]]), dt=dt)
+    time_steps = len(positions)
+    return {
+        "l1_x": np.array(l1_x),
+        "vy0": vy0,
+        "period": period,
+        "positions": positions[_checkpoints(time_steps)],
+    }, time_steps
+
+def halo_orbits_earth_moon() -> tuple[dict[str, np.ndarray], int]:
+    return _halo_case("earth_moon", [0.01, 0.02], [0.0893, 0.1923])
+
+def halo_orbits_sun_earth() -> tuple[dict[str, np.ndarray], int]:
+    return _halo_case("sun_earth", [0.001, 0.0015], [0.008, 0.012])
+
+def _manifold_case(system: str, total_time: float) -> tuple[dict[str, np.ndarray], int]:
+    m1, m2 = SYSTEMS[system]["m1"], SYSTEMS[system]["m2"]
+    options = MANIFOLDS[system]
+    l1_x = find_l1_x(m1, m2)
+    x0 = l1_x - options["distance"]
+    vy0, period, converged = correct(m1, m2, x0, options["vy0_guess"])
+    assert converged[0], f"{system} orbit did not converge"
+
+    frame_dt = 0.001
+    points_per_branch = 8
+    manifolds = compute_manifolds(
+        m1, m2, x0, vy0[0], period[0],
+        points_per_branch=points_per_branch, epsilon=options["epsilon"], total_time=total_time, frame_dt=frame_dt,
+    )
+    # Returns through the L1 section, which is where the manifolds are patched.
+    section = line_section("l1", "x", l1_x)
+    table = crossings(manifolds["unstable"], m1, m2, frame_dt, section)
+    frames = len(manifolds["unstable"])
+    return {
+        "l1_x": np.array(l1_x),
+        "shape": np.array(manifolds["unstable"].shape),
+        "unstable": manifolds["unstable"][_checkpoints(frames)],
+        "stable": manifolds["stable"][_checkpoints(frames)],
+        "crossing_ships": table["ship"],
+        "crossing_times": table["time"],
+    }, frames * 4 * points_per_branch
+
+def manifolds_earth_moon() -> tuple[dict[str, np.ndarray], int]:
+    return _manifold_case("earth_moon", 2.)
+
+def manifolds_sun_earth() -> tuple[dict[str, np.ndarray], int]:
+    return _manifold_case("sun_earth", 2.)
+
+def _run_rust(simulation: str, options: list[str], outputs: list[str]) -> list[np.ndarray]:
+    """
+    Run a reduced `simulation` of the Rust binary in a temporary directory, so the full-size outputs
+    in `data/` are left alone, and load its `outputs`.
+    """
+    binary = os.path.abspath(SIMULATION)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "data"))
+        subprocess.run([binary, simulation, *options], cwd=tmp, check=True, capture_output=True)
+        return [np.load(os.path.join(tmp, path)) for path in outputs]
+
+def _rust_planet_case(simulation: str) -> tuple[dict[str, np.ndarray], int]:
+    # Same run as `_planet_case`.
+    num_ships = 10
+    positions, = _run_rust(simulation, ["--total-time", "10", "--ships", str(num_ships)], [f"data/{simulation}_ships.npy"])
+    time_steps = len(positions)
+    return {"positions": positions[_checkpoints(time_steps)]}, time_steps * num_ships
+
+def rust_single_planet() -> tuple[dict[str, np.ndarray], int]:
+    return _rust_planet_case("single_planet")
+
+def rust_multi_planet() -> tuple[dict[str, np.ndarray], int]:
+    return _rust_planet_case("multi_planet")
+
+def rust_leo_to_moon() -> tuple[dict[str, np.ndarray], int]:
+    """
+    The ships of `leo_to_moon`, traced by the Rust binary, and the best ship of `capture_search.py`
+    on them.
+    """
+    dt = 0.001
+    first_ship = 700
+    positions, bodies = _run_rust(
+        "leo_to_moon", ["--first-ship", str(first_ship), "--ships", "100"],
+        ["data/leo_to_moon_ships.npy", "data/leo_to_moon_bodies.npy"],
+    )
+    best = rank(capture_metrics(positions, bodies, dt))[0]
+    early_steps = 2000
+    return {
+        "positions": positions[:early_steps][_checkpoints(early_steps), ::10],
+        "best_ship": np.array(first_ship + best["ship"]),
+    }, positions.shape[0] * positions.shape[1]
+
+CASES: dict[str, Case] = {
+    "single_planet": single_planet,
+    "multi_planet": multi_planet,
+    "leo_to_moon": leo_to_moon,
+    "halo_orbits_earth_moon": halo_orbits_earth_moon,
+    "halo_orbits_sun_earth": halo_orbits_sun_earth,
+    "manifolds_earth_moon": manifolds_earth_moon,
+    "manifolds_sun_earth": manifolds_sun_earth,
+}
+
+# Rust cases, the golden file of their Python mirror and the values they must have beyond it.
+RUST_CASES: dict[str, tuple[Case, str, dict[str, np.ndarray]]] = {
+    "rust_single_planet": (rust_single_planet, "single_planet", {}),
+    "rust_multi_planet": (rust_multi_planet, "multi_planet", {}),
+    # Ship followed by `LeoToMoon` and `BallisticCapture`.
+    "rust_leo_to_moon": (rust_leo_to_moon, "leo_to_moon", {"best_ship": np.array(748)}),
+}
+
+def compare(
+    summary: dict[str, np.ndarray],
+    golden: dict[str, np.ndarray],
+    tolerances: dict[str, tuple[float, float]] = TOLERANCES,
+) -> list[str]:
+    """
+    Differences between a summary and its golden file, as human-readable messages.
+    """
+    problems = []
+    for key in sorted(set(summary) | set(golden)):
+        if key not in summary or key not in golden:
+            problems.append(f"{key}: only in {'summary' if key in summary else 'golden file'}")
+            continue
+        actual, expected = np.asarray(summary[key]), np.asarray(golden[key])
+        if actual.shape != expected.shape:
+            problems.append(f"{key}: shape {actual.shape} != {expected.shape}")
+        elif key in tolerances:
+            rtol, atol = tolerances[key]
+            if not np.allclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True):
+                error = np.nanmax(np.abs(actual - expected))
+                problems.append(f"{key}: max difference {error:.3e} exceeds rtol = {rtol:g}, atol = {atol:g}")
+        elif not np.array_equal(actual, expected):
+            problems.append(f"{key}: {np.count_nonzero(actual != expected)} values differ")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check reduced simulations against golden data and benchmark them.")
+    parser.add_argument("cases", nargs="*", default=list(CASES) + list(RUST_CASES), help="cases to run (default: all)")
+    parser.add_argument("--update", action="store_true", help="overwrite the golden files instead of comparing")
+    args = parser.parse_args()
+
+    unknown = set(args.cases) - set(CASES) - set(RUST_CASES)
+    assert not unknown, f"unknown cases: {', '.join(sorted(unknown))}"
+
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    failed = []
+    benchmarks = []
+    for name in args.cases:
+        if name in RUST_CASES and (args.update or not os.path.exists(SIMULATION)):
+            reason = "it is checked against the golden file of its mirror" if args.update else f"{SIMULATION} is not built, run `cargo build --release`"
+            print(f"{name}: skipped, {reason}")
+            continue
+        case, mirror, expected = RUST_CASES[name] if name in RUST_CASES else (CASES[name], name, {})
+        start = time.perf_counter()
+        summary, ship_steps = case()
+        elapsed = time.perf_counter() - start
+        benchmarks.append({"case": name, "wall_time": elapsed, "ship_steps": ship_steps, "ship_steps_per_second": ship_steps / elapsed})
+
+        path = os.path.join(GOLDEN_DIR, f"{mirror}.npz")
+        if args.update:
+            np.savez(path, **summary)
+            result = "updated"
+        elif not os.path.exists(path):
+            failed.append(name)
+            result = f"FAIL: no golden file {path}, run with --update"
+        else:
+            with np.load(path) as golden:
+                if name in RUST_CASES:
+                    # Only the summaries both compute, and what the Rust run must give beyond the mirror.
+                    problems = compare(summary, {key: golden[key] for key in summary if key in golden} | expected, RUST_TOLERANCES)
+                else:
+                    problems = compare(summary, dict(golden))
+            if problems:
+                failed.append(name)
+                result = "FAIL\n" + "\n".join(f"    {problem}" for problem in problems)
+            else:
+                result = "ok"
+        print(f"{name}: {elapsed:.1f}s, {ship_steps / elapsed:.3g} ship-steps/s, {result}")
+
+    record_benchmark({"cases": benchmarks})
+
+    if failed:
+        print(f"{len(failed)} of {len(args.cases)} cases failed: {', '.join(failed)}")
+        sys.exit(1)
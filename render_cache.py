@@ -0,0 +1,265 @@
+"""
+Incremental render cache for the slide decks.
+
+A render of a scene is keyed by everything that can change its output:
+
+- the source of the scene class, of the module-level functions and classes it references, and the
+  module-level statements of the deck (imports, `THEME` and `config`),
+- the files of local modules the scene or those statements use (e.g. `ephemeris.py`, and
+  `themes.py`, which sets the background colour of each deck), and of the modules they import,
+- the hashes of the `data/*.npy` (and `.npz`) files the scene loads, found as string literals in its source,
+- the deck and the quality flag.
+
+`render_scheduler.py` looks every job up before rendering and reuses the cached `manim-slides`
+output (`slides/<Scene>.json` and `slides/files/<Scene>/`) when the key is unchanged. Cached renders
+are kept under `.cache/renders/<deck>/<Scene>/<key>/`.
+
+`convert` replaces `rm -r docs/index_assets/` followed by `manim-slides convert`: the deck is
+converted into `.cache/convert/` and only assets that are new are copied into `docs/index_assets/`,
+while assets no longer referenced are removed. Asset names are content hashes, so unchanged slides
+are never touched.
+
+Usage:
+- `python render_cache.py key blog LeoToMoon -q h` prints a key and its inputs.
+- `python render_cache.py convert docs/index.html --use-template template.html TitleSlide ...`
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from typing import Optional
+
+RENDERS_DIR = ".cache/renders"
+CONVERT_DIR = ".cache/convert"
+FILE_HASHES_PATH = ".cache/file_hashes.json"
+
+DATASET_PATTERN = re.compile(r"^data/.*\.npz?$")
+
+class FileHashes:
+    """
+    SHA-256 of files, remembered by size and modification time so multi-GB datasets are only read
+    after they change.
+    """
+
+    def __init__(self, path: str = FILE_HASHES_PATH):
+        self.path = path
+        self.hashes: dict[str, list] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.hashes = json.load(f)
+
+    def __call__(self, path: str) -> Optional[str]:
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        entry = self.hashes.get(path)
+        if entry is not None and entry[:2] == stamp:
+            return entry[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.hashes[path] = stamp + [h.hexdigest()]
+        return h.hexdigest()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.hashes, f)
+        os.replace(tmp, self.path)
+
+def _names(node: ast.AST) -> set[str]:
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+
+def _local_imports(tree: ast.Module, directory: str) -> dict[str, str]:
+    """
+    Names bound by imports of modules that live in `directory`, mapped to their files.
+    """
+    found = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                path = os.path.join(directory, alias.name.split(".")[0] + ".py")
+                if os.path.exists(path):
+                    found[alias.asname or alias.name] = path
+        elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+            path = os.path.join(directory, node.module.split(".")[0] + ".py")
+            if os.path.exists(path):
+                for alias in node.names:
+                    found[alias.asname or alias.name] = path
+    return found
+
+def _module_closure(path: str, seen: set[str]):
+    """
+    Add `path` and every local module it imports, recursively, to `seen`.
+    """
+    if path in seen:
+        return
+    seen.add(path)
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    for module in set(_local_imports(tree, os.path.dirname(path)).values()):
+        _module_closure(module, seen)
+
+def scene_inputs(deck_file: str, scene: str) -> dict:
+    """
+    Sources, local modules and datasets that the render of `scene` in `deck_file` depends on.
+    """
+    with open(deck_file) as f:
+        source = f.read()
+    tree = ast.parse(source)
+    definitions = {
+        node.name: node for node in tree.body
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    assert scene in definitions, f"{scene} is not defined in {deck_file}"
+    imports = _local_imports(tree, os.path.dirname(deck_file) or ".")
+
+    # The scene and, transitively, the module-level definitions it references.
+    used, todo = [], [scene]
+    while todo:
+        name = todo.pop()
+        if name in used:
+            continue
+        used.append(name)
+        todo.extend(n for n in _names(definitions[name]) if n in definitions and n not in used)
+
+    segments = [ast.get_source_segment(source, definitions[name]) for name in sorted(used)]
+    # Imports, the theme and `config` settings apply to every scene of the deck.
+    header_nodes = [node for node in tree.body if node.__class__ not in (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)]
+    header = [ast.get_source_segment(source, node) for node in header_nodes]
+
+    referenced = set().union(*(_names(definitions[name]) for name in used), *(_names(node) for node in header_nodes))
+    modules: set[str] = set()
+    for name in referenced & set(imports):
+        _module_closure(imports[name], modules)
+
+    datasets = sorted({
+        node.value for name in used for node in ast.walk(definitions[name])
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and DATASET_PATTERN.match(node.value)
+    })
+    # Names the scene itself uses, e.g. to tell whether it depends on `THEME`.
+    names = sorted(set().union(*(_names(definitions[name]) for name in used)))
+    return {"sources": header + segments, "modules": sorted(modules), "datasets": datasets, "names": names}
+
+def render_key(deck: str, deck_file: str, scene: str, quality: str, hashes: Optional[FileHashes] = None) -> tuple[str, dict]:
+    """
+    Cache key of a render and the inputs it was computed from.
+    """
+    hashes = hashes or FileHashes()
+    inputs = scene_inputs(deck_file, scene)
+    described = {
+        "deck": deck,
+        "scene": scene,
+        "quality": quality,
+        "sources": hashlib.sha256("\n".join(inputs["sources"]).encode()).hexdigest(),
+        "modules": {path: hashes(path) for path in inputs["modules"]},
+        "datasets": {path: hashes(path) for path in inputs["datasets"]},
+    }
+    key = hashlib.sha256(json.dumps(described, sort_keys=True).encode()).hexdigest()[:16]
+    return key, described
+
+class RenderCache:
+    """
+    Cached `manim-slides` outputs of scenes, copied to and from a deck snapshot directory laid out
+    like `slides/`.
+    """
+
+    def __init__(self, root: str = RENDERS_DIR):
+        self.root = root
+
+    def _entry(self, deck: str, scene: str, key: str) -> str:
+        return os.path.join(self.root, deck, scene, key)
+
+    def has(self, deck: str, scene: str, key: str) -> bool:
+        return os.path.exists(os.path.join(self._entry(deck, scene, key), f"{scene}.json"))
+
+    def restore(self, deck: str, scene: str, key: str, target: str):
+        _copy_scene(self._entry(deck, scene, key), target, scene)
+
+    def store(self, deck: str, scene: str, key: str, source: str, inputs: Optional[dict] = None):
+        entry = self._entry(deck, scene, key)
+        tmp = entry + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        _copy_scene(source, tmp, scene)
+        if inputs is not None:
+            with open(os.path.join(tmp, "inputs.json"), "w") as f:
+                json.dump(inputs, f, indent=2)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+
+def _copy_scene(source: str, target: str, scene: str):
+    """
+    Copy `<Scene>.json` and `files/<Scene>/` from one `slides/`-like directory to another.
+    """
+    os.makedirs(os.path.join(target, "files"), exist_ok=True)
+    shutil.copy2(os.path.join(source, f"{scene}.json"), os.path.join(target, f"{scene}.json"))
+    files = os.path.join(source, "files", scene)
+    if os.path.isdir(files):
+        shutil.rmtree(os.path.join(target, "files", scene), ignore_errors=True)
+        shutil.copytree(files, os.path.join(target, "files", scene))
+
+def sync_assets(converted_html: str, dest_html: str) -> tuple[int, int]:
+    """
+    Move a converted deck into place, copying only new assets and removing unreferenced ones.
+    Returns `(copied, removed)`.
+    """
+    assets = os.path.splitext(os.path.basename(dest_html))[0] + "_assets"
+    source_dir = os.path.join(os.path.dirname(converted_html), assets)
+    dest_dir = os.path.join(os.path.dirname(dest_html), assets)
+    os.makedirs(dest_dir, exist_ok=True)
+
+    wanted = set(os.listdir(source_dir)) if os.path.isdir(source_dir) else set()
+    existing = set(os.listdir(dest_dir))
+    for name in sorted(wanted - existing):
+        shutil.copy2(os.path.join(source_dir, name), os.path.join(dest_dir, name))
+    for name in sorted(existing - wanted):
+        os.remove(os.path.join(dest_dir, name))
+    shutil.copy2(converted_html, dest_html)
+    return len(wanted - existing), len(existing - wanted)
+
+def convert(scenes: list[str], dest_html: str, template: Optional[str] = None) -> tuple[int, int]:
+    """
+    `manim-slides convert` into `CONVERT_DIR`, then `sync_assets` into `dest_html`.
+    """
+    converted = os.path.join(CONVERT_DIR, os.path.basename(dest_html))
+    shutil.rmtree(CONVERT_DIR, ignore_errors=True)
+    os.makedirs(CONVERT_DIR)
+    command = ["manim-slides", "convert"]
+    if template is not None:
+        command += ["--use-template", template]
+    subprocess.run(command + scenes + [converted], check=True)
+    return sync_assets(converted, dest_html)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render cache keys and incremental slide conversion.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    key_parser = subparsers.add_parser("key", help="print the cache key of a scene render")
+    key_parser.add_argument("deck")
+    key_parser.add_argument("scene")
+    key_parser.add_argument("-q", "--quality", default="h")
+
+    convert_parser = subparsers.add_parser("convert", help="convert slides to HTML, only touching changed assets")
+    convert_parser.add_argument("dest")
+    convert_parser.add_argument("scenes", nargs="+")
+    convert_parser.add_argument("--use-template", default=None)
+    args = parser.parse_args()
+
+    if args.command == "key":
+        from render_scheduler import DECKS
+        hashes = FileHashes()
+        key, described = render_key(args.deck, DECKS[args.deck]["file"], args.scene, args.quality, hashes)
+        hashes.save()
+        print(key)
+        print(json.dumps(described, indent=2))
+    else:
+        copied, removed = convert(args.scenes, args.dest, args.use_template)
+        print(f"Updated {args.dest}: {copied} assets copied, {removed} removed")
@@ -0,0 +1,315 @@
+"""
+Render the scenes of both decks in parallel.
+
+`make build-video-all` renders one scene after another, so light scenes such as `TitleSlide` and
+`References` wait behind `LeoToMoon` and `BallisticCapture`. Here every scene of the requested
+decks is a job for a pool of `manim` processes:
+
+- Jobs are started longest-first, using the durations of earlier renders recorded in
+  `.cache/render_durations.json` (scenes never rendered before are estimated from the size of their
+  datasets). When the longest job cannot start yet, shorter ones fill the free workers.
+- Each scene reserves an estimate of its memory use, derived from the datasets it declares in
+  `SCENE_DATASETS` (or measured by `memory_profile.py` if it was profiled at the same quality),
+  against a budget of `--memory-per-worker` times the number of workers. A scene that exceeds the
+  whole budget still runs, but only on its own.
+- Both decks write `slides/<Scene>.json` and `slides/files/<Scene>/`, so scenes with the same name
+  never render at the same time. After each render these outputs are snapshotted into
+  `.cache/decks/<deck>/`. `collect` restores a deck's snapshot into `slides/` before
+  `manim-slides convert` or `make -f Makefile-blog cp-slides`.
+
+Renders whose sources, datasets and settings are unchanged are restored from the cache of
+`render_cache.py` instead of being rendered again. Output of each `manim` process goes to
+`.cache/render_logs/<deck>_<Scene>.log`.
+
+Usage: `python render_scheduler.py slides blog -q h --workers 4`, then
+`python render_scheduler.py slides --collect` and `make build-slides-html`.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+from typing import Optional
+
+from themes import THEME_VARIABLE
+from render_cache import FileHashes, RenderCache, render_key
+
+DECKS = {
+    "slides": {
+        "file": "slides.py",
+        "theme": "slides",
+        "scenes": [
+            "TitleSlide",
+            "RestrictedNBodyProblem",
+            "SinglePlanet",
+            "MultiPlanet",
+            "LeoToMoon",
+            "EffectivePotential",
+            "HaloOrbits",
+            "EarthMoonManifolds",
+            "PotentialHill",
+            "Manifolds3Body",
+            "BallisticCapture",
+            "References",
+        ],
+    },
+    "blog": {
+        "file": "slides.py",
+        "theme": "blog",
+        "scenes": [
+            "SinglePlanet",
+            "MultiPlanet",
+            "LeoToMoon",
+            "EffectivePotential",
+            "HaloOrbits",
+            "EarthMoonManifolds",
+            "PotentialHill",
+            "Manifolds3Body",
+            "BallisticCapture",
+            "References",
+        ],
+    },
+}
+
+# Datasets loaded by each scene; the same in both decks.
+SCENE_DATASETS = {
+    "SinglePlanet": ["data/single_planet_ships.npy", "data/single_planet_ships_initial_velocities.npy"],
+    "MultiPlanet": ["data/multi_planet_ships.npy", "data/multi_planet_ships_initial_velocities.npy"],
+    "LeoToMoon": [
+        "data/leo_to_moon_ships.npy",
+        "data/leo_to_moon_events_status.npy",
+        "data/leo_to_moon_bodies.npy",
+        "data/leo_to_moon_capture_candidates.npy",
+    ],
+    "EffectivePotential": ["data/hill_atlas_earth_moon.npz"],
+    "HaloOrbits": ["data/halo_orbits_search.npy", "data/halo_orbits.npy", "data/halo_orbits_l1.npy"],
+    "EarthMoonManifolds": [
+        "data/manifolds_earth_moon_orbit.npy",
+        "data/manifolds_earth_moon_unstable.npy",
+        "data/manifolds_earth_moon_stable.npy",
+        "data/manifolds_earth_moon_l1.npy",
+    ],
+    "Manifolds3Body": [
+        "data/manifolds_sun_earth_orbit.npy",
+        "data/manifolds_sun_earth_unstable.npy",
+        "data/manifolds_sun_earth_stable.npy",
+        "data/manifolds_sun_earth_l1.npy",
+        "data/manifolds_earth_moon_orbit.npy",
+        "data/manifolds_earth_moon_unstable.npy",
+        "data/manifolds_earth_moon_stable.npy",
+    ],
+    "BallisticCapture": [
+        "data/leo_to_moon_ships.npy",
+        "data/leo_to_moon_bodies.npy",
+        "data/leo_to_moon_capture_candidates.npy",
+    ],
+}
+
+DURATIONS_PATH = ".cache/render_durations.json"
+DECKS_DIR = ".cache/decks"
+LOG_DIR = ".cache/render_logs"
+# Reports of `memory_profile.py`.
+MEMORY_DIR = ".cache/memory"
+
+# Memory of a `manim` process rendering a scene without data, and the overhead per dataset byte
+# (the arrays, their copies and the mobjects built from them).
+BASE_MEMORY = 1.5e9
+MEMORY_PER_DATASET_BYTE = 3.
+# Rough render time of a scene without data, and per dataset byte, for scenes without history.
+BASE_DURATION = 30.
+DURATION_PER_DATASET_BYTE = 1e-7
+
+class Job:
+    def __init__(self, deck: str, scene: str, quality: str):
+        self.deck = deck
+        self.scene = scene
+        self.quality = quality
+        self.key = f"{deck}:{scene}:q{quality}"
+        # Key and inputs of the render in `render_cache`, if caching is enabled.
+        self.cache_key: Optional[str] = None
+        self.inputs: Optional[dict] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.start = 0.
+        self.log = None
+
+    def dataset_bytes(self) -> int:
+        return sum(os.path.getsize(path) for path in SCENE_DATASETS.get(self.scene, []) if os.path.exists(path))
+
+    def memory(self) -> float:
+        path = memory_report_path(self.deck, self.scene, self.quality)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)["peak_rss_untraced"]
+        return BASE_MEMORY + MEMORY_PER_DATASET_BYTE * self.dataset_bytes()
+
+    def command(self) -> list[str]:
+        return ["manim", f"-q{self.quality}", DECKS[self.deck]["file"], self.scene, "--renderer", "opengl", "--write_to_movie"]
+
+    def env(self) -> dict[str, str]:
+        return deck_env(self.deck)
+
+    def finished(self, cache: Optional[RenderCache]):
+        """
+        Snapshot the outputs of a successful render and store them in `cache`.
+        """
+        snapshot(self.deck, self.scene)
+        if cache is not None and self.cache_key is not None:
+            cache.store(self.deck, self.scene, self.cache_key, os.path.join(DECKS_DIR, self.deck), self.inputs)
+
+def deck_env(deck: str) -> dict[str, str]:
+    """
+    Environment of a `manim` process rendering a scene of `deck`.
+    """
+    return {**os.environ, THEME_VARIABLE: DECKS[deck]["theme"]}
+
+def memory_report_path(deck: str, scene: str, quality: str) -> str:
+    """
+    Report of `memory_profile.py` for a scene, whose peak memory replaces the estimate of `Job.memory`.
+    """
+    return os.path.join(MEMORY_DIR, deck, f"{scene}.q{quality}.json")
+
+def load_durations(path: str = DURATIONS_PATH) -> dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_durations(durations: dict[str, float], path: str = DURATIONS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def estimated_duration(job: Job, durations: dict[str, float]) -> float:
+    if job.key in durations:
+        return durations[job.key]
+    return BASE_DURATION + DURATION_PER_DATASET_BYTE * job.dataset_bytes()
+
+def snapshot(deck: str, scene: str, source: str = "slides"):
+    """
+    Copy the `manim-slides` outputs of `scene` in `source` into the deck's snapshot.
+    """
+    if not os.path.exists(os.path.join(source, f"{scene}.json")):
+        return
+    target = os.path.join(DECKS_DIR, deck)
+    os.makedirs(os.path.join(target, "files"), exist_ok=True)
+    shutil.copy2(os.path.join(source, f"{scene}.json"), os.path.join(target, f"{scene}.json"))
+    files = os.path.join(source, "files", scene)
+    if os.path.isdir(files):
+        shutil.rmtree(os.path.join(target, "files", scene), ignore_errors=True)
+        shutil.copytree(files, os.path.join(target, "files", scene))
+
+def collect(deck: str) -> list[str]:
+    """
+    Restore the snapshot of `deck` into `slides/` and return its scenes in deck order.
+    """
+    source = os.path.join(DECKS_DIR, deck)
+    scenes = [scene for scene in DECKS[deck]["scenes"] if os.path.exists(os.path.join(source, f"{scene}.json"))]
+    for scene in scenes:
+        os.makedirs(os.path.join("slides", "files"), exist_ok=True)
+        shutil.copy2(os.path.join(source, f"{scene}.json"), os.path.join("slides", f"{scene}.json"))
+        files = os.path.join(source, "files", scene)
+        if os.path.isdir(files):
+            shutil.rmtree(os.path.join("slides", "files", scene), ignore_errors=True)
+            shutil.copytree(files, os.path.join("slides", "files", scene))
+    return scenes
+
+def restore_cached(jobs: list[Job], cache: RenderCache) -> list[Job]:
+    """
+    Restore every job whose render is cached into its deck snapshot. Returns the jobs that still
+    need rendering.
+    """
+    hashes = FileHashes()
+    todo = []
+    for job in jobs:
+        job.cache_key, job.inputs = render_key(job.deck, DECKS[job.deck]["file"], job.scene, job.quality, hashes)
+        if cache.has(job.deck, job.scene, job.cache_key):
+            cache.restore(job.deck, job.scene, job.cache_key, os.path.join(DECKS_DIR, job.deck))
+            print(f"{job.key}: unchanged, restored from the render cache")
+        else:
+            todo.append(job)
+    hashes.save()
+    return todo
+
+def schedule(jobs: list[Job], workers: int, memory_budget: float, poll_interval: float = 0.5, cache: Optional[RenderCache] = None) -> list[Job]:
+    """
+    Run `jobs` longest-first on `workers` processes within `memory_budget` bytes, storing finished
+    renders in `cache`. Returns the jobs that failed.
+    """
+    durations = load_durations()
+    pending = sorted(jobs, key=lambda job: estimated_duration(job, durations), reverse=True)
+    running: list[Job] = []
+    failed: list[Job] = []
+    os.makedirs(LOG_DIR, exist_ok=True)
+    start_time = time.perf_counter()
+
+    while pending or running:
+        memory_in_use = sum(job.memory() for job in running)
+        busy_scenes = {job.scene for job in running}
+        for job in list(pending):
+            if len(running) >= workers:
+                break
+            fits = not running or memory_in_use + job.memory() <= memory_budget
+            if not fits or job.scene in busy_scenes:
+                continue
+            job.log = open(os.path.join(LOG_DIR, f"{job.deck}_{job.scene}.log"), "w")
+            job.start = time.perf_counter()
+            job.process = subprocess.Popen(job.command(), stdout=job.log, stderr=subprocess.STDOUT, env=job.env())
+            pending.remove(job)
+            running.append(job)
+            memory_in_use += job.memory()
+            busy_scenes.add(job.scene)
+            print(f"[{time.perf_counter() - start_time:6.0f}s] started {job.key} "
+                  f"(~{estimated_duration(job, durations):.0f}s, ~{job.memory() / 1e9:.1f} GB)")
+
+        time.sleep(poll_interval)
+        for job in list(running):
+            code = job.process.poll()
+            if code is None:
+                continue
+            running.remove(job)
+            job.log.close()
+            elapsed = time.perf_counter() - job.start
+            if code == 0:
+                job.finished(cache)
+                durations[job.key] = elapsed
+                save_durations(durations)
+                print(f"[{time.perf_counter() - start_time:6.0f}s] finished {job.key} in {elapsed:.0f}s")
+            else:
+                failed.append(job)
+                print(f"[{time.perf_counter() - start_time:6.0f}s] FAILED {job.key} (exit code {code}), see {job.log.name}")
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the scenes of the decks in parallel.")
+    parser.add_argument("decks", nargs="+", choices=DECKS.keys())
+    parser.add_argument("-q", "--quality", default="h", help="manim quality flag (l, m, h, p, k)")
+    parser.add_argument("--scenes", nargs="+", default=None, help="only render these scenes")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--memory-per-worker", type=float, default=4., help="memory budget per worker in GB")
+    parser.add_argument("--no-cache", action="store_true", help="render every scene even if a cached render is up to date")
+    parser.add_argument("--collect", action="store_true", help="restore the rendered deck into slides/ instead of rendering")
+    args = parser.parse_args()
+
+    if args.collect:
+        assert len(args.decks) == 1, "collect one deck at a time, they share slides/"
+        scenes = collect(args.decks[0])
+        print(f"Restored {len(scenes)} scenes of {args.decks[0]} into slides/: {' '.join(scenes)}")
+    else:
+        jobs = [
+            Job(deck, scene, args.quality)
+            for deck in args.decks
+            for scene in DECKS[deck]["scenes"]
+            if args.scenes is None or scene in args.scenes
+        ]
+        start = time.perf_counter()
+        cache = None if args.no_cache else RenderCache()
+        todo = jobs if cache is None else restore_cached(jobs, cache)
+        failed = schedule(todo, args.workers, args.memory_per_worker * 1e9 * args.workers, cache=cache)
+        print(f"Rendered {len(todo) - len(failed)} of {len(jobs)} scenes in {time.perf_counter() - start:.0f}s "
+              f"({len(jobs) - len(todo)} unchanged)")
+        if failed:
+            raise SystemExit(f"failed: {', '.join(job.key for job in failed)}")
@@ -0,0 +1,91 @@
+"""
+Initial conditions of the Rust scenarios, for use from Python.
+
+Values are the same as in the corresponding `src/*.rs` files.
+"""
+
+import numpy as np
+
+from adaptive import dopri5
+from propagator import accelerations
+
+# Sun-Earth-Moon system from `src/leo_to_moon.rs`.
+SUN_MASS = 333000.0
+EARTH_MASS = 1.
+MOON_MASS = 0.0123
+# Sun-Earth distance in units of Earth-Moon distance.
+SUN_EARTH_DISTANCE = 385.5
+# Radius of LEO is 6728km. Radius of Moon orbit is 384467km. Normalised so that Moon orbit is 1.
+LEO_RADIUS = 0.0174995
+# Moon SOI.
+MOON_ZONE_RADIUS = 0.167
+EARTH_SOI_RADIUS = 3.902
+# Time step of `src/leo_to_moon.rs`, i.e. between the rows of `data/leo_to_moon_*.npy`.
+LEO_TO_MOON_DT = 0.001
+
+def leo_to_moon_bodies() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Masses, initial positions and initial velocities of the Sun, Earth and Moon. The Moon starts on
+    the opposite side of the Earth from the Sun.
+    """
+    m0, m1, m2 = SUN_MASS, EARTH_MASS, MOON_MASS
+    r1 = SUN_EARTH_DISTANCE
+    # Earth velocity relative to Sun.
+    v1 = np.sqrt(m0 / r1)
+    # Reduced mass for Earth-Moon system.
+    mu = m1 * m2 / (m1 + m2)
+
+    masses = np.array([m0, m1, m2])
+    positions = np.array([[0., 0.], [r1 - mu, 0.], [r1 + 1. - mu, 0.]])
+    velocities = np.array([
+        [0., 0.],
+        [0., v1 - m2 / (m1 + m2)],
+        [0., v1 + m1 / (m1 + m2)],
+    ])
+    return masses, positions, velocities
+
+def leo_to_moon_ships(
+    body_positions: np.ndarray,
+    body_velocities: np.ndarray,
+    num_ships_per_velocity: int = 400,
+    num_velocity_groups: int = 10,
+    min_multiplier: float = 1.3785,
+    max_multiplier: float = 1.3786,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Ships start all around LEO with prograde velocities between `min_multiplier` and
+    `max_multiplier` times the circular LEO speed. Same layout as `src/leo_to_moon.rs`: ship `i`
+    has launch angle `2 pi i / num_ships_per_velocity` and velocity group
+    `i / num_ships_per_velocity`.
+    """
+    num_ships = num_ships_per_velocity * num_velocity_groups
+    i = np.arange(num_ships)
+    theta = 2. * np.pi * i / num_ships_per_velocity
+    velocity_multiplier = (i // num_ships_per_velocity) / num_velocity_groups
+
+    leo_v = np.sqrt(EARTH_MASS / LEO_RADIUS)
+    min_v = leo_v * min_multiplier
+    max_v = leo_v * max_multiplier
+    velocity = min_v + (max_v - min_v) * velocity_multiplier
+
+    positions = LEO_RADIUS * np.stack([np.cos(theta), np.sin(theta)], axis=1) + body_positions[1]
+    velocities = velocity[:, None] * np.stack([-np.sin(theta), np.cos(theta)], axis=1) + body_velocities[1]
+    return positions, velocities
+
+def trace_bodies(masses: np.ndarray, positions: np.ndarray, velocities: np.ndarray, t_eval: np.ndarray, rtol: float = 1e-12, atol: float = 1e-12) -> np.ndarray:
+    """
+    Accurately trace mutually attracting bodies and return their positions at `t_eval`, shape
+    `(len(t_eval), bodies, 2)`.
+    """
+    masses = np.asarray(masses, dtype=np.float64)
+    n = len(masses)
+
+    def rhs(t: np.ndarray, state: np.ndarray) -> np.ndarray:
+        r = state[0, :2 * n].reshape((n, 2))
+        v = state[0, 2 * n:]
+        a = accelerations(r, masses, r)
+        return np.concatenate([v, a.ravel()])[None]
+
+    y0 = np.concatenate([np.ravel(positions), np.ravel(velocities)])[None]
+    solution = dopri5(rhs, t_eval[0], y0, t_eval, rtol=rtol, atol=atol)
+    return solution.y[:, 0, :2 * n].reshape((len(t_eval), n, 2))
@@ -0,0 +1,193 @@
+"""
+Poincaré sections for patching Sun-Earth and Earth-Moon manifolds into low-energy transfers.
+
+`Manifolds3Body` overlays the Sun-Earth and Earth-Moon manifolds visually. Here we record where
+every manifold trajectory crosses a section (a circle around the Earth or a line `x = c` / `y = c`)
+with `events.detect_events`, and transform the crossings into a common frame: the Sun-Earth
+rotating frame centred on the Earth, in Earth-Moon units (`G = 1`, Earth mass 1, Earth-Moon
+distance 1), the same units as `scenarios.py`.
+
+Earth-Moon crossings depend on the Moon phase angle `theta`, the angle between the Sun-Earth and
+Earth-Moon x-axes at the moment of the crossing. For every phase we look for pairs of crossings
+that are close in position and report the velocity mismatch, i.e. the manoeuvre needed to
+patch the two trajectories.
+
+The manifold files carry neither their time step nor the direction of time they were integrated
+in, so both are given explicitly for each file: `--*-dt` and `--*-branch`. A stable branch is
+stored backwards in time.
+
+Usage: `python sections.py --sun-earth <file> --sun-earth-dt <dt> --sun-earth-branch unstable
+--earth-moon <file> --earth-moon-dt <dt> --earth-moon-branch stable` writes
+`data/manifold_patches.npy`, sorted by velocity mismatch. `make build-manifolds` runs it on the
+manifolds of `manifolds.py`.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import scenarios
+from cr3bp import angular_velocity, primaries
+from events import Event, detect_events, distance_event
+from spatial_index import GridIndex
+
+SUN_EARTH_M2 = scenarios.EARTH_MASS / scenarios.SUN_MASS
+EARTH_MOON_M2 = scenarios.MOON_MASS
+
+CROSSING_DTYPE = np.dtype([
+    ("ship", "i8"),
+    # Time of the crossing in Earth-Moon time units along the trajectory.
+    ("time", "f8"),
+    ("x", "f8"),
+    ("y", "f8"),
+    ("vx", "f8"),
+    ("vy", "f8"),
+])
+
+# Branches of a manifold; stable ones are integrated backwards in time.
+BRANCHES = ("stable", "unstable")
+
+PATCH_DTYPE = np.dtype([
+    ("sun_earth_ship", "i8"),
+    ("earth_moon_ship", "i8"),
+    ("phase", "f8"),
+    ("x", "f8"),
+    ("y", "f8"),
+    ("position_error", "f8"),
+    ("delta_v", "f8"),
+])
+
+def circle_section(name: str, body: int, radius: float) -> Event:
+    """
+    Circle of `radius` around primary `body` (0 or 1), crossed in either direction.
+    """
+    return distance_event(name, body, radius, direction=0)
+
+def line_section(name: str, axis: str, value: float, direction: int = 0) -> Event:
+    """
+    Line `x = value` or `y = value`.
+    """
+    column = {"x": 0, "y": 1}[axis]
+    return Event(name, lambda state: state.r[..., column] - value, direction)
+
+def crossings(trajectories: np.ndarray, m1: float, m2: float, dt: float, section: Event, backwards: bool = False, chunk_size: int = 500) -> np.ndarray:
+    """
+    Crossings of `section` by `trajectories` (shape `(time_steps, ships, 2)`, sampled every `dt`)
+    in the rotating frame of primaries `m1` and `m2`.
+
+    Stable manifolds are stored backwards in time; pass `backwards` so that times and velocities
+    are those of the actual forward motion.
+    """
+    bodies = np.broadcast_to(primaries(m1, m2), (len(trajectories), 2, 2))
+    table = detect_events(trajectories, bodies, dt, [section], chunk_size)
+    sign = -1. if backwards else 1.
+    out = np.empty(len(table), dtype=CROSSING_DTYPE)
+    out["ship"] = table["ship"]
+    out["time"] = sign * table["time"]
+    for field in ("x", "y"):
+        out[field] = table[field]
+    for field in ("vx", "vy"):
+        out[field] = sign * table[field]
+    return out
+
+def sun_earth_to_common(table: np.ndarray, distance: float = scenarios.SUN_EARTH_DISTANCE, sun_mass: float = scenarios.SUN_MASS) -> np.ndarray:
+    """
+    Convert crossings in the normalised Sun-Earth rotating frame to the common frame.
+    """
+    m2 = scenarios.EARTH_MASS / sun_mass
+    earth = primaries(1., m2)[1]
+    # Normalised units have the Sun as unit mass and the Sun-Earth distance as unit length.
+    time_scale = np.sqrt(distance ** 3 / sun_mass)
+    out = table.copy()
+    out["x"] = (table["x"] - earth[0]) * distance
+    out["y"] = (table["y"] - earth[1]) * distance
+    out["vx"] = table["vx"] * distance / time_scale
+    out["vy"] = table["vy"] * distance / time_scale
+    out["time"] = table["time"] * time_scale
+    return out
+
+def earth_moon_to_common(table: np.ndarray, phase: float, sun_earth_omega: float) -> np.ndarray:
+    """
+    Convert crossings in the Earth-Moon rotating frame to the common frame, for a Moon phase angle
+    `phase` at the crossing. `sun_earth_omega` is the angular velocity of the common frame.
+    """
+    earth = primaries(1., EARTH_MOON_M2)[0]
+    # Rotation rate of the Earth-Moon frame as seen from the Sun-Earth frame.
+    omega = angular_velocity(1., EARTH_MOON_M2) - sun_earth_omega
+    x = table["x"] - earth[0]
+    y = table["y"] - earth[1]
+    vx = table["vx"] - omega * y
+    vy = table["vy"] + omega * x
+    c, s = np.cos(phase), np.sin(phase)
+    out = table.copy()
+    out["x"] = c * x - s * y
+    out["y"] = s * x + c * y
+    out["vx"] = c * vx - s * vy
+    out["vy"] = s * vx + c * vy
+    return out
+
+def near_pairs(a: np.ndarray, b: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    All index pairs `(i, j)` with `|a[i] - b[j]| < radius` for points of shape `(n, 2)`. `b` is
+    hashed into a uniform grid of cell size `radius`, so only neighbouring cells are compared.
+    """
+    return GridIndex(b, radius).query_pairs(a, radius)
+
+def patch(sun_earth: np.ndarray, earth_moon: np.ndarray, phases: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Pairs of Sun-Earth and Earth-Moon crossings (Sun-Earth already in the common frame) that are
+    within `tolerance` of each other for any of the Moon `phases`. Sorted by velocity mismatch.
+    """
+    sun_earth_omega = angular_velocity(1., SUN_EARTH_M2) * np.sqrt(scenarios.SUN_MASS / scenarios.SUN_EARTH_DISTANCE ** 3)
+    a = np.stack([sun_earth["x"], sun_earth["y"]], axis=1)
+    found = []
+    for phase in phases:
+        em = earth_moon_to_common(earth_moon, phase, sun_earth_omega)
+        b = np.stack([em["x"], em["y"]], axis=1)
+        i, j = near_pairs(a, b, tolerance)
+        if len(i) == 0:
+            continue
+        table = np.empty(len(i), dtype=PATCH_DTYPE)
+        table["sun_earth_ship"] = sun_earth["ship"][i]
+        table["earth_moon_ship"] = em["ship"][j]
+        table["phase"] = phase
+        table["x"] = (a[i, 0] + b[j, 0]) / 2
+        table["y"] = (a[i, 1] + b[j, 1]) / 2
+        table["position_error"] = np.linalg.norm(a[i] - b[j], axis=1)
+        table["delta_v"] = np.hypot(sun_earth["vx"][i] - em["vx"][j], sun_earth["vy"][i] - em["vy"][j])
+        found.append(table)
+    if not found:
+        return np.empty(0, dtype=PATCH_DTYPE)
+    table = np.concatenate(found)
+    return table[np.argsort(table["delta_v"])]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Patch Sun-Earth and Earth-Moon manifolds on a section.")
+    parser.add_argument("--sun-earth", required=True, help="Sun-Earth manifold, e.g. data/manifolds_sun_earth_unstable.npy")
+    parser.add_argument("--sun-earth-dt", type=float, required=True, help="time step of the Sun-Earth file (0.00005 for the simulations)")
+    parser.add_argument("--sun-earth-branch", choices=BRANCHES, required=True)
+    parser.add_argument("--earth-moon", required=True, help="Earth-Moon manifold, e.g. data/manifolds_earth_moon_stable.npy")
+    parser.add_argument("--earth-moon-dt", type=float, required=True, help="time step of the Earth-Moon file (0.00005 for the simulations)")
+    parser.add_argument("--earth-moon-branch", choices=BRANCHES, required=True)
+    parser.add_argument("--radius", type=float, default=0.9, help="radius of the section circle around the Earth in Earth-Moon units")
+    parser.add_argument("--phases", type=int, default=360, help="number of Moon phase angles to try")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="maximum position mismatch in Earth-Moon units")
+    parser.add_argument("--out", default="data/manifold_patches.npy")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # Earth is primary 1 in the Sun-Earth system and primary 0 in the Earth-Moon system.
+    se_section = circle_section("sun_earth", 1, args.radius / scenarios.SUN_EARTH_DISTANCE)
+    em_section = circle_section("earth_moon", 0, args.radius)
+    se = crossings(np.load(args.sun_earth, mmap_mode="r"), 1., SUN_EARTH_M2, args.sun_earth_dt, se_section, backwards=args.sun_earth_branch == "stable")
+    em = crossings(np.load(args.earth_moon, mmap_mode="r"), 1., EARTH_MOON_M2, args.earth_moon_dt, em_section, backwards=args.earth_moon_branch == "stable")
+    print(f"{len(se)} Sun-Earth and {len(em)} Earth-Moon crossings")
+
+    phases = 2. * np.pi * np.arange(args.phases) / args.phases
+    patches = patch(sun_earth_to_common(se), em, phases, args.tolerance)
+    print(f"Found {len(patches)} patches in {time.perf_counter() - start:.1f}s")
+    for row in patches[:5]:
+        print(f"  SE ship {row['sun_earth_ship']} -> EM ship {row['earth_moon_ship']} at phase {np.degrees(row['phase']):.1f} deg: "
+              f"delta v = {row['delta_v']:.4f}, position error = {row['position_error']:.4f}")
+    np.save(args.out, patches)
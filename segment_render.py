@@ -0,0 +1,241 @@
+"""
+Render the slides of one long scene in parallel.
+
+`manim-slides` stores every slide of a scene (the animations between two `self.next_slide()`
+calls) as its own clip, but `manim` still renders the whole scene in one process. Here a scene is
+split into segments of consecutive slides, each rendered by its own `manim` process with
+`-n <first>,<last>`: the animations before the segment are replayed without rendering, which
+rebuilds the state at the boundary (trackers, mobjects, updaters) deterministically, and only the
+segment's own animations are written. The clips of all segments are then stitched back, in order,
+into `slides/<Scene>.json` and `slides/files/<Scene>/`.
+
+A replayed animation advances its updaters in a single step, so mobjects that accumulate state
+frame by frame, i.e. `TracedPath`, would come out different. A dry run of the scene (the plan,
+cached in `.cache/segments/<deck>/<Scene>/plan.json` by render key) records at every slide boundary
+whether such a mobject is on screen, and segments only ever start at boundaries where none is. The
+plan also records the duration of every slide, so segments are cut to roughly equal video length.
+
+Renders go through the render cache of `render_cache.py` and end up in the deck snapshot of
+`render_scheduler.py`, like any other render.
+
+Usage: `python segment_render.py slides HaloOrbits EffectivePotential -q h --workers 4`, then
+`python render_scheduler.py slides --collect`.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from render_cache import FileHashes, RenderCache, render_key
+from render_scheduler import DECKS, LOG_DIR, Job, deck_env, restore_cached
+
+SEGMENTS_DIR = ".cache/segments"
+
+# Segments shorter than this many seconds of video are not worth the replay and startup of another
+# `manim` process.
+MIN_SEGMENT_DURATION = 5.
+
+# Runs `manim` with `manim_slides` patched, in one of two modes:
+# - `plan <out> <manim args>` (with `--dry_run`): writes the animation range of every slide, the
+#   scene time at which it starts and whether a frame-accumulating mobject exists at its start.
+# - `render <first> <last> <folder> <manim args>` (with `-n`): writes the slides `first..last` into
+#   `<folder>` instead of `slides/`.
+_SEGMENT_SCRIPT = """
+import json, sys
+from pathlib import Path
+from manim import TracedPath
+from manim_slides.slide.base import BaseSlide
+
+mode = sys.argv[1]
+if mode == "plan":
+    out, argv = sys.argv[2], sys.argv[3:]
+    starts = [{"animation": 0, "time": 0., "exact": True}]
+    next_slide = BaseSlide.next_slide
+
+    def patched_next_slide(self, *args, **kwargs):
+        next_slide(self, *args, **kwargs)
+        accumulating = any(isinstance(m, TracedPath) for top in self.mobjects for m in top.get_family())
+        starts.append({"animation": self._start_animation, "time": self.renderer.time, "exact": not accumulating})
+
+    def save_slides(self, *args, **kwargs):
+        self._add_last_slide()
+        by_animation = {start["animation"]: start for start in starts}
+        ends = [by_animation.get(s.end_animation, {"time": self.renderer.time})["time"] for s in self._slides]
+        slides = [
+            {"start_animation": s.start_animation, "end_animation": s.end_animation,
+             "duration": end - by_animation[s.start_animation]["time"], "exact": by_animation[s.start_animation]["exact"]}
+            for s, end in zip(self._slides, ends)
+        ]
+        with open(out, "w") as f:
+            json.dump(slides, f, indent=2)
+
+    BaseSlide.next_slide = patched_next_slide
+else:
+    first, last, folder, argv = int(sys.argv[2]), int(sys.argv[3]), sys.argv[4], sys.argv[5:]
+    original_save_slides = BaseSlide._save_slides
+
+    def save_slides(self, *args, **kwargs):
+        self._add_last_slide()
+        self._slides = self._slides[first:last + 1]
+        # The scene ended early after `last`, nothing is left to add as a last slide.
+        self._current_animation = self._slides[-1].end_animation
+        self._output_folder = Path(folder)
+        original_save_slides(self, *args, **kwargs)
+
+BaseSlide._save_slides = save_slides
+from manim.__main__ import main
+sys.argv = ["manim"] + argv
+main()
+"""
+
+def _scene_dir(deck: str, scene: str) -> str:
+    return os.path.join(SEGMENTS_DIR, deck, scene)
+
+def plan_slides(deck: str, scene: str, key: Optional[str] = None) -> list[dict]:
+    """
+    Slides of `scene` from a dry run: animation range, duration in seconds and whether the scene
+    state at its start is reproduced exactly by a replay. Reused while the render key is `key`.
+    """
+    path = os.path.join(_scene_dir(deck, scene), "plan.json")
+    if key is not None and os.path.exists(path):
+        with open(path) as f:
+            cached = json.load(f)
+        if cached["key"] == key:
+            return cached["slides"]
+
+    os.makedirs(_scene_dir(deck, scene), exist_ok=True)
+    out = os.path.join(_scene_dir(deck, scene), "plan.tmp.json")
+    with open(os.path.join(LOG_DIR, f"{deck}_{scene}_plan.log"), "w") as log:
+        subprocess.run(
+            [sys.executable, "-c", _SEGMENT_SCRIPT, "plan", out, "-ql", "--dry_run", DECKS[deck]["file"], scene, "--renderer", "opengl"],
+            stdout=log, stderr=subprocess.STDOUT, check=True, env=deck_env(deck),
+        )
+    with open(out) as f:
+        slides = json.load(f)
+    os.remove(out)
+    with open(path, "w") as f:
+        json.dump({"key": key, "slides": slides}, f, indent=2)
+    return slides
+
+def split_segments(slides: list[dict], segments: int, min_duration: float = MIN_SEGMENT_DURATION) -> list[tuple[int, int]]:
+    """
+    Cut `slides` into at most `segments` runs `(first, last)` of roughly equal duration. A run only
+    starts at an exact slide, and none is shorter than `min_duration` unless the scene is.
+    """
+    total = sum(slide["duration"] for slide in slides)
+    target = max(total / max(segments, 1), min_duration)
+    runs = []
+    first, elapsed = 0, 0.
+    for i, slide in enumerate(slides):
+        can_cut = i > first and slide["exact"] and len(runs) < segments - 1
+        if can_cut and elapsed >= target and total - sum(s["duration"] for s in slides[:i]) >= min_duration:
+            runs.append((first, i - 1))
+            first, elapsed = i, 0.
+        elapsed += slide["duration"]
+    runs.append((first, len(slides) - 1))
+    return runs
+
+def _segment_command(job: Job, slides: list[dict], first: int, last: int, folder: str) -> list[str]:
+    start, end = slides[first]["start_animation"], slides[last]["end_animation"]
+    animations = f"{start},{end - 1}" if last < len(slides) - 1 else f"{start}"
+    return [
+        sys.executable, "-c", _SEGMENT_SCRIPT, "render", str(first), str(last), folder,
+        f"-q{job.quality}", DECKS[job.deck]["file"], job.scene, "--renderer", "opengl", "--write_to_movie",
+        "-n", animations, "--media_dir", os.path.join(os.path.dirname(folder), "media"),
+    ]
+
+def stitch(scene: str, slides: list[dict], runs: list[tuple[int, int]], folders: list[str], target: str = "slides"):
+    """
+    Merge the `manim-slides` outputs of the segments into `<target>/<Scene>.json` and
+    `<target>/files/<Scene>/`, shifting animation indices back to those of the whole scene.
+    """
+    files = os.path.join(target, "files", scene)
+    shutil.rmtree(files, ignore_errors=True)
+    os.makedirs(files)
+    merged = None
+    for (first, _), folder in zip(runs, folders):
+        with open(os.path.join(folder, f"{scene}.json")) as f:
+            presentation = json.load(f)
+        offset = slides[first]["start_animation"]
+        for slide in presentation["slides"]:
+            slide["start_animation"] += offset
+            slide["end_animation"] += offset
+            for field in ("file", "rev_file"):
+                # `manim-slides` writes `<folder>/files/<Scene>/<clip>`, relative to the working directory.
+                name = os.path.basename(slide[field])
+                shutil.copy2(slide[field], os.path.join(files, name))
+                slide[field] = os.path.join(files, name)
+        if merged is None:
+            merged = presentation
+        else:
+            merged["slides"].extend(presentation["slides"])
+    with open(os.path.join(target, f"{scene}.json"), "w") as f:
+        json.dump(merged, f, indent=2)
+
+def render_segments(job: Job, workers: int, min_duration: float = MIN_SEGMENT_DURATION) -> bool:
+    """
+    Render `job` as parallel segments and stitch them into `slides/`. Returns whether every
+    segment rendered.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    slides = plan_slides(job.deck, job.scene, job.cache_key)
+    runs = split_segments(slides, workers, min_duration)
+    print(f"{job.key}: {len(slides)} slides in {len(runs)} segments "
+          f"({', '.join(f'{first}-{last}' for first, last in runs)})")
+
+    def render(i: int) -> int:
+        folder = os.path.join(_scene_dir(job.deck, job.scene), str(i), "slides")
+        shutil.rmtree(folder, ignore_errors=True)
+        with open(os.path.join(LOG_DIR, f"{job.deck}_{job.scene}_{i}.log"), "w") as log:
+            return subprocess.run(_segment_command(job, slides, *runs[i], folder), stdout=log, stderr=subprocess.STDOUT, env=job.env()).returncode
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        codes = list(pool.map(render, range(len(runs))))
+    for i, code in enumerate(codes):
+        if code != 0:
+            print(f"{job.key}: segment {i} FAILED (exit code {code}), see {LOG_DIR}/{job.deck}_{job.scene}_{i}.log")
+    if any(codes):
+        return False
+    stitch(job.scene, slides, runs, [os.path.join(_scene_dir(job.deck, job.scene), str(i), "slides") for i in range(len(runs))])
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render long scenes as parallel segments of slides.")
+    parser.add_argument("deck", choices=DECKS.keys())
+    parser.add_argument("scenes", nargs="+")
+    parser.add_argument("-q", "--quality", default="h", help="manim quality flag (l, m, h, p, k)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="segments per scene")
+    parser.add_argument("--min-duration", type=float, default=MIN_SEGMENT_DURATION, help="shortest segment in seconds of video")
+    parser.add_argument("--no-cache", action="store_true", help="render even if a cached render is up to date")
+    args = parser.parse_args()
+
+    unknown = set(args.scenes) - set(DECKS[args.deck]["scenes"])
+    assert not unknown, f"unknown scenes: {', '.join(sorted(unknown))}"
+
+    jobs = [Job(args.deck, scene, args.quality) for scene in args.scenes]
+    cache = None if args.no_cache else RenderCache()
+    if cache is None:
+        hashes = FileHashes()
+        for job in jobs:
+            job.cache_key, job.inputs = render_key(job.deck, DECKS[job.deck]["file"], job.scene, job.quality, hashes)
+        hashes.save()
+        todo = jobs
+    else:
+        todo = restore_cached(jobs, cache)
+
+    failed = []
+    for job in todo:
+        start = time.perf_counter()
+        if not render_segments(job, args.workers, args.min_duration):
+            failed.append(job)
+            continue
+        job.finished(cache)
+        print(f"{job.key}: rendered in {time.perf_counter() - start:.0f}s")
+    if failed:
+        raise SystemExit(f"failed: {', '.join(job.key for job in failed)}")
@@ -0,0 +1,346 @@
+"""
+Content-addressed cache of simulation outputs, so only changed scenarios are recomputed.
+
+Every scenario of `SIMULATIONS` is keyed by the hash of its commands, its own source files and the
+shared engine sources (`ENGINE_SOURCES`: the Cargo manifest and lock file, `src/main.rs` and the
+tracer). Outputs are stored read-only under `.cache/simulations/<scenario>/<key>/` and copied into
+`data/`, so switching back to an earlier version of a scenario is a cache hit, and scripts writing
+to `data/` can never modify a cached copy. `data/simulations.json` records which key the files in
+`data/` currently belong to, with the size and modification time of each file when it was restored
+or stored: a file rewritten since then by another script is no longer current.
+
+Stale scenarios run concurrently (after a single `cargo build --release` if any of them is a Rust
+simulation). The wall time of every command that runs is appended to `.cache/benchmarks.jsonl`,
+next to the throughput records of `regression.py`.
+
+Usage:
+- `python sim_cache.py` brings every scenario up to date.
+- `python sim_cache.py leo_to_moon` only updates `leo_to_moon`, e.g. before rendering `LeoToMoon`.
+- `python sim_cache.py --force` re-runs everything regardless of the cache.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+CACHE_DIR = ".cache/simulations"
+STATE_PATH = "data/simulations.json"
+BENCHMARKS_PATH = ".cache/benchmarks.jsonl"
+
+SIMULATION = "./target/release/simulation"
+
+_STATE_LOCK = threading.Lock()
+
+ENGINE_SOURCES = ["Cargo.toml", "Cargo.lock", "src/main.rs", "src/tracer.rs"]
+
+SIMULATIONS = {
+    "single_planet": {
+        "commands": [[SIMULATION, "single_planet"]],
+        "sources": ["src/single_planet.rs"],
+        "outputs": [
+            "data/single_planet_bodies.npy",
+            "data/single_planet_ships.npy",
+            "data/single_planet_ships_initial_velocities.npy",
+        ],
+    },
+    "multi_planet": {
+        "commands": [[SIMULATION, "multi_planet"]],
+        "sources": ["src/multi_planet.rs"],
+        "outputs": [
+            "data/multi_planet_bodies.npy",
+            "data/multi_planet_ships.npy",
+            "data/multi_planet_ships_initial_velocities.npy",
+        ],
+    },
+    "leo_to_moon": {
+        # `events.py` and `capture_search.py` post-process the Rust trajectories, so the whole chain
+        # is one scenario.
+        "commands": [[SIMULATION, "leo_to_moon"], ["python", "events.py"], ["python", "capture_search.py"]],
+        "sources": ["src/leo_to_moon.rs", "events.py", "capture_search.py", "scenarios.py"],
+        "outputs": [
+            "data/leo_to_moon_bodies.npy",
+            "data/leo_to_moon_ships.npy",
+            "data/leo_to_moon_ships_status.npy",
+            "data/leo_to_moon_best_ship.npy",
+            "data/leo_to_moon_events.npy",
+            "data/leo_to_moon_events_status.npy",
+            "data/leo_to_moon_capture_metrics.npy",
+            "data/leo_to_moon_capture_candidates.npy",
+        ],
+    },
+    "halo_orbits_earth_moon": {
+        "commands": [[SIMULATION, "halo_orbits_earth_moon"]],
+        "sources": ["src/halo_orbits.rs"],
+        "outputs": ["data/halo_orbits_search.npy", "data/halo_orbits.npy", "data/halo_orbits_l1.npy"],
+    },
+    "halo_orbits_sun_earth": {
+        "commands": [[SIMULATION, "halo_orbits_sun_earth"]],
+        "sources": ["src/halo_orbits.rs"],
+        "outputs": ["data/halo_orbits_sun_earth_search.npy"],
+    },
+    # Same orbits as `halo_orbits_*`, solved by the differential corrector of `periodic_orbits.py`.
+    "hill_atlas_earth_moon": {
+        "commands": [["python", "hill_atlas.py", "earth_moon"]],
+        "sources": ["hill_atlas.py", "cr3bp.py"],
+        "outputs": ["data/hill_atlas_earth_moon.npz"],
+    },
+    "hill_atlas_sun_earth": {
+        "commands": [["python", "hill_atlas.py", "sun_earth"]],
+        "sources": ["hill_atlas.py", "cr3bp.py"],
+        "outputs": ["data/hill_atlas_sun_earth.npz"],
+    },
+    "halo_orbits_corrected_earth_moon": {
+        "commands": [["python", "periodic_orbits.py", "earth_moon"]],
+        "sources": ["periodic_orbits.py", "adaptive.py", "cr3bp.py", "propagator.py"],
+        "outputs": ["data/halo_orbits_corrected.npy", "data/halo_orbits_corrected_l1.npy"],
+    },
+    "halo_orbits_corrected_sun_earth": {
+        "commands": [["python", "periodic_orbits.py", "sun_earth"]],
+        "sources": ["periodic_orbits.py", "adaptive.py", "cr3bp.py", "propagator.py"],
+        "outputs": ["data/halo_orbits_corrected_sun_earth.npy", "data/halo_orbits_corrected_sun_earth_l1.npy"],
+    },
+    "manifolds_earth_moon": {
+        "commands": [[SIMULATION, "manifolds_earth_moon"]],
+        "sources": ["src/manifolds_earth_moon.rs"],
+        "outputs": [
+            "data/manifolds_earth_moon_orbit.npy",
+            "data/manifolds_earth_moon_unstable.npy",
+            "data/manifolds_earth_moon_stable.npy",
+            "data/manifolds_earth_moon_l1.npy",
+        ],
+    },
+    "manifolds_sun_earth": {
+        "commands": [[SIMULATION, "manifolds_sun_earth"]],
+        "sources": ["src/manifolds_sun_earth.rs"],
+        "outputs": [
+            "data/manifolds_sun_earth_orbit.npy",
+            "data/manifolds_sun_earth_unstable.npy",
+            "data/manifolds_sun_earth_stable.npy",
+            "data/manifolds_sun_earth_l1.npy",
+        ],
+    },
+    # Same orbits as `manifolds_*`, seeded from the monodromy eigenvectors by `manifolds.py`.
+    "manifolds_eigen_earth_moon": {
+        "commands": [["python", "manifolds.py", "earth_moon"]],
+        "sources": ["manifolds.py", "periodic_orbits.py", "adaptive.py", "cr3bp.py", "propagator.py"],
+        "outputs": [
+            "data/manifolds_earth_moon_eigen_orbit.npy",
+            "data/manifolds_earth_moon_eigen_unstable.npy",
+            "data/manifolds_earth_moon_eigen_stable.npy",
+            "data/manifolds_earth_moon_eigen_l1.npy",
+        ],
+    },
+    "manifolds_eigen_sun_earth": {
+        "commands": [["python", "manifolds.py", "sun_earth"]],
+        "sources": ["manifolds.py", "periodic_orbits.py", "adaptive.py", "cr3bp.py", "propagator.py"],
+        "outputs": [
+            "data/manifolds_sun_earth_eigen_orbit.npy",
+            "data/manifolds_sun_earth_eigen_unstable.npy",
+            "data/manifolds_sun_earth_eigen_stable.npy",
+            "data/manifolds_sun_earth_eigen_l1.npy",
+        ],
+    },
+}
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _uses_engine(name: str) -> bool:
+    return any(command[0] == SIMULATION for command in SIMULATIONS[name]["commands"])
+
+def scenario_key(name: str) -> str:
+    """
+    Hash of everything that determines the outputs of scenario `name`.
+    """
+    spec = SIMULATIONS[name]
+    sources = spec["sources"] + (ENGINE_SOURCES if _uses_engine(name) else [])
+    inputs = {
+        "commands": spec["commands"],
+        "outputs": spec["outputs"],
+        "sources": {path: file_hash(path) for path in sources if os.path.exists(path)},
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+class SimulationCache:
+    """
+    Cached outputs under `cache_dir` and the keys of the outputs currently in `data/`.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, state_path: str = STATE_PATH):
+        self.cache_dir = cache_dir
+        self.state_path = state_path
+        self.state: dict[str, dict] = {}
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                self.state = json.load(f)
+
+    def _entry(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, name, key)
+
+    def _set_state(self, name: str, key: str):
+        # Other caches in this process may have updated other scenarios since we loaded the state.
+        with _STATE_LOCK:
+            if os.path.exists(self.state_path):
+                with open(self.state_path) as f:
+                    self.state = json.load(f)
+            self.state[name] = {"key": key, "outputs": {path: _fingerprint(path) for path in SIMULATIONS[name]["outputs"]}}
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp = self.state_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.state, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.state_path)
+
+    def is_current(self, name: str, key: str) -> bool:
+        """
+        Whether the outputs of `name` in `data/` are those of `key` and unchanged since they were
+        restored or stored.
+        """
+        entry = self.state.get(name)
+        if not isinstance(entry, dict) or entry["key"] != key:
+            return False
+        return all(
+            os.path.exists(path) and _fingerprint(path) == entry["outputs"].get(path)
+            for path in SIMULATIONS[name]["outputs"]
+        )
+
+    def has(self, name: str, key: str) -> bool:
+        entry = self._entry(name, key)
+        return all(os.path.exists(os.path.join(entry, os.path.basename(path))) for path in SIMULATIONS[name]["outputs"])
+
+    def restore(self, name: str, key: str):
+        """
+        Copy the cached outputs of `name` into `data/`.
+        """
+        entry = self._entry(name, key)
+        for path in SIMULATIONS[name]["outputs"]:
+            _remove(path)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            # A plain copy: the file in `data/` is writable and has none of the cache's metadata.
+            shutil.copyfile(os.path.join(entry, os.path.basename(path)), path)
+        self._set_state(name, key)
+
+    def store(self, name: str, key: str, elapsed: float):
+        """
+        Add the freshly written outputs of `name` in `data/` to the cache.
+        """
+        entry = self._entry(name, key)
+        tmp = entry + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for path in SIMULATIONS[name]["outputs"]:
+            cached = os.path.join(tmp, os.path.basename(path))
+            shutil.copyfile(path, cached)
+            os.chmod(cached, 0o444)
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump({"scenario": name, "key": key, "elapsed": elapsed, "created": time.time()}, f, indent=2)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self._set_state(name, key)
+
+def _remove(path: str):
+    if os.path.lexists(path):
+        os.remove(path)
+
+def _fingerprint(path: str) -> list[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def record_benchmark(record: dict, path: str = BENCHMARKS_PATH):
+    """
+    Append `record` to the benchmark log, together with the current git revision and time.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps({"revision": git_revision(), "time": time.time(), **record}) + "\n")
+
+def run_scenario(name: str) -> list[dict]:
+    """
+    Run the commands of `name`, writing fresh outputs into `data/`. Returns the wall time of each
+    command.
+    """
+    for path in SIMULATIONS[name]["outputs"]:
+        # An output the commands fail to write must not be stored as fresh.
+        _remove(path)
+    timings = []
+    for command in SIMULATIONS[name]["commands"]:
+        start = time.perf_counter()
+        subprocess.run(command, check=True)
+        timings.append({"command": " ".join(command), "wall_time": time.perf_counter() - start})
+    return timings
+
+def ensure(names: Optional[list[str]] = None, force: bool = False, workers: Optional[int] = None) -> dict[str, str]:
+    """
+    Bring the outputs of `names` (default: all scenarios) in `data/` up to date. Returns how each
+    scenario was satisfied: `"current"`, `"cached"` or `"ran"`.
+    """
+    names = list(SIMULATIONS) if names is None else names
+    cache = SimulationCache()
+    keys = {name: scenario_key(name) for name in names}
+    result = {}
+    stale = []
+    for name in names:
+        if not force and cache.is_current(name, keys[name]):
+            result[name] = "current"
+        elif not force and cache.has(name, keys[name]):
+            cache.restore(name, keys[name])
+            result[name] = "cached"
+        else:
+            stale.append(name)
+
+    if any(_uses_engine(name) for name in stale):
+        subprocess.run(["cargo", "build", "--release"], check=True)
+
+    def run(name: str) -> tuple[str, float, list[dict]]:
+        start = time.perf_counter()
+        timings = run_scenario(name)
+        return name, time.perf_counter() - start, timings
+
+    os.makedirs("data", exist_ok=True)
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, name): name for name in stale}
+        for future in as_completed(futures):
+            # A failing scenario must not keep the others from being cached.
+            if future.exception() is not None:
+                failed.append(futures[future])
+                print(f"{futures[future]}: failed: {future.exception()}")
+                continue
+            name, elapsed, timings = future.result()
+            cache.store(name, keys[name], elapsed)
+            record_benchmark({"scenario": name, "key": keys[name], "commands": timings})
+            result[name] = "ran"
+            print(f"{name}: ran in {elapsed:.1f}s")
+    if failed:
+        raise RuntimeError(f"scenarios failed: {', '.join(failed)}")
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the simulations whose inputs changed.")
+    parser.add_argument("scenarios", nargs="*", default=None, help="scenarios to update (default: all)")
+    parser.add_argument("--force", action="store_true", help="ignore the cache and re-run")
+    parser.add_argument("--workers", type=int, default=None, help="number of scenarios to run at the same time")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios or []) - set(SIMULATIONS)
+    assert not unknown, f"unknown scenarios: {', '.join(sorted(unknown))}"
+
+    result = ensure(args.scenarios or None, args.force, args.workers)
+    for name, how in result.items():
+        print(f"{name}: {how}")
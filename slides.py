@@ -1,9 +1,68 @@
+from typing import Optional
 from manim.utils.rate_functions import ease_in_cubic, ease_out_cubic
 import numpy as np
+import capture_search
+import ephemeris
+import scenarios
 from manim import *
 from manim.utils.color.XKCD import LIMEGREEN
 from manim.opengl import *
 from manim_slides.slide import Slide, ThreeDSlide
+import moderngl
+from PIL import Image
+import density
+import hill_atlas
+import themes
+
+# The deck is chosen with the `SLIDES_THEME` environment variable, see `themes.py`.
+THEME = themes.current()
+config.background_color = THEME["background_color"]
+
+# Side of a density bin in output pixels, see `DensityImage`.
+DENSITY_BIN_PIXELS = 2
+
+# ----------
+# Mobjects
+# ----------
+
+class ArrayImage(OpenGLImageMobject):
+    """
+    Image of a `uint8` array with one texel per element, unlike `OpenGLImageMobject` which upscales
+    arrays 200 times.
+    """
+
+    def get_image_from_file(self, image_file, image_mode):
+        return Image.fromarray(np.asarray(image_file, dtype=np.uint8)).convert(image_mode)
+
+class DensityImage(ArrayImage):
+    """
+    Full-frame image of a `density.DensityField`, redrawn by `show`. The OpenGL renderer uploads
+    each image it sees into a new texture unit and never updates it, so the texture is created here
+    once and rewritten in place every frame.
+    """
+
+    def __init__(self, field: density.DensityField, **kwargs):
+        self.field = field
+        self.texture = None
+        self.pixels = np.full((field.height, field.width, 4), 255, dtype=np.uint8)
+        super().__init__(self.pixels, width=field.frame_width, height=field.frame_height, **kwargs)
+        # One image for both textures, so that a single texture unit is used.
+        self.texture_paths["DarkTexture"] = self.texture_paths["LightTexture"]
+
+    def show(self, renderer, points: np.ndarray, status: Optional[np.ndarray] = None):
+        self.pixels[..., :3] = self.field.render(points, status)
+        image = self.texture_paths["LightTexture"]
+        if self.texture is None:
+            # Registered under the image, as `OpenGLRenderer.get_texture_id` would.
+            location = len(renderer.path_to_texture_id)
+            self.texture = renderer.context.texture(size=image.size, components=4, data=self.pixels.tobytes())
+            self.texture.repeat_x = False
+            self.texture.repeat_y = False
+            self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+            self.texture.use(location=location)
+            renderer.path_to_texture_id[repr(image)] = location
+        else:
+            self.texture.write(self.pixels.tobytes())
 
 # ----------
 # Slides
@@ -53,12 +112,12 @@ class SinglePlanet(Slide):
             },
         )
 
-        bodies_data = np.load("data/single_planet_bodies.npy")
+        bodies = ephemeris.single_planet()
         ships_data = np.load("data/single_planet_ships.npy")
         ships_velocity_data = np.load("data/single_planet_ships_initial_velocities.npy")
-        assert bodies_data.shape[1] == 1, "should only have one planet for this slide"
+        assert len(bodies) == 1, "should only have one planet for this slide"
 
-        planet = Dot(point=axes.c2p(*bodies_data[0,0]), color=RED, radius=0.2)
+        planet = Dot(point=axes.c2p(*bodies.positions(0.)[0]), color=RED, radius=0.2)
         ship_initial = Dot(point=axes.c2p(*ships_data[0,0], 0), color=WHITE, radius=0.1)
 
         planet_label = Text("Planet", font_size=20).next_to(planet, LEFT)
@@ -106,13 +165,13 @@ class MultiPlanet(Slide):
             },
         )
 
-        bodies_data = np.load("data/multi_planet_bodies.npy")
+        bodies = ephemeris.multi_planet()
         ships_data = np.load("data/multi_planet_ships.npy")
         ships_velocity_data = np.load("data/multi_planet_ships_initial_velocities.npy")
-        assert bodies_data.shape[1] == 3, "should only have 3 planets for this slide"
+        assert len(bodies) == 3, "should only have 3 planets for this slide"
 
-        for i in range(bodies_data.shape[1]):
-            planet = Dot(point=axes.c2p(*bodies_data[0,i]), color=RED, radius=0.2)
+        for r in bodies.positions(0.):
+            planet = Dot(point=axes.c2p(*r), color=RED, radius=0.2)
             self.add(planet)
         
         ship_initial = Dot(point=axes.c2p(*ships_data[0,0], 0), color=WHITE, radius=0.1)
@@ -146,21 +205,30 @@ class MultiPlanet(Slide):
         self.interactive_embed()
 
 class LeoToMoon(Slide):
+    # Draw the ships as a density field rather than one point each, see `density.py`.
+    density_mode = False
+
     def construct(self):
         print("Loading data")
-        bodies_data = np.load("data/leo_to_moon_bodies.npy")
         ship_data = np.load("data/leo_to_moon_ships.npy")
-        ship_status = np.load("data/leo_to_moon_ships_status.npy")
-        time_steps = bodies_data.shape[0]
-        assert ship_data.shape[0] == time_steps, "ship data and bodies data should have the same number of time steps"
-        assert ship_status.shape[0] == time_steps, "ship status and bodies data should have the same number of time steps"
-        bodies_count = bodies_data.shape[1]
+        # Status from the events found by `events.py`, not the one written by `src/leo_to_moon.rs`.
+        ship_status = np.load("data/leo_to_moon_events_status.npy")
+        time_steps = ship_data.shape[0]
+        # Bodies are read on demand from the table written by `src/leo_to_moon.rs`.
+        dt = scenarios.LEO_TO_MOON_DT
+        bodies = ephemeris.Ephemeris.from_table(np.load("data/leo_to_moon_bodies.npy", mmap_mode="r"), dt)
+        assert ship_status.shape[0] == time_steps, "ship status and ship data should have the same number of time steps"
+        bodies_count = len(bodies)
 
         print("Transforming to Earth frame")
         # Transform positions to (non-corotating) Earth frame.
-        earth_pos = bodies_data[:, 1].reshape((time_steps, 1, 2))
+        frame_times = np.arange(time_steps) * dt
+        earth_pos = bodies.bodies[1].position(frame_times).reshape((time_steps, 1, 2))
         ship_data -= earth_pos
-        bodies_data -= earth_pos
+
+        def bodies_at(time_index: int) -> np.ndarray:
+            r = bodies.positions(time_index * dt)
+            return r - r[1]
 
         print("Done!")
 
@@ -171,58 +239,78 @@ class LeoToMoon(Slide):
         body_dots = []
         for i in range(bodies_count):
             color = colors[i % len(colors)]
-            body_dots.append(Dot(color=color, point=[bodies_data[0,i,0] * scale, bodies_data[0,i,1] * scale, 0])) # type: ignore
+            body_dots.append(Dot(color=color, point=[bodies_at(0)[i,0] * scale, bodies_at(0)[i,1] * scale, 0])) # type: ignore
 
         l1_circle = Circle(radius=3.902 * scale, color=BLUE)
         l1_label = Text("Earth SOI", font_size=20, color=BLUE).next_to(l1_circle, LEFT)
 
         # Add ships
-        ship_dots = TrueDot(center=ORIGIN)
-        ship_dots.clear_points()
-        ship_points = np.pad(ship_data[0] * scale, ((0, 0), (0, 1)), mode="constant")
-        ship_dots.add_points(ship_points)
-        ship_dots.set_color(WHITE)
+        status_colors = [WHITE, DARK_GRAY, RED, LIMEGREEN]
+        if self.density_mode:
+            field = density.DensityField(
+                config.pixel_width // DENSITY_BIN_PIXELS, config.pixel_height // DENSITY_BIN_PIXELS,
+                config.frame_width, config.frame_height,
+                [ManimColor(color).to_hex() for color in status_colors], THEME["background_color"],
+            )
+            ship_dots = DensityImage(field)
+            ship_dots.show(self.renderer, ship_data[0] * scale, ship_status[0])
+        else:
+            ship_dots = TrueDot(center=ORIGIN)
+            ship_dots.clear_points()
+            ship_points = np.pad(ship_data[0] * scale, ((0, 0), (0, 1)), mode="constant")
+            ship_dots.add_points(ship_points)
+            ship_dots.set_color(WHITE)
 
         leo_label = Text("Low Earth Orbit", font_size=20).next_to(body_dots[1], DOWN)
 
         self.add(*body_dots, l1_circle, l1_label, ship_dots, leo_label)
+        if self.density_mode:
+            # The image is opaque, everything else goes on top of it.
+            self.bring_to_back(ship_dots)
 
         self.wait(0.1)
         self.next_slide()
 
         time_step = ValueTracker(0)
         
-        # best_ship = np.load("data/leo_to_moon_best_ship.npy")[0]
-        best_ship = 748 # Obtained from running simulation for t=25.
+        # The best ship ranked by `capture_search.py`, followed until it arrives at the Moon.
+        best = capture_search.best_candidate("data/leo_to_moon_capture_candidates.npy")
+        best_ship = int(best["ship"])
+        total_time = (time_steps - 1) * dt
+        arrival = capture_search.arrival_time(best, total_time) / total_time
         best_ship_start = ship_data[0, best_ship]
         best_ship_dot = Dot(color=LIMEGREEN, point=(best_ship_start[0] * scale, best_ship_start[1] * scale, 0)) # type: ignore
         best_ship_trace = TracedPath(best_ship_dot.get_center, stroke_color=LIMEGREEN, stroke_width=2)
 
         self.add(best_ship_trace, best_ship_dot)
 
-        def update(data, n):
+        def update(n):
             def f(mob):
-                coords = data[int((len(data) - 1) * time_step.get_value()), n] * scale
+                coords = bodies_at(int((time_steps - 1) * time_step.get_value()))[n] * scale
                 mob.move_to((coords[0], coords[1], 0))
             return f
         for i in range(bodies_count):
-            body_dots[i].add_updater(update(bodies_data, i))
+            body_dots[i].add_updater(update(i))
 
         def update_ships(mob: TrueDot):
             time_index = int((len(ship_data) - 1) * time_step.get_value())
             ship_points = np.pad(ship_data[time_index] * scale, ((0, 0), (0, 1)), mode="constant")
-            # Transform ship status to color codes.
+            # Transform ship status to color codes (`events.STATUS_*`).
             # 0: default
-            # 1: returned to Earth
+            # 1: returned to Earth, i.e. re-entered the Earth SOI after leaving it
             # 2: reached Moon
             # 3: captured by Moon
-            colors = list(map(ManimColor.to_rgba, [WHITE, DARK_GRAY, RED, LIMEGREEN]))
+            colors = list(map(ManimColor.to_rgba, status_colors))
             convert_to_color = np.vectorize(lambda x: colors[x], signature='()->(4)')
             ship_status_colors = convert_to_color(ship_status[time_index])
 
             mob.clear_points()
             mob.add_points(ship_points, rgbas=ship_status_colors)
-        ship_dots.add_updater(update_ships)
+
+        def update_density(mob: DensityImage):
+            time_index = int((len(ship_data) - 1) * time_step.get_value())
+            mob.show(self.renderer, ship_data[time_index] * scale, ship_status[time_index])
+        ship_dots.add_updater(update_density if self.density_mode else update_ships)
 
         def update_best_ship(mob: Dot):
             time_index = int((len(ship_data) - 1) * time_step.get_value())
@@ -249,13 +337,16 @@ class LeoToMoon(Slide):
             best_ship_trace.set_stroke(opacity=opacity.get_value())
         self.add_updater(update_opacity)
 
-        self.play(FadeOut(hohmann_label), opacity.animate(run_time=1).set_value(1), time_step.animate(run_time=20, rate_func=smooth).set_value(1))
+        self.play(FadeOut(hohmann_label), opacity.animate(run_time=1).set_value(1), time_step.animate(run_time=20, rate_func=smooth).set_value(arrival))
         self.remove_updater(update_opacity) # Remove for performance
 
         ballistic_capture_label = Text("Ballistic capture!", font_size=20).next_to(best_ship_dot, DOWN)
         self.play(Write(ballistic_capture_label))
         self.interactive_embed()
 
+class LeoToMoonDensity(LeoToMoon):
+    density_mode = True
+
 class EffectivePotential(ThreeDSlide):
     m_earth = 1.0
     m_moon = 0.0123
@@ -291,8 +382,9 @@ class EffectivePotential(ThreeDSlide):
         )
 
     def construct_U_grav(self):
-        self.U_grav_eqn = MathTex(r"U_{g} = -G\frac{m_E}{r_E} - G\frac{m_M}{r_M}").to_corner(UL)
-        self.add_fixed_in_frame_mobjects(self.U_grav_eqn)
+        if THEME["equations"]:
+            self.U_grav_eqn = MathTex(r"U_{g} = -G\frac{m_E}{r_E} - G\frac{m_M}{r_M}").to_corner(UL)
+            self.add_fixed_in_frame_mobjects(self.U_grav_eqn)
 
         self.U_grav_surface = OpenGLSurface(
             uv_func=lambda u, v: self.axes.c2p(u, v, self.U_grav(u, v)),
@@ -302,10 +394,14 @@ class EffectivePotential(ThreeDSlide):
             resolution=(64, 64),
             opacity=0.5,
         )
-        self.play(Create(self.U_grav_surface), Write(self.U_grav_eqn))
+        if THEME["equations"]:
+            self.play(Create(self.U_grav_surface), Write(self.U_grav_eqn))
+        else:
+            self.play(Create(self.U_grav_surface))
     
     def construct_U_centrifugal(self):
-        self.U_centrifugal_eqn = MathTex(r"U_{c} = -\frac{1}{2} \omega^2 r^2").next_to(self.U_grav_eqn, RIGHT).shift(RIGHT)
+        if THEME["equations"]:
+            self.U_centrifugal_eqn = MathTex(r"U_{c} = -\frac{1}{2} \omega^2 r^2").next_to(self.U_grav_eqn, RIGHT).shift(RIGHT)
 
         self.U_centrifugal_surface = OpenGLSurface(
             uv_func=lambda u, v: self.axes.c2p(u, v, self.U_centrifugal(u, v)),
@@ -317,13 +413,17 @@ class EffectivePotential(ThreeDSlide):
         )
 
         self.play(Uncreate(self.U_grav_surface))
-        self.add_fixed_in_frame_mobjects(self.U_centrifugal_eqn)
-        self.play(Create(self.U_centrifugal_surface), Write(self.U_centrifugal_eqn))
+        if THEME["equations"]:
+            self.add_fixed_in_frame_mobjects(self.U_centrifugal_eqn)
+            self.play(Create(self.U_centrifugal_surface), Write(self.U_centrifugal_eqn))
+        else:
+            self.play(Create(self.U_centrifugal_surface))
         self.wait(0.1)
 
     def construct_U_effective(self):
-        self.U_effective_eqn = MathTex(r"U_{eff} = U_{g} + U_{c}").to_corner(UL)
-        self.add_fixed_in_frame_mobjects(self.U_effective_eqn)
+        if THEME["equations"]:
+            self.U_effective_eqn = MathTex(r"U_{eff} = U_{g} + U_{c}").to_corner(UL)
+            self.add_fixed_in_frame_mobjects(self.U_effective_eqn)
 
         self.U_effective_surface = OpenGLSurface(
             uv_func=lambda u, v: self.axes.c2p(u, v, self.U_effective(u, v)),
@@ -333,11 +433,15 @@ class EffectivePotential(ThreeDSlide):
             resolution=(64, 64),
             opacity=0.5,
         )
-        self.play(
-            ReplacementTransform(self.U_centrifugal_surface, self.U_effective_surface),
-            ReplacementTransform(self.U_grav_eqn, self.U_effective_eqn),
-            FadeOut(self.U_centrifugal_eqn)
-        )
+        if THEME["equations"]:
+            self.play(
+                ReplacementTransform(self.U_centrifugal_surface, self.U_effective_surface),
+                ReplacementTransform(self.U_grav_eqn, self.U_effective_eqn),
+                FadeOut(self.U_centrifugal_eqn)
+            )
+        else:
+            self.play(Uncreate(self.U_centrifugal_surface))
+            self.play(Create(self.U_effective_surface))
 
     def construct_lagrange_points(self):
         # Draw Lagrange points.
@@ -361,6 +465,20 @@ class EffectivePotential(ThreeDSlide):
 
         self.l1_point = dots[0] # Save this so that we can zoom in to prepare for next slide.
 
+    def construct_forbidden_region(self):
+        # Region a ship with the energy of L1 cannot reach, from `make build-hill-atlas`.
+        atlas = hill_atlas.HillAtlas("data/hill_atlas_earth_moon.npz")
+        jacobi = hill_atlas.l1_jacobi_constant(self.mu)
+        x_min, x_max, y_min, y_max = atlas.extent
+        lower_left, upper_right = self.axes.c2p(x_min, y_min, 0), self.axes.c2p(x_max, y_max, 0)
+        forbidden = ArrayImage(
+            atlas.rgba(self.mu, jacobi, color=ManimColor(GRAY).to_rgb(), opacity=0.5),
+            width=upper_right[0] - lower_left[0],
+            height=upper_right[1] - lower_left[1],
+        ).move_to((lower_left + upper_right) / 2)
+        self.play(FadeIn(forbidden))
+        self.wait(0.1)
+
     def construct(self):
         self.construct_axes()
         self.next_slide()
@@ -386,7 +504,10 @@ class EffectivePotential(ThreeDSlide):
         self.next_slide()
 
         self.construct_lagrange_points()
-        
+        self.next_slide()
+
+        self.construct_forbidden_region()
+
         self.interactive_embed()
 
 class HaloOrbits(Slide):
@@ -450,7 +571,7 @@ class HaloOrbits(Slide):
         self.add(best_trace)
         best_trace.set_stroke(opacity=0)
 
-        self.wait(0.1)
+        self.wait(THEME["pause"])
         self.next_slide()
 
         time_step = ValueTracker(0)
@@ -469,14 +590,14 @@ class HaloOrbits(Slide):
 
         # Show best ship trace now.
         best_trace.set_stroke(opacity=1)
-        self.wait(0.1)
+        self.wait(THEME["pause"])
         self.next_slide()
         
         # Reflect the best path across the y=0 line.
         best_trace_center = best_trace.get_center()
         reflected_best_trace = best_trace.copy().flip(RIGHT).shift(DOWN * best_trace_center[1] * 2)
         self.add(reflected_best_trace)
-        self.wait(0.1)
+        self.wait(THEME["pause"])
 
         halo_orbit_text = Text("Halo Orbit (Lyapunov L1)", font_size=30).to_edge(DOWN).shift(RIGHT * 4)
         self.play(Write(halo_orbit_text))
@@ -513,7 +634,7 @@ class HaloOrbits(Slide):
         orbit_traces_center = orbit_traces.get_center()
         reflected_orbit_traces = orbit_traces.copy().flip(RIGHT).shift(DOWN * orbit_traces_center[1] * 2)
         self.add(reflected_orbit_traces)
-        self.wait(0.1)
+        self.wait(THEME["pause"])
 
         self.interactive_embed()
 
@@ -968,17 +1089,22 @@ class Manifolds3Body(Slide):
 class BallisticCapture(Slide):
     def construct(self):
         print("Loading data")
-        bodies_data = np.load("data/leo_to_moon_bodies.npy")
         ship_data = np.load("data/leo_to_moon_ships.npy")
-        time_steps = bodies_data.shape[0]
-        assert ship_data.shape[0] == time_steps, "ship data and bodies data should have the same number of time steps"
-        bodies_count = bodies_data.shape[1]
+        time_steps = ship_data.shape[0]
+        # Bodies are read on demand from the table written by `src/leo_to_moon.rs`.
+        dt = scenarios.LEO_TO_MOON_DT
+        bodies = ephemeris.Ephemeris.from_table(np.load("data/leo_to_moon_bodies.npy", mmap_mode="r"), dt)
+        bodies_count = len(bodies)
 
         print("Transforming to Earth frame")
         # Transform positions to (non-corotating) Earth frame.
-        earth_pos = bodies_data[:, 1].reshape((time_steps, 1, 2))
+        frame_times = np.arange(time_steps) * dt
+        earth_pos = bodies.bodies[1].position(frame_times).reshape((time_steps, 1, 2))
         ship_data -= earth_pos
-        bodies_data -= earth_pos
+
+        def bodies_at(time_index: int) -> np.ndarray:
+            r = bodies.positions(time_index * dt)
+            return r - r[1]
 
         print("Done!")
 
@@ -989,7 +1115,7 @@ class BallisticCapture(Slide):
         body_dots = []
         for i in range(bodies_count):
             color = colors[i % len(colors)]
-            body_dots.append(Dot(color=color, point=[bodies_data[0,i,0] * scale, bodies_data[0,i,1] * scale, 0])) # type: ignore
+            body_dots.append(Dot(color=color, point=[bodies_at(0)[i,0] * scale, bodies_at(0)[i,1] * scale, 0])) # type: ignore
 
         l1_circle = Circle(radius=3.902 * scale, color=BLUE)
         l1_label = Text("Earth SOI", font_size=20, color=BLUE).next_to(l1_circle, LEFT)
@@ -1001,21 +1127,27 @@ class BallisticCapture(Slide):
 
         time_step = ValueTracker(0)
         
-        # best_ship = np.load("data/leo_to_moon_best_ship.npy")[0]
-        best_ship = 748 # Obtained from running simulation for t=25.
+        # The best ship ranked by `capture_search.py`. It rides the Sun-Earth manifolds out to its
+        # farthest point from the Earth and the Earth-Moon manifolds back in until it arrives at
+        # the Moon; the labels are spaced along these two legs.
+        best = capture_search.best_candidate("data/leo_to_moon_capture_candidates.npy")
+        best_ship = int(best["ship"])
+        total_time = (time_steps - 1) * dt
+        arrival = capture_search.arrival_time(best, total_time) / total_time
+        farthest = min(np.argmax(np.linalg.norm(ship_data[:, best_ship], axis=1)) / (time_steps - 1), arrival)
         best_ship_start = ship_data[0, best_ship]
         best_ship_dot = Dot(color=LIMEGREEN, point=(best_ship_start[0] * scale, best_ship_start[1] * scale, 0)) # type: ignore
         best_ship_trace = TracedPath(best_ship_dot.get_center, stroke_color=LIMEGREEN, stroke_width=2)
 
         self.add(best_ship_trace, best_ship_dot)
 
-        def update(data, n):
+        def update(n):
             def f(mob):
-                coords = data[int((len(data) - 1) * time_step.get_value()), n] * scale
+                coords = bodies_at(int((time_steps - 1) * time_step.get_value()))[n] * scale
                 mob.move_to((coords[0], coords[1], 0))
             return f
         for i in range(bodies_count):
-            body_dots[i].add_updater(update(bodies_data, i))
+            body_dots[i].add_updater(update(i))
 
 
         def update_best_ship(mob: Dot):
@@ -1026,19 +1158,20 @@ class BallisticCapture(Slide):
 
         self.next_slide()
 
-        self.play(time_step.animate(run_time=4, rate_func=ease_in_cubic).set_value(0.15))
+        inbound = arrival - farthest
+        self.play(time_step.animate(run_time=4, rate_func=ease_in_cubic).set_value(farthest / 2))
         sun_earth_stable = Text("Sun-Earth Stable", font_size=18, color=BLUE).next_to(best_ship_dot, UR)
 
-        self.play(FadeIn(sun_earth_stable), time_step.animate(run_time=3, rate_func=linear).set_value(0.4))
+        self.play(FadeIn(sun_earth_stable), time_step.animate(run_time=3, rate_func=linear).set_value(farthest))
         sun_earth_unstable = Text("Sun-Earth Unstable", font_size=18, color=RED).next_to(best_ship_dot, DOWN)
 
-        self.play(FadeIn(sun_earth_unstable), time_step.animate(run_time=3, rate_func=linear).set_value(0.6))
+        self.play(FadeIn(sun_earth_unstable), time_step.animate(run_time=3, rate_func=linear).set_value(farthest + inbound / 3))
         earth_moon_stable = Text("Earth-Moon Stable", font_size=18, color=BLUE).next_to(best_ship_dot, DOWN)
 
-        self.play(FadeIn(earth_moon_stable), time_step.animate(run_time=3, rate_func=linear).set_value(0.9))
+        self.play(FadeIn(earth_moon_stable), time_step.animate(run_time=3, rate_func=linear).set_value(farthest + 2 * inbound / 3))
         earth_moon_unstable = Text("Earth-Moon Unstable", font_size=18, color=RED).next_to(best_ship_dot, DR)
 
-        self.play(FadeIn(earth_moon_unstable), time_step.animate(run_time=3, rate_func=ease_out_cubic).set_value(1))
+        self.play(FadeIn(earth_moon_unstable), time_step.animate(run_time=3, rate_func=ease_out_cubic).set_value(arrival))
 
         ballistic_capture_label = Text("Arrived at Moon!", font_size=20).next_to(best_ship_dot, RIGHT)
         self.play(Write(ballistic_capture_label))
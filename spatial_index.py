@@ -0,0 +1,199 @@
+"""
+Uniform-grid spatial index over ship positions, for "which ships are near X" queries.
+
+Finding which points are near a set of centers takes a distance computation for every pair.
+`GridIndex` hashes the positions of one frame into square cells and keeps the point indices sorted
+by cell, so a query only looks at the cells its disc overlaps:
+
+- `query_radius(center, radius)`: indices of the points within `radius` of a point.
+- `query_pairs(centers, radius)`: all pairs `(center, point)` closer than `radius`, vectorised over
+  many centers (e.g. matching manifold crossings in `sections.py`).
+- `nearest(center, k)`: the `k` nearest points, searching rings of cells outwards.
+
+The cell of every point is a single integer key. Cells are sparse: only occupied cells cost memory,
+so ships escaping far away do not blow up the grid. Between frames ships move little. `update`
+recomputes the keys in the previous order and re-sorts them with a stable sort. That sort is
+nearly linear on almost sorted input, so indexing consecutive frames costs much less than
+building each from scratch.
+
+Only the crossing matching of `sections.py` uses the index. The Moon-zone and Earth-SOI events of
+`events.py` keep computing every ship's distance at every step, because they are evaluated for a
+whole chunk of time steps at once. On 1000 of the LEO-to-Moon ships, indexing every frame made
+event detection about 2.4 times slower. Indexing the first frame of each chunk and widening the
+query by how far the ships move still left 77-96% of them as candidates, because they all cross the
+Moon's orbit.
+
+Usage: `python spatial_index.py` counts, at every frame of `data/leo_to_moon_ships.npy`, the
+ships inside the Moon zone and the Earth SOI, and compares the time taken with a full distance
+computation.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import ephemeris
+import scenarios
+
+class GridIndex:
+    """
+    Points of shape `(n, 2)` hashed into square cells of side `cell_size`. Queries are fastest
+    with `cell_size` about the typical query radius.
+    """
+
+    def __init__(self, points: np.ndarray, cell_size: float):
+        self.cell_size = cell_size
+        self.order = np.arange(len(points))
+        self.update(points)
+
+    def update(self, points: np.ndarray):
+        """
+        Index new positions of the same points, e.g. the next frame of a swarm.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        assert len(points) == len(self.order), "update with the same number of points"
+        self.points = points
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        if len(points) == 0:
+            self.low = self.high = np.zeros(2, dtype=np.int64)
+        else:
+            self.low, self.high = cells.min(axis=0), cells.max(axis=0)
+        # Cell keys as a single sortable integer, row-major with one spare column on each side.
+        self.width = self.high[1] - self.low[1] + 3
+        keys = self._keys(cells)
+        # Stable sort of the keys in the previous order: almost sorted if points moved little.
+        order = self.order[np.argsort(keys[self.order], kind="stable")]
+        self.order = order
+        self.sorted_keys = keys[order]
+
+    def _keys(self, cells: np.ndarray) -> np.ndarray:
+        return (cells[..., 0] - self.low[0]) * self.width + (cells[..., 1] - self.low[1] + 1)
+
+    def _span(self, radius: float) -> int:
+        return int(np.ceil(radius / self.cell_size))
+
+    def _candidates(self, cells: np.ndarray, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Pairs `(i, j)` of query `i` (in cell `cells[i]`) and point `j` in any cell at one of
+        `offsets` from it.
+        """
+        neighbours = (cells[:, None, :] + offsets[None, :, :]).reshape((-1, 2))
+        queries = np.repeat(np.arange(len(cells)), len(offsets))
+        column = neighbours[:, 1] - self.low[1]
+        # Cells outside the indexed columns would alias cells of the next row.
+        inside = (column >= 0) & (column <= self.high[1] - self.low[1])
+        keys = self._keys(neighbours)
+        lo = np.searchsorted(self.sorted_keys, keys, side="left")
+        hi = np.searchsorted(self.sorted_keys, keys, side="right")
+        counts = np.where(inside, hi - lo, 0)
+        total = counts.sum()
+        # Position of each candidate inside its run of equal keys.
+        j = self.order[np.repeat(lo, counts) + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)]
+        return np.repeat(queries, counts), j
+
+    def _square(self, span: int) -> np.ndarray:
+        d = np.arange(-span, span + 1)
+        return np.stack(np.meshgrid(d, d, indexing="ij"), axis=-1).reshape((-1, 2))
+
+    def _ring(self, ring: int) -> np.ndarray:
+        """
+        Offsets of the cells at Chebyshev distance `ring`.
+        """
+        if ring == 0:
+            return np.zeros((1, 2), dtype=np.int64)
+        d = np.arange(-ring, ring)
+        side = np.full_like(d, ring)
+        return np.concatenate([
+            np.stack([d, -side], axis=1), np.stack([side, d], axis=1),
+            np.stack([-d, side], axis=1), np.stack([-side, -d], axis=1),
+        ])
+
+    def query_pairs(self, centers: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        All index pairs `(i, j)` with `|centers[i] - points[j]| < radius`.
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape((-1, 2))
+        span = self._span(radius)
+        if (2 * span + 1) ** 2 >= len(self.points):
+            # Cells would outnumber the points: compare everything.
+            i, j = np.meshgrid(np.arange(len(centers)), np.arange(len(self.points)), indexing="ij")
+            i, j = i.ravel(), j.ravel()
+        else:
+            i, j = self._candidates(np.floor(centers / self.cell_size).astype(np.int64), self._square(span))
+        close = np.linalg.norm(centers[i] - self.points[j], axis=1) < radius
+        return i[close], j[close]
+
+    def query_radius(self, center: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Sorted indices of the points within `radius` of `center`.
+        """
+        return np.sort(self.query_pairs(center, radius)[1])
+
+    def count_radius(self, centers: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Number of points within `radius` of each of `centers`.
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape((-1, 2))
+        return np.bincount(self.query_pairs(centers, radius)[0], minlength=len(centers))
+
+    def nearest(self, center: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Indices and distances of the `k` points nearest to `center`, nearest first.
+        """
+        center = np.asarray(center, dtype=np.float64).reshape((1, 2))
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        cell = np.floor(center / self.cell_size).astype(np.int64)
+        # Only rings between these two overlap the indexed cells.
+        first_ring = int(np.max(np.concatenate([self.low - cell[0], cell[0] - self.high, [0]])))
+        last_ring = int(np.max(np.abs(np.concatenate([cell[0] - self.low, self.high - cell[0]]))))
+        found, distances = [], []
+        for ring in range(first_ring, last_ring + 1):
+            _, j = self._candidates(cell, self._ring(ring))
+            found.append(j)
+            distances.append(np.linalg.norm(self.points[j] - center, axis=1))
+            count = sum(len(f) for f in found)
+            # Points in outer rings are at least `ring` cells away.
+            if count >= k and np.partition(np.concatenate(distances), k - 1)[k - 1] <= ring * self.cell_size:
+                break
+        found, distances = np.concatenate(found), np.concatenate(distances)
+        order = np.argsort(distances, kind="stable")[:k]
+        return found[order], distances[order]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count ships near the Moon and the Earth at every frame with a grid index.")
+    parser.add_argument("--ships", default="data/leo_to_moon_ships.npy")
+    parser.add_argument("--bodies", default="data/leo_to_moon_bodies.npy")
+    parser.add_argument("--dt", type=float, default=scenarios.LEO_TO_MOON_DT)
+    parser.add_argument("--every", type=int, default=10, help="index every n-th time step")
+    parser.add_argument("--cell-size", type=float, default=scenarios.MOON_ZONE_RADIUS)
+    args = parser.parse_args()
+
+    ships = np.load(args.ships, mmap_mode="r")
+    bodies = ephemeris.Ephemeris.from_table(np.load(args.bodies, mmap_mode="r"), args.dt)
+    steps = np.arange(0, len(ships), args.every)
+    # Body indices: 0 = Sun, 1 = Earth, 2 = Moon.
+    body_positions = bodies.positions(steps * args.dt)
+    frames = [np.asarray(ships[step], dtype=np.float64) for step in steps]
+
+    start = time.perf_counter()
+    index = GridIndex(frames[0], args.cell_size)
+    in_zone, in_soi = [], []
+    for frame, r in zip(frames, body_positions):
+        index.update(frame)
+        in_zone.append(index.count_radius(r[2], scenarios.MOON_ZONE_RADIUS)[0])
+        in_soi.append(index.count_radius(r[1], scenarios.EARTH_SOI_RADIUS)[0])
+    indexed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame, r, zone, soi in zip(frames, body_positions, in_zone, in_soi):
+        assert np.count_nonzero(np.linalg.norm(frame - r[2], axis=1) < scenarios.MOON_ZONE_RADIUS) == zone
+        assert np.count_nonzero(np.linalg.norm(frame - r[1], axis=1) < scenarios.EARTH_SOI_RADIUS) == soi
+    brute_force = time.perf_counter() - start
+
+    print(f"{len(steps)} frames of {ships.shape[1]} ships: grid index {indexed:.2f}s, full distances {brute_force:.2f}s")
+    print(f"Most ships in the Moon zone: {max(in_zone)} at t = {steps[int(np.argmax(in_zone))] * args.dt:.3f}")
+    nearest, distances = index.nearest(body_positions[-1, 2], 5)
+    print(f"Nearest ships to the Moon at the end: {', '.join(f'{i} ({d:.4f})' for i, d in zip(nearest, distances))}")
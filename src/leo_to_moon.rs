@@ -1,10 +1,13 @@
-use crate::tracer::{trace_planets, trace_ships, TracePlanets, TraceShips};
-use ndarray::{array, Array2, Axis};
+use crate::{
+    tracer::{trace_planets, trace_ships, TracePlanets, TraceShips},
+    RunOptions,
+};
+use ndarray::{array, s, Array2, Axis};
 use ndarray_npy::write_npy;
 
-pub fn start() {
+pub fn start(options: RunOptions) {
     // Units are c * secs.
-    let total_time = 24.3;
+    let total_time = options.total_time.unwrap_or(24.3);
     let dt = 0.001;
     let time_steps = (total_time / dt) as usize;
 
@@ -82,13 +85,25 @@ pub fn start() {
         }
     });
 
+    // Reduced runs trace a range of the grid. Ship indices below are those of the whole grid.
+    let first_ship = options.first_ship;
+    let num_traced = options
+        .num_ships
+        .unwrap_or(num_ships.saturating_sub(first_ship));
+    assert!(
+        first_ship + num_traced <= num_ships,
+        "ships {first_ship}..{} are outside the grid of {num_ships} ships",
+        first_ship + num_traced
+    );
+    let traced = first_ship..first_ship + num_traced;
+
     let opts = TraceShips {
         masses: masses.view(),
         mass_positions_at_t: mass_positions_at_t.view(),
         dt,
         time_steps,
-        ship_positions: ship_positions.view(),
-        ship_velocities: ship_velocities.view(),
+        ship_positions: ship_positions.slice(s![traced.clone(), ..]),
+        ship_velocities: ship_velocities.slice(s![traced, ..]),
         fictitious_force: |_, _| [0., 0.],
     };
 
@@ -97,7 +112,7 @@ pub fn start() {
 
     // Compute ship status at every time step.
     log::info!("computing ship with smallest relative velocity to Moon");
-    let ship_status = Array2::<u8>::zeros((time_steps, num_ships));
+    let ship_status = Array2::<u8>::zeros((time_steps, num_traced));
 
     // Moon SOI.
     let r2_zone = 0.167;
@@ -111,14 +126,15 @@ pub fn start() {
     let mut smallest_rel_v_time = 0.0;
     let mut smallest_rel_v_esc = 0.0;
     for t in first_time_step..time_steps {
-        for i in 0..num_ships {
+        for traced_i in 0..num_traced {
+            let i = first_ship + traced_i;
             let prev_pos = [
-                ship_positions_at_t[[t - 1, i, 0]],
-                ship_positions_at_t[[t - 1, i, 1]],
+                ship_positions_at_t[[t - 1, traced_i, 0]],
+                ship_positions_at_t[[t - 1, traced_i, 1]],
             ];
             let pos = [
-                ship_positions_at_t[[t, i, 0]],
-                ship_positions_at_t[[t, i, 1]],
+                ship_positions_at_t[[t, traced_i, 0]],
+                ship_positions_at_t[[t, traced_i, 1]],
             ];
             let dx = [pos[0] - prev_pos[0], pos[1] - prev_pos[1]];
             let v = [dx[0] / dt, dx[1] / dt];
@@ -11,20 +11,59 @@ pub mod multi_planet;
 pub mod single_planet;
 pub mod tracer;
 
+/// Overrides for reduced runs, such as the golden cases of `regression.py`. Only `single_planet`,
+/// `multi_planet` and `leo_to_moon` accept them.
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub struct RunOptions {
+    /// Simulated time instead of the simulation's own (`--total-time`).
+    pub total_time: Option<f64>,
+    /// Number of ships instead of the simulation's own (`--ships`). `leo_to_moon` keeps its grid of
+    /// ships and only traces this many of them, starting at `first_ship`.
+    pub num_ships: Option<usize>,
+    /// First ship of the grid traced by `leo_to_moon` (`--first-ship`).
+    pub first_ship: usize,
+}
+
+impl RunOptions {
+    fn parse(args: &[String]) -> Self {
+        let mut options = Self::default();
+        let mut args = args.iter();
+        while let Some(flag) = args.next() {
+            let value = args
+                .next()
+                .unwrap_or_else(|| panic!("missing value for `{flag}`"));
+            match flag.as_str() {
+                "--total-time" => {
+                    options.total_time = Some(value.parse().expect("invalid --total-time"))
+                }
+                "--ships" => options.num_ships = Some(value.parse().expect("invalid --ships")),
+                "--first-ship" => options.first_ship = value.parse().expect("invalid --first-ship"),
+                _ => panic!("unknown option `{flag}`"),
+            }
+        }
+        options
+    }
+}
+
 fn main() {
     SimpleLogger::new().init().unwrap();
 
-    let Some(arg) = std::env::args().nth(1) else {
-        error!("missing argument. Usage: cargo run (--release) <simulation>");
+    let args: Vec<String> = std::env::args().collect();
+    let Some(arg) = args.get(1) else {
+        error!("missing argument. Usage: cargo run (--release) <simulation> [--total-time <t>] [--ships <n>] [--first-ship <i>]");
         return;
     };
+    let options = RunOptions::parse(&args[2..]);
 
-    info!("running simulation `{arg}`");
+    info!("running simulation `{arg}` with {options:?}");
 
     match arg.as_str() {
-        "single_planet" => single_planet::start(),
-        "multi_planet" => multi_planet::start(),
-        "leo_to_moon" => leo_to_moon::start(),
+        "single_planet" => single_planet::start(options),
+        "multi_planet" => multi_planet::start(options),
+        "leo_to_moon" => leo_to_moon::start(options),
+        _ if options != RunOptions::default() => {
+            panic!("`{arg}` does not accept --total-time, --ships or --first-ship")
+        }
         "leo_to_moon_compute" => leo_to_moon_compute::start(),
         "halo_orbits_earth_moon" => halo_orbits::start_earth_moon(),
         "halo_orbits_sun_earth" => halo_orbits::start_sun_earth(),
@@ -1,10 +1,13 @@
-use crate::tracer::{trace_ships, TraceShips};
+use crate::{
+    tracer::{trace_ships, TraceShips},
+    RunOptions,
+};
 use ndarray::{array, Array2};
 use ndarray_npy::write_npy;
 
-pub fn start() {
+pub fn start(options: RunOptions) {
     // Units are c * secs.
-    let total_time = 100.;
+    let total_time = options.total_time.unwrap_or(100.);
     let dt = 0.005;
     let time_steps = (total_time / dt) as usize;
 
@@ -17,7 +20,7 @@ pub fn start() {
         .unwrap()
         .to_owned();
 
-    let num_ships = 400;
+    let num_ships = options.num_ships.unwrap_or(400);
 
     let ship_positions = array![2., 0.].broadcast((num_ships, 2)).unwrap().to_owned();
 
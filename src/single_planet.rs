@@ -1,10 +1,13 @@
-use crate::tracer::{trace_ships, TraceShips};
+use crate::{
+    tracer::{trace_ships, TraceShips},
+    RunOptions,
+};
 use ndarray::{array, Array2, Array3};
 use ndarray_npy::write_npy;
 
-pub fn start() {
+pub fn start(options: RunOptions) {
     // Units are c * secs.
-    let total_time = 40.;
+    let total_time = options.total_time.unwrap_or(40.);
     let dt = 0.005;
     let time_steps = (total_time / dt) as usize;
 
@@ -13,7 +16,7 @@ pub fn start() {
     let mass = array![1.];
     let mass_positions_at_t = Array3::zeros((time_steps, 1, 2));
 
-    let num_ships = 100;
+    let num_ships = options.num_ships.unwrap_or(100);
 
     let ship_positions = array![1., 0.].broadcast((num_ships, 2)).unwrap().to_owned();
 
@@ -0,0 +1,294 @@
+"""
+Parameter sweeps over LEO-to-Moon launches, sharded across a process pool.
+
+The launch grid of `src/leo_to_moon.rs` is fixed in code and its whole `(time_steps, ships, 2)`
+result has to fit in memory. Here the grid is the product of user-declared axes:
+
+- `angle`: launch angle around LEO in radians.
+- `multiplier`: launch speed in units of the circular LEO speed.
+- `epoch`: Moon phase angle at departure in radians, measured from the Sun-Earth line.
+- `moon_mass`: mass of the Moon (Earth mass is 1).
+
+The grid is split into shards of ships sharing the same bodies (epoch and Moon mass). Each shard
+is propagated with `propagator.propagate_chunks` and reduced to per-ship summaries on the fly, so
+no process ever holds more than one chunk of trajectories. Shards are written to
+`<out>/shard_<n>.npz` and recorded in `<out>/manifest.json`; rerunning the same sweep skips shards
+that are already done. Finally the summaries are merged into `<out>/summary.npy`.
+
+The integrator and step size default to those recorded for `leo_to_moon` by `dt_tuner.py`, if it was
+tuned over at least the `--total-time` of the sweep, and otherwise to the Rust settings.
+
+Usage: `python sweep.py data/sweep --angles 0 6.2832 800 --multipliers 1.378 1.379 20 --workers 8`
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+
+import scenarios
+from dt_tuner import recommended
+from events import STATUS_CAPTURED, STATUS_DEFAULT, STATUS_REACHED_MOON, STATUS_RETURNED_TO_EARTH, State
+from propagator import METHODS, propagate_chunks, trace_planets
+
+SUMMARY_DTYPE = np.dtype([
+    ("ship", "i8"),
+    ("angle", "f8"),
+    ("multiplier", "f8"),
+    ("epoch", "f8"),
+    ("moon_mass", "f8"),
+    ("min_moon_distance", "f8"),
+    ("min_moon_distance_time", "f8"),
+    # First time inside the Moon zone below escape velocity (nan if never).
+    ("capture_time", "f8"),
+    ("capture_duration", "f8"),
+    # Final `events.STATUS_*` code, but latched: captured at any time counts as captured.
+    ("status", "u1"),
+])
+
+def grid(angle: np.ndarray, multiplier: np.ndarray, epoch: np.ndarray, moon_mass: np.ndarray) -> np.ndarray:
+    """
+    All combinations of the axes as a summary table with the results still empty. Ships sharing
+    bodies are contiguous.
+    """
+    e, m, a, k = np.meshgrid(epoch, moon_mass, angle, multiplier, indexing="ij")
+    table = np.zeros(e.size, dtype=SUMMARY_DTYPE)
+    table["ship"] = np.arange(e.size)
+    table["angle"] = a.ravel()
+    table["multiplier"] = k.ravel()
+    table["epoch"] = e.ravel()
+    table["moon_mass"] = m.ravel()
+    table["min_moon_distance"] = np.inf
+    table["min_moon_distance_time"] = np.nan
+    table["capture_time"] = np.nan
+    return table
+
+def shards(table: np.ndarray, shard_size: int) -> list[tuple[int, int]]:
+    """
+    Split the grid into `[start, end)` ranges of at most `shard_size` ships that share bodies.
+    """
+    keys = np.stack([table["epoch"], table["moon_mass"]], axis=1)
+    boundaries = np.nonzero(np.any(keys[1:] != keys[:-1], axis=1))[0] + 1
+    ranges = []
+    for lo, hi in zip(np.r_[0, boundaries], np.r_[boundaries, len(table)]):
+        ranges.extend((s, min(s + shard_size, hi)) for s in range(lo, hi, shard_size))
+    return ranges
+
+def bodies(epoch: float, moon_mass: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sun, Earth and Moon of `scenarios.leo_to_moon_bodies` with the Moon rotated by `epoch` around
+    the Earth-Moon barycentre.
+    """
+    masses, positions, velocities = scenarios.leo_to_moon_bodies()
+    m1 = scenarios.EARTH_MASS
+    masses[2] = moon_mass
+    mu = m1 * moon_mass / (m1 + moon_mass)
+    barycentre = np.array([scenarios.SUN_EARTH_DISTANCE, 0.])
+    direction = np.array([np.cos(epoch), np.sin(epoch)])
+    normal = np.array([-direction[1], direction[0]])
+    positions[1] = barycentre - mu * direction
+    positions[2] = barycentre + (1. - mu) * direction
+    # Velocity of the Earth-Moon barycentre around the Sun.
+    v1 = np.sqrt(scenarios.SUN_MASS / scenarios.SUN_EARTH_DISTANCE)
+    velocities[1] = [0., v1] - moon_mass / (m1 + moon_mass) * normal
+    velocities[2] = [0., v1] + m1 / (m1 + moon_mass) * normal
+    return masses, positions, velocities
+
+def run_shard(rows: np.ndarray, dt: float, total_time: float, chunk_size: int, method: str = "euler") -> np.ndarray:
+    """
+    Propagate the ships in `rows` (a slice of the grid sharing bodies) and fill in their summaries.
+    """
+    rows = rows.copy()
+    time_steps = int(total_time / dt)
+    masses, body_positions, body_velocities = bodies(rows["epoch"][0], rows["moon_mass"][0])
+    bodies_at_t = trace_planets(masses, body_positions, body_velocities, dt, time_steps)
+
+    theta = rows["angle"]
+    leo_v = np.sqrt(scenarios.EARTH_MASS / scenarios.LEO_RADIUS)
+    speed = leo_v * rows["multiplier"]
+    radial = np.stack([np.cos(theta), np.sin(theta)], axis=1)
+    tangential = np.stack([-np.sin(theta), np.cos(theta)], axis=1)
+    ship_positions = scenarios.LEO_RADIUS * radial + body_positions[1]
+    ship_velocities = speed[:, None] * tangential + body_velocities[1]
+
+    summarise(rows, masses, bodies_at_t, ship_positions, ship_velocities, dt, chunk_size, method)
+    return rows
+
+def summarise(
+    rows: np.ndarray,
+    masses: np.ndarray,
+    bodies_at_t: np.ndarray,
+    ship_positions: np.ndarray,
+    ship_velocities: np.ndarray,
+    dt: float,
+    chunk_size: int,
+    method: str = "euler",
+):
+    """
+    Propagate ships against bodies traced every `dt` and fill in the outcome fields of `rows`
+    (`min_moon_distance`, `min_moon_distance_time`, `capture_time`, `capture_duration` and
+    `status`, initialised as in `grid`) in place, one chunk at a time.
+    """
+    time_steps = len(bodies_at_t)
+    bodies_v = np.gradient(bodies_at_t, dt, axis=0)
+    moon_mass = masses[2]
+    ships = np.arange(len(rows))
+    left_earth = np.zeros(len(rows), dtype=bool)
+    returned = np.zeros(len(rows), dtype=bool)
+    reached_moon = np.zeros(len(rows), dtype=bool)
+    captured_ever = np.zeros(len(rows), dtype=bool)
+
+    chunks = propagate_chunks(masses, bodies_at_t, ship_positions, ship_velocities, dt, time_steps, method=method, chunk_size=chunk_size, velocity_data=True)
+    for start, r, v in chunks:
+        end = start + len(r)
+        t = (start + np.arange(len(r)))[:, None] * dt
+        state = State(t, r, v, bodies_at_t[start:end, None], bodies_v[start:end, None])
+
+        d_moon = state.distance(2)
+        i = np.argmin(d_moon, axis=0)
+        closer = d_moon[i, ships] < rows["min_moon_distance"]
+        rows["min_moon_distance"][closer] = d_moon[i[closer], ships[closer]]
+        rows["min_moon_distance_time"][closer] = t[i[closer], 0]
+
+        in_zone = d_moon < scenarios.MOON_ZONE_RADIUS
+        captured = in_zone & (state.orbital_energy(2, moon_mass) < 0)
+        rows["capture_duration"] += np.count_nonzero(captured, axis=0) * dt
+        first = np.argmax(captured, axis=0)
+        new_capture = captured[first, ships] & np.isnan(rows["capture_time"])
+        rows["capture_time"][new_capture] = t[first[new_capture], 0]
+        captured_ever |= captured.any(axis=0)
+        reached_moon |= in_zone.any(axis=0)
+
+        # Same latches as `events.LeoToMoonStatus`.
+        outside_earth = state.distance(1) > scenarios.EARTH_SOI_RADIUS
+        left = left_earth | np.logical_or.accumulate(outside_earth, axis=0)
+        returned |= np.any(left & ~outside_earth, axis=0)
+        left_earth = left[-1]
+
+    rows["status"] = STATUS_DEFAULT
+    rows["status"][returned] = STATUS_RETURNED_TO_EARTH
+    rows["status"][reached_moon] = STATUS_REACHED_MOON
+    rows["status"][captured_ever] = STATUS_CAPTURED
+
+def _run_and_save(path: str, rows: np.ndarray, dt: float, total_time: float, chunk_size: int, method: str) -> str:
+    result = run_shard(rows, dt, total_time, chunk_size, method)
+    # Write to a temporary file first so an interrupted write never looks like a finished shard.
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, summary=result)
+    os.replace(tmp, path)
+    return path
+
+class Manifest:
+    """
+    Sweep definition and the shards completed so far, stored as `<out>/manifest.json`.
+    """
+
+    def __init__(self, out: str, spec: dict):
+        self.path = os.path.join(out, "manifest.json")
+        self.spec = spec
+        self.done: set[int] = set()
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved["spec"] != spec:
+                raise ValueError(f"{self.path} belongs to a different sweep; use another output directory")
+            self.done = set(saved["done"])
+
+    def mark_done(self, shard: int):
+        self.done.add(shard)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"spec": self.spec, "done": sorted(self.done)}, f, indent=2)
+        os.replace(tmp, self.path)
+
+def run_sweep(
+    out: str,
+    axes: dict[str, np.ndarray],
+    dt: float = 0.001,
+    total_time: float = 24.3,
+    shard_size: int = 200,
+    chunk_size: int = 500,
+    workers: Optional[int] = None,
+    method: str = "euler",
+) -> np.ndarray:
+    """
+    Run (or resume) the sweep over the product of `axes` and return the merged summary table.
+    """
+    os.makedirs(out, exist_ok=True)
+    table = grid(**axes)
+    ranges = shards(table, shard_size)
+    spec = {
+        "axes": {name: np.asarray(values).tolist() for name, values in axes.items()},
+        "dt": dt,
+        "method": method,
+        "total_time": total_time,
+        "shard_size": shard_size,
+    }
+    manifest = Manifest(out, spec)
+    shard_path = lambda n: os.path.join(out, f"shard_{n:05d}.npz")
+
+    todo = [n for n in range(len(ranges)) if n not in manifest.done or not os.path.exists(shard_path(n))]
+    print(f"{len(table)} ships in {len(ranges)} shards, {len(ranges) - len(todo)} already done")
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_run_and_save, shard_path(n), table[slice(*ranges[n])], dt, total_time, chunk_size, method): n
+            for n in todo
+        }
+        for i, future in enumerate(as_completed(futures)):
+            future.result()
+            manifest.mark_done(futures[future])
+            print(f"shard {futures[future]} done ({i + 1}/{len(todo)}, {time.perf_counter() - start_time:.0f}s)")
+
+    summary = np.concatenate([np.load(shard_path(n))["summary"] for n in range(len(ranges))])
+    np.save(os.path.join(out, "summary.npy"), summary)
+    return summary
+
+def _axis(values: Optional[list[float]], default: float) -> np.ndarray:
+    """
+    `[start, stop, count]` as a linspace, a single value, or the default.
+    """
+    if values is None:
+        return np.array([default])
+    if len(values) == 1:
+        return np.array(values)
+    start, stop, count = values
+    return np.linspace(start, stop, int(count))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep LEO-to-Moon launch parameters.")
+    parser.add_argument("out", help="output directory for shards, manifest and summary")
+    parser.add_argument("--angles", type=float, nargs="+", default=None, help="count launch angles over a full circle, or START STOP COUNT")
+    parser.add_argument("--multipliers", type=float, nargs="+", default=[1.3785, 1.3786, 10])
+    parser.add_argument("--epochs", type=float, nargs="+", default=None)
+    parser.add_argument("--moon-masses", type=float, nargs="+", default=None)
+    parser.add_argument("--dt", type=float, default=None, help="defaults to the step size recommended by dt_tuner.py")
+    parser.add_argument("--method", choices=METHODS, default=None, help="defaults to the integrator recommended by dt_tuner.py")
+    parser.add_argument("--total-time", type=float, default=24.3)
+    parser.add_argument("--shard-size", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.angles is None or len(args.angles) == 1:
+        count = 400 if args.angles is None else int(args.angles[0])
+        angles = 2. * np.pi * np.arange(count) / count
+    else:
+        angles = _axis(args.angles, 0.)
+    axes = {
+        "angle": angles,
+        "multiplier": _axis(args.multipliers, 1.3785),
+        "epoch": _axis(args.epochs, 0.),
+        "moon_mass": _axis(args.moon_masses, scenarios.MOON_MASS),
+    }
+    method, dt = recommended("leo_to_moon", "euler", scenarios.LEO_TO_MOON_DT, args.total_time)
+    method, dt = args.method or method, args.dt or dt
+    print(f"Integrating with {method}, dt = {dt}")
+    summary = run_sweep(args.out, axes, dt, args.total_time, args.shard_size, args.chunk_size, args.workers, method)
+
+    for code, name in [(STATUS_CAPTURED, "captured"), (STATUS_REACHED_MOON, "reached Moon"), (STATUS_RETURNED_TO_EARTH, "returned to Earth")]:
+        print(f"{name}: {np.count_nonzero(summary['status'] == code)}")
@@ -0,0 +1,38 @@
+import numpy as np
+
+from adaptive import dopri5
+
+def oscillator(t: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return np.stack([y[:, 1], -y[:, 0]], axis=1)
+
+def fixed_step_error(steps: int) -> float:
+    # Tolerances so loose that every step is accepted and capped at `h_max`.
+    solution = dopri5(oscillator, 0., np.array([[1., 0.]]), np.array([0., 2.]), rtol=1e3, atol=1e3, h_max=2. / steps)
+    return float(np.abs(solution.y[-1, 0] - [np.cos(2.), -np.sin(2.)]).max())
+
+def test_fifth_order_convergence():
+    errors = np.array([fixed_step_error(steps) for steps in (10, 20, 40)])
+    orders = np.log2(errors[:-1] / errors[1:])
+    assert np.all(orders > 4.5), orders
+
+def test_dense_output_and_backwards():
+    t_eval = np.linspace(0., -3., 31)
+    y0 = np.array([[1., 0.], [0., 2.]])
+    solution = dopri5(oscillator, 0., y0, t_eval, rtol=1e-10, atol=1e-12)
+    c, s = np.cos(t_eval)[:, None], np.sin(t_eval)[:, None]
+    expected = np.stack([y0[:, 0] * c + y0[:, 1] * s, -y0[:, 0] * s + y0[:, 1] * c], axis=-1)
+    np.testing.assert_allclose(solution.y, expected, atol=1e-8)
+
+def test_leading_components_only():
+    y0 = np.array([[1., 0.], [0., 2.]])
+    t_eval = np.linspace(0., 3., 13)
+    full = dopri5(oscillator, 0., y0, t_eval).y
+    positions = dopri5(oscillator, 0., y0, t_eval, out_dims=1).y
+    np.testing.assert_array_equal(positions, full[..., :1])
+
+def test_terminal_event():
+    # y = cos(t) first crosses zero downwards at pi / 2.
+    solution = dopri5(oscillator, 0., np.array([[1., 0.]]), np.linspace(0., 3., 7), event=lambda t, y: y[:, 0], event_direction=-1)
+    assert abs(solution.t_event[0] - np.pi / 2) < 1e-10
+    # Samples after the event hold the state at the event.
+    np.testing.assert_allclose(solution.y[-1, 0], solution.y_event[0])
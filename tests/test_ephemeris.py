@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from ephemeris import Body, CircularBody, Ephemeris, StaticBody
+
+def test_table_matches_nodes():
+    rng = np.random.default_rng(0)
+    table = rng.normal(size=(50, 3, 2))
+    dt, t0 = 0.01, 0.5
+    bodies = Ephemeris.from_table(table, dt, t0=t0)
+    t = t0 + np.arange(len(table)) * dt
+    np.testing.assert_allclose(bodies.positions(t), table, atol=1e-12)
+    # Central-difference slopes at interior nodes.
+    np.testing.assert_allclose(bodies.velocities(t[1:-1]), (table[2:] - table[:-2]) / (2 * dt), atol=1e-9)
+
+def test_table_reproduces_quadratic_motion():
+    # Central differences and the cubic Hermite interpolant are exact for quadratics.
+    dt = 0.1
+    t = np.arange(20) * dt
+    table = np.stack([1. + 2. * t - 3. * t * t, 0.5 * t * t], axis=-1)[:, None]
+    bodies = Ephemeris.from_table(table, dt)
+    between = np.linspace(dt, t[-2], 37)
+    np.testing.assert_allclose(bodies.positions(between)[:, 0], np.stack([1. + 2. * between - 3. * between ** 2, 0.5 * between ** 2], axis=-1), atol=1e-12)
+    np.testing.assert_allclose(bodies.velocities(between)[:, 0], np.stack([2. - 6. * between, between], axis=-1), atol=1e-11)
+    assert bodies.positions(0.25).shape == (1, 2)
+
+def test_circular_velocity_is_derivative():
+    earth = CircularBody(StaticBody([1., 2.]), 3., 0.7, 0.2)
+    moon = CircularBody(earth, 0.5, -4., 1.)
+    t, h = np.linspace(0., 5., 11), 1e-6
+    numeric = (moon.position(t + h) - moon.position(t - h)) / (2 * h)
+    np.testing.assert_allclose(moon.velocity(t), numeric, atol=1e-7)
+
+def test_body_is_abstract():
+    with pytest.raises(TypeError):
+        Body()
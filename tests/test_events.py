@@ -0,0 +1,46 @@
+import numpy as np
+
+import scenarios
+from events import STATUS_DEFAULT, STATUS_RETURNED_TO_EARTH, LeoToMoonStatus, detect_events, distance_event, leo_to_moon_events
+
+def straight_lines(offsets: np.ndarray, dt: float, time_steps: int) -> np.ndarray:
+    """
+    Ships moving along `x` at unit speed from `x = -2`, at heights `offsets`.
+    """
+    t = np.arange(time_steps)[:, None] * dt
+    return np.stack([np.broadcast_to(-2. + t, (time_steps, len(offsets))), np.broadcast_to(offsets, (time_steps, len(offsets)))], axis=-1)
+
+def test_distance_crossings_are_located():
+    dt, time_steps, radius = 0.1, 60, 1.
+    offsets = np.array([0., 0.3, 0.9, 1.5])
+    ships = straight_lines(offsets, dt, time_steps)
+    bodies = np.zeros((time_steps, 1, 2))
+    # Chunks much shorter than the trajectories exercise the overlap between chunks.
+    table = detect_events(ships, bodies, dt, [distance_event("entry", 0, radius, -1), distance_event("exit", 0, radius, +1)], chunk_size=7)
+
+    half_chord = np.sqrt(radius ** 2 - offsets[:3] ** 2)
+    for name, expected in [("entry", 2. - half_chord), ("exit", 2. + half_chord)]:
+        events = table[table["event"] == name]
+        np.testing.assert_array_equal(events["ship"], np.argsort(expected))
+        np.testing.assert_allclose(events["time"], np.sort(expected), atol=1e-9)
+        np.testing.assert_allclose(np.hypot(events["x"], events["y"]), radius, atol=1e-9)
+    assert np.all(np.diff(table["time"]) >= 0)
+
+def test_status_latches_across_chunks():
+    # Both ships leave the Earth SOI; ship 0 comes back, ship 1 does not.
+    dt, time_steps = 0.05, 100
+    t = np.arange(time_steps) * dt
+    x0 = 2 * scenarios.EARTH_SOI_RADIUS * np.sin(np.pi * t / t[-1])
+    x1 = 2 * scenarios.EARTH_SOI_RADIUS * t / t[-1]
+    ships = np.stack([np.stack([x0, x1], axis=1), np.zeros((time_steps, 2))], axis=-1)
+    # Sun, Earth at the origin and a Moon far away.
+    bodies = np.zeros((time_steps, 3, 2))
+    bodies[:, 0] = [-1000., 0.]
+    bodies[:, 2] = [0., 100.]
+    status = np.zeros((time_steps, 2), dtype=np.uint8)
+    detect_events(ships, bodies, dt, leo_to_moon_events(), chunk_size=9, on_chunk=LeoToMoonStatus(status))
+
+    back = np.nonzero((x0 < scenarios.EARTH_SOI_RADIUS) & (t > t[-1] / 2))[0][0]
+    assert np.all(status[:back, 0] == STATUS_DEFAULT)
+    assert np.all(status[back:, 0] == STATUS_RETURNED_TO_EARTH)
+    assert np.all(status[:, 1] == STATUS_DEFAULT)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from cr3bp import find_l1_x
+from periodic_orbits import SYSTEMS, correct, half_period_crossing, linear_guess, lyapunov_orbits
+
+def residual(m1: float, m2: float, x0: float, vy0: float) -> float:
+    solution = half_period_crossing(m1, m2, np.array([[x0, 0., 0., vy0]]))
+    return abs(solution.y_event[0, 2])
+
+def test_newton_converges_quadratically():
+    m1, m2 = SYSTEMS["earth_moon"]["m1"], SYSTEMS["earth_moon"]["m2"]
+    x0 = find_l1_x(m1, m2) - 0.01
+    errors = [residual(m1, m2, x0, correct(m1, m2, x0, 0.0893 * 1.02, max_iterations=k)[0][0]) for k in range(1, 7)]
+    for previous, current in zip(errors, errors[1:]):
+        if previous > 1e-9:
+            assert current < previous ** 1.5, errors
+    assert errors[-1] < 1e-11
+
+def test_poor_initial_guess_is_rescaled():
+    # The linearised guess of these orbits never comes back to the x-axis.
+    m1, m2 = SYSTEMS["sun_earth"]["m1"], SYSTEMS["sun_earth"]["m2"]
+    distances = np.array([0.001, 0.002])
+    x0 = find_l1_x(m1, m2) - distances
+    vy0, period, converged = correct(m1, m2, x0, linear_guess(m1, m2, distances))
+    assert converged.all()
+    np.testing.assert_allclose(vy0, [0.0075, 0.0171], rtol=1e-2)
+    assert all(residual(m1, m2, x, v) < 1e-10 for x, v in zip(x0, vy0))
+
+    _, continued, _ = lyapunov_orbits(m1, m2, distances)
+    np.testing.assert_allclose(continued, vy0, rtol=1e-9)
@@ -0,0 +1,75 @@
+import json
+import os
+import stat
+import sys
+
+import numpy as np
+import pytest
+
+import sim_cache
+from sim_cache import SimulationCache
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sim_cache.SIMULATIONS, "toy", {"commands": [], "sources": [], "outputs": ["data/toy.npy"]})
+    return SimulationCache(cache_dir=".cache/simulations", state_path="data/simulations.json")
+
+def test_store_and_restore_round_trip(cache):
+    os.makedirs("data")
+    np.save("data/toy.npy", np.arange(4.))
+    cache.store("toy", "k1", 0.)
+    assert cache.has("toy", "k1") and cache.is_current("toy", "k1")
+    os.remove("data/toy.npy")
+    assert not cache.is_current("toy", "k1")
+
+    cache.restore("toy", "k1")
+    assert cache.is_current("toy", "k1")
+    np.testing.assert_array_equal(np.load("data/toy.npy"), np.arange(4.))
+
+def test_store_keeps_a_read_only_copy(cache):
+    os.makedirs("data")
+    np.save("data/toy.npy", np.arange(4.))
+    cache.store("toy", "k1", 0.)
+    assert cache.is_current("toy", "k1")
+    assert not cache.is_current("toy", "k2")
+
+    cached = ".cache/simulations/toy/k1/toy.npy"
+    assert stat.S_IMODE(os.stat(cached).st_mode) & 0o222 == 0
+    # Rewriting the output in place does not reach the cache, and the output is no longer current.
+    with open("data/toy.npy", "r+b") as f:
+        f.seek(0, os.SEEK_END)
+        f.write(b"\0" * 8)
+    np.testing.assert_array_equal(np.load(cached), np.arange(4.))
+    assert not cache.is_current("toy", "k1")
+
+def test_restore_copies_out_of_the_cache(cache):
+    os.makedirs("data")
+    np.save("data/toy.npy", np.arange(4.))
+    cache.store("toy", "k1", 0.)
+    np.save("data/toy.npy", np.arange(6.))
+    cache.store("toy", "k2", 0.)
+
+    cache.restore("toy", "k1")
+    assert cache.is_current("toy", "k1")
+    assert not os.path.samefile("data/toy.npy", ".cache/simulations/toy/k1/toy.npy")
+    np.testing.assert_array_equal(np.load("data/toy.npy"), np.arange(4.))
+
+    np.save("data/toy.npy", np.zeros(5))
+    np.testing.assert_array_equal(np.load(".cache/simulations/toy/k1/toy.npy"), np.arange(4.))
+    assert not cache.is_current("toy", "k1")
+    # The state on disk agrees with the cache that wrote it.
+    assert not SimulationCache(".cache/simulations", "data/simulations.json").is_current("toy", "k1")
+
+def test_ensure_records_command_wall_times(cache):
+    sim_cache.SIMULATIONS["toy"]["commands"] = [[sys.executable, "-c", "import numpy as np; np.save('data/toy.npy', np.arange(3.))"]]
+    assert sim_cache.ensure(["toy"]) == {"toy": "ran"}
+
+    with open(sim_cache.BENCHMARKS_PATH) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["scenario"] for record in records] == ["toy"]
+    assert len(records[0]["commands"]) == 1 and records[0]["commands"][0]["wall_time"] > 0.
+    # A cache hit runs nothing, so it records nothing.
+    assert sim_cache.ensure(["toy"]) == {"toy": "current"}
+    with open(sim_cache.BENCHMARKS_PATH) as f:
+        assert len(f.readlines()) == 1
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from spatial_index import GridIndex
+
+def brute_pairs(centers: np.ndarray, points: np.ndarray, radius: float) -> set[tuple[int, int]]:
+    d = np.linalg.norm(centers[:, None] - points[None], axis=-1)
+    return set(zip(*(a.tolist() for a in np.nonzero(d < radius))))
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    # A dense cluster plus a few far-away ships, so most cells are empty.
+    return np.concatenate([rng.normal(size=(2000, 2)), rng.uniform(-50., 50., size=(20, 2))])
+
+@pytest.mark.parametrize("radius", [0.05, 0.3, 2., 12.])
+def test_queries_match_brute_force(points, radius):
+    rng = np.random.default_rng(1)
+    index = GridIndex(points, cell_size=0.25)
+    centers = np.concatenate([rng.normal(size=(50, 2)), points[:5], [[40., -40.]]])
+
+    i, j = index.query_pairs(centers, radius)
+    assert set(zip(i.tolist(), j.tolist())) == brute_pairs(centers, points, radius)
+    np.testing.assert_array_equal(index.count_radius(centers, radius), (np.linalg.norm(centers[:, None] - points[None], axis=-1) < radius).sum(axis=1))
+    np.testing.assert_array_equal(index.query_radius(centers[0], radius), np.nonzero(np.linalg.norm(points - centers[0], axis=1) < radius)[0])
+
+@pytest.mark.parametrize("center", [[0.1, -0.2], [3., 3.], [-80., 10.]])
+def test_nearest_matches_brute_force(points, center):
+    index = GridIndex(points, cell_size=0.25)
+    found, distances = index.nearest(np.array(center), 7)
+    expected = np.sort(np.linalg.norm(points - center, axis=1))[:7]
+    np.testing.assert_allclose(distances, expected)
+    np.testing.assert_allclose(np.linalg.norm(points[found] - center, axis=1), distances)
+
+def test_update_matches_fresh_index(points):
+    rng = np.random.default_rng(2)
+    index = GridIndex(points, cell_size=0.25)
+    centers = rng.normal(size=(30, 2))
+    for _ in range(3):
+        points = points + rng.normal(scale=0.05, size=points.shape)
+        index.update(points)
+        i, j = index.query_pairs(centers, 0.3)
+        assert set(zip(i.tolist(), j.tolist())) == brute_pairs(centers, points, 0.3)
+        np.testing.assert_array_equal(index.sorted_keys, np.sort(index.sorted_keys))
+        np.testing.assert_allclose(index.nearest(centers[0], 3)[1], np.sort(np.linalg.norm(points - centers[0], axis=1))[:3])
@@ -0,0 +1,35 @@
+"""
+Themes of the slide decks rendered from `slides.py`.
+
+The presentation (`slides`) and the blog post (`blog`) share every scene. They differ in the
+background colour, in the equations shown next to the potential surfaces of `EffectivePotential`,
+and in how long `HaloOrbits` pauses before a slide ends. The theme is read from the `SLIDES_THEME`
+environment variable when `slides.py` is imported, so it needs no `manim` and can also be used by
+the build scripts.
+
+Usage: `SLIDES_THEME=blog manim -qh slides.py LeoToMoon --renderer opengl --write_to_movie`.
+"""
+
+import os
+
+THEME_VARIABLE = "SLIDES_THEME"
+
+THEMES = {
+    "slides": {
+        "background_color": "#000000",
+        # Show the formulas of the potentials in `EffectivePotential`.
+        "equations": True,
+        # Seconds to wait at the end of a slide of `HaloOrbits`.
+        "pause": 0.1,
+    },
+    "blog": {
+        "background_color": "#020617", # Tailwind CSS "slate-950"
+        "equations": False,
+        "pause": 1.,
+    },
+}
+
+def current() -> dict:
+    name = os.environ.get(THEME_VARIABLE, "slides")
+    assert name in THEMES, f"unknown theme {name}, {THEME_VARIABLE} must be one of {', '.join(THEMES)}"
+    return THEMES[name]
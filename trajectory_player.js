@@ -0,0 +1,293 @@
+// Plays the slides exported by `web_export.py` on canvases instead of background videos.
+//
+// Loaded by `template.html` after `manifest.js` and before `Reveal.initialize`: sections listed in
+// `window.TRAJECTORY_SLIDES` lose their `data-background-video`, so the video is never downloaded,
+// and get a canvas in their background once reveal.js is ready. The scene is drawn from the
+// decoded buffers at any time `t`, so seeking is immediate: click to pause, and drag horizontally
+// on a paused slide to scrub.
+(function () {
+  const manifest = window.TRAJECTORY_SLIDES;
+  if (!manifest || typeof DecompressionStream === "undefined") {
+    return;
+  }
+  const FRAME_WIDTH = 8 * 16 / 9;
+  const FRAME_HEIGHT = 8;
+  const base = document.currentScript.src.replace(/[^/]*$/, "");
+  const loaded = {};
+
+  // Rate functions of manim.
+  function sigmoid(x) {
+    return 1 / (1 + Math.exp(-x));
+  }
+  const RATES = {
+    linear: (t) => t,
+    smooth: (t) => {
+      const error = sigmoid(-5);
+      return Math.min(Math.max((sigmoid(10 * (t - 0.5)) - error) / (1 - 2 * error), 0), 1);
+    },
+  };
+
+  async function inflate(file) {
+    const response = await fetch(base + file);
+    const stream = response.body.pipeThrough(new DecompressionStream("deflate"));
+    return new Response(stream).arrayBuffer();
+  }
+
+  function decode(spec, data) {
+    if (spec.encoding === "uint8") {
+      return new Uint8Array(data);
+    }
+    // Delta-encoded uint16 positions, `shape` = [frames, count, 2].
+    const deltas = new Uint16Array(data);
+    const perFrame = spec.shape[1] * 2;
+    const positions = new Float32Array(deltas.length);
+    const current = new Uint16Array(perFrame);
+    for (let frame = 0, i = 0; frame < spec.shape[0]; frame++) {
+      for (let j = 0; j < perFrame; j++, i++) {
+        current[j] += deltas[i];
+        positions[i] = spec.origin[j & 1] + current[j] * spec.step[j & 1];
+      }
+    }
+    return positions;
+  }
+
+  function buffer(name) {
+    if (!loaded[name]) {
+      const spec = manifest.buffers[name];
+      loaded[name] = inflate(spec.file).then((data) => ({ spec: spec, data: decode(spec, data) }));
+    }
+    return loaded[name];
+  }
+
+  // Value of a `ValueTracker` timeline at time `t` of the slide.
+  function timeline(tracks, t) {
+    let value = tracks[0].from;
+    for (const track of tracks) {
+      if (t < track.start) {
+        break;
+      }
+      const length = track.end - track.start;
+      value = t >= track.end || length <= 0 ? track.to : track.from + (track.to - track.from) * RATES[track.rate]((t - track.start) / length);
+    }
+    return value;
+  }
+
+  function fade(range, t) {
+    if (!range) {
+      return 1;
+    }
+    const [start, end, from, to] = range;
+    return t <= start ? from : t >= end ? to : from + (to - from) * (t - start) / (end - start);
+  }
+
+  class Player {
+    constructor(section, slide) {
+      this.section = section;
+      this.slide = slide;
+      this.loop = section.hasAttribute("data-trajectory-loop");
+      this.canvas = document.createElement("canvas");
+      this.canvas.style.cssText = "position: absolute; inset: 0; width: 100%; height: 100%;";
+      this.ready = Promise.all(
+        [...slide.swarms.flatMap((s) => [s.buffer, s.status]), ...slide.bodies.map((b) => b.buffer), ...slide.traces.map((t) => t.buffer)]
+          .filter((name) => name)
+          .map((name) => buffer(name).then((b) => [name, b]))
+      ).then((entries) => (this.buffers = Object.fromEntries(entries)));
+      this.time = 0;
+      this.playing = false;
+      this.canvas.addEventListener("click", () => (this.playing ? this.pause() : this.play()));
+      this.canvas.addEventListener("pointermove", (event) => {
+        if (!this.playing && event.buttons) {
+          this.seek(this.time + event.movementX / this.canvas.clientWidth * this.slide.duration);
+        }
+      });
+    }
+
+    attach(background) {
+      background.style.position = "relative";
+      background.appendChild(this.canvas);
+    }
+
+    play() {
+      this.playing = true;
+      this.started = performance.now() - this.time * 1000;
+      const tick = (now) => {
+        if (!this.playing) {
+          return;
+        }
+        let t = (now - this.started) / 1000;
+        if (t >= this.slide.duration) {
+          t = this.loop ? t % this.slide.duration : this.slide.duration;
+        }
+        this.seek(t);
+        if (t < this.slide.duration || this.loop) {
+          requestAnimationFrame(tick);
+        }
+      };
+      this.ready.then(() => requestAnimationFrame(tick));
+    }
+
+    pause() {
+      this.playing = false;
+    }
+
+    restart() {
+      this.pause();
+      this.time = 0;
+      this.play();
+    }
+
+    seek(t) {
+      this.time = Math.min(Math.max(t, 0), this.slide.duration);
+      if (this.buffers) {
+        this.draw(this.time);
+      }
+    }
+
+    // Position of item `index` of a positions buffer at fractional frame `frame`.
+    position(name, index, frame) {
+      const { spec, data } = this.buffers[name];
+      const f0 = Math.floor(frame);
+      const f1 = Math.min(f0 + 1, spec.shape[0] - 1);
+      const a = (f0 * spec.shape[1] + index) * 2;
+      const b = (f1 * spec.shape[1] + index) * 2;
+      const w = frame - f0;
+      return [data[a] * (1 - w) + data[b] * w, data[a + 1] * (1 - w) + data[b + 1] * w];
+    }
+
+    draw(t) {
+      const canvas = this.canvas;
+      const ratio = window.devicePixelRatio || 1;
+      const width = Math.round(canvas.clientWidth * ratio);
+      const height = Math.round(canvas.clientHeight * ratio);
+      if (canvas.width !== width || canvas.height !== height) {
+        canvas.width = width;
+        canvas.height = height;
+      }
+      const ctx = canvas.getContext("2d");
+      ctx.clearRect(0, 0, width, height);
+      const unit = Math.min(width / FRAME_WIDTH, height / FRAME_HEIGHT);
+      const scale = unit * this.slide.scale;
+      const x = (p) => width / 2 + p[0] * scale;
+      const y = (p) => height / 2 - p[1] * scale;
+      const value = timeline(this.slide.time, t);
+      const frameOf = (name) => value * (this.buffers[name].spec.shape[0] - 1);
+
+      for (const overlay of this.slide.overlays) {
+        ctx.globalAlpha = fade(overlay.fade, t);
+        ctx.strokeStyle = ctx.fillStyle = overlay.color;
+        ctx.lineWidth = 2 * ratio;
+        if (overlay.type === "circle") {
+          ctx.beginPath();
+          ctx.arc(x(overlay.at), y(overlay.at), overlay.radius * scale, 0, 2 * Math.PI);
+          ctx.stroke();
+        } else if (overlay.type === "line") {
+          ctx.beginPath();
+          ctx.moveTo(x(overlay.from), y(overlay.from));
+          ctx.lineTo(x(overlay.to), y(overlay.to));
+          ctx.stroke();
+        } else if (overlay.type === "dot") {
+          ctx.beginPath();
+          ctx.arc(x(overlay.at), y(overlay.at), overlay.radius * unit, 0, 2 * Math.PI);
+          ctx.fill();
+        } else if (overlay.type === "text") {
+          // Roughly the size of manim's `Text`, placed like `next_to` with the default buffer.
+          const size = overlay.size / 48 * 0.6 * unit;
+          const lines = overlay.text.split("\n");
+          const buff = 0.25 * unit;
+          ctx.font = `${size}px sans-serif`;
+          ctx.textAlign = overlay.side === "left" ? "right" : overlay.side === "right" ? "left" : "center";
+          ctx.textBaseline = "middle";
+          let [tx, ty] = [x(overlay.at), y(overlay.at)];
+          if (overlay.side === "left") tx -= buff;
+          if (overlay.side === "right") tx += buff;
+          if (overlay.side === "down") ty += buff + size * lines.length / 2;
+          if (overlay.side === "up") ty -= buff + size * lines.length / 2;
+          lines.forEach((line, i) => ctx.fillText(line, tx, ty + (i - (lines.length - 1) / 2) * size * 1.2));
+        }
+      }
+
+      for (const trace of this.slide.traces) {
+        const end = frameOf(trace.buffer);
+        ctx.globalAlpha = fade(trace.fade, t);
+        ctx.strokeStyle = ctx.fillStyle = trace.color;
+        ctx.lineWidth = trace.width * ratio;
+        ctx.beginPath();
+        for (let f = 0; f < end; f++) {
+          const p = this.position(trace.buffer, trace.ship, f);
+          f === 0 ? ctx.moveTo(x(p), y(p)) : ctx.lineTo(x(p), y(p));
+        }
+        const last = this.position(trace.buffer, trace.ship, end);
+        ctx.lineTo(x(last), y(last));
+        ctx.stroke();
+        if (trace.dot) {
+          ctx.beginPath();
+          ctx.arc(x(last), y(last), trace.dot * unit, 0, 2 * Math.PI);
+          ctx.fill();
+        }
+      }
+
+      ctx.globalAlpha = 1;
+      const size = Math.max(1, Math.round(ratio));
+      for (const swarm of this.slide.swarms) {
+        const frame = frameOf(swarm.buffer);
+        const count = this.buffers[swarm.buffer].spec.shape[1];
+        const status = swarm.status ? this.buffers[swarm.status].data : null;
+        const statusOffset = Math.round(frame) * count;
+        for (let color = 0; color < swarm.colors.length; color++) {
+          ctx.fillStyle = swarm.colors[color];
+          for (let i = 0; i < count; i++) {
+            if ((status ? status[statusOffset + i] : 0) !== color) {
+              continue;
+            }
+            const p = this.position(swarm.buffer, i, frame);
+            ctx.fillRect(x(p), y(p), size, size);
+          }
+        }
+      }
+
+      for (const body of this.slide.bodies) {
+        const frame = frameOf(body.buffer);
+        const count = this.buffers[body.buffer].spec.shape[1];
+        for (let i = 0; i < count; i++) {
+          const p = this.position(body.buffer, i, frame);
+          ctx.fillStyle = body.colors[i % body.colors.length];
+          ctx.beginPath();
+          ctx.arc(x(p), y(p), body.radius * unit, 0, 2 * Math.PI);
+          ctx.fill();
+        }
+      }
+    }
+  }
+
+  const players = new Map();
+  for (const section of document.querySelectorAll("section[data-trajectory]")) {
+    const slide = manifest.slides[section.getAttribute("data-trajectory")];
+    if (!slide) {
+      continue;
+    }
+    if (section.hasAttribute("data-background-video-loop")) {
+      section.setAttribute("data-trajectory-loop", "");
+    }
+    section.removeAttribute("data-background-video");
+    players.set(section, new Player(section, slide));
+  }
+
+  function show(event) {
+    for (const player of players.values()) {
+      player.pause();
+    }
+    const player = players.get(event.currentSlide);
+    if (player) {
+      player.restart();
+    }
+  }
+
+  // reveal.js queues listeners added before `Reveal.initialize`.
+  Reveal.on("ready", (event) => {
+    for (const [section, player] of players) {
+      player.attach(Reveal.getSlideBackground(section));
+    }
+    show(event);
+  });
+  Reveal.on("slidechanged", show);
+})();
@@ -0,0 +1,218 @@
+"""
+Export the data-driven slides as compact trajectory buffers for the in-browser player.
+
+The slides of `docs/index.html` are pre-rendered videos, even those that only show moving dots.
+For the slides listed in `EXPORTS` this writes, into `docs/trajectories/`:
+
+- one binary buffer per array (ship positions, ship status, body positions), resampled to
+  `--frames` frames. Positions are quantised to `uint16` on a grid covering four times the visible
+  frame (about a tenth of a pixel at 1080p), delta-encoded from frame to frame (wrapping modulo
+  2^16, so decoding is exact) and deflated, so the slowly moving swarms compress well.
+- `manifest.js`, defining `window.TRAJECTORY_SLIDES`: per slide, the buffers, the timeline of the
+  `ValueTracker` that drives the scene (same rate functions as manim), the traces, and the fixed
+  overlays (bodies, circles, lines, labels) of the scene.
+- `player.js`, a copy of `trajectory_player.js`.
+
+`template.html` loads both scripts before reveal.js starts. Slides found in the manifest get a
+canvas in their background instead of the video, drawn at the resolution of the screen. Slides
+keep their video if the scripts are missing or the browser lacks `DecompressionStream`. Text is
+drawn in the browser font and label placement follows the scene only approximately.
+
+Usage: `python web_export.py` after running the simulations, then `make build-slides-html`.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import zlib
+from typing import Callable
+
+import numpy as np
+
+import capture_search
+import ephemeris
+import scenarios
+
+# Size of the manim frame in scene units.
+FRAME_WIDTH = 8 * 16 / 9
+FRAME_HEIGHT = 8.
+
+# Colours of the manim constants used by the scenes.
+WHITE = "#FFFFFF"
+YELLOW = "#FFFF00"
+BLUE = "#58C4DD"
+GRAY = "#888888"
+DARK_GRAY = "#444444"
+RED = "#FC6255"
+LIMEGREEN = "#89FE05"
+
+def _deflate(array: np.ndarray) -> bytes:
+    return zlib.compress(np.ascontiguousarray(array).tobytes(), 9)
+
+def encode_positions(positions: np.ndarray, scale: float) -> tuple[bytes, dict]:
+    """
+    Positions of shape `(frames, count, 2)` in scene units before `scale`, quantised to `uint16`
+    and delta-encoded along frames. Returns the deflated buffer and its decoding metadata.
+    """
+    half = np.array([FRAME_WIDTH, FRAME_HEIGHT]) / 2 / scale * 4
+    origin = -half
+    step = 2 * half / 65535
+    quantised = np.rint((np.nan_to_num(positions, nan=0.) - origin) / step)
+    quantised = np.clip(quantised, 0, 65535).astype(np.uint16)
+    deltas = np.diff(quantised, axis=0, prepend=np.zeros_like(quantised[:1]))
+    return _deflate(deltas.astype("<u2")), {
+        "encoding": "uint16-delta",
+        "shape": list(positions.shape),
+        "origin": origin.tolist(),
+        "step": step.tolist(),
+    }
+
+def encode_uint8(values: np.ndarray) -> tuple[bytes, dict]:
+    return _deflate(values.astype(np.uint8)), {"encoding": "uint8", "shape": list(values.shape)}
+
+def _frames(time_steps: int, frames: int) -> np.ndarray:
+    return np.linspace(0, time_steps - 1, min(frames, time_steps)).astype(np.int64)
+
+def leo_to_moon(frames: int) -> tuple[dict[str, tuple[bytes, dict]], list[dict]]:
+    """
+    Slides 1 (Hohmann transfer) and 2 (ballistic capture) of `LeoToMoon`.
+    """
+    ships = np.load("data/leo_to_moon_ships.npy", mmap_mode="r")
+    status = np.load("data/leo_to_moon_events_status.npy", mmap_mode="r")
+    dt = scenarios.LEO_TO_MOON_DT
+    bodies = ephemeris.Ephemeris.from_table(np.load("data/leo_to_moon_bodies.npy", mmap_mode="r"), dt)
+    steps = _frames(len(ships), frames)
+    body_positions = bodies.positions(steps * dt)
+    earth = body_positions[:, 1:2]
+    scale = 1
+    buffers = {
+        "leo_to_moon_ships": encode_positions(ships[steps] - earth, scale),
+        "leo_to_moon_status": encode_uint8(status[steps]),
+        "leo_to_moon_bodies": encode_positions(body_positions - earth, scale),
+    }
+    candidate = capture_search.best_candidate("data/leo_to_moon_capture_candidates.npy")
+    best = int(candidate["ship"])
+    total_time = (len(ships) - 1) * dt
+    arrival = capture_search.arrival_time(candidate, total_time) / total_time
+    body_start = body_positions[0] - earth[0]
+    moon_early = body_positions[int(0.05 * (len(steps) - 1)), 2] - earth[int(0.05 * (len(steps) - 1)), 0]
+    arrival_frame = int(arrival * (len(steps) - 1))
+    best_arrival = ships[steps[arrival_frame], best] - earth[arrival_frame, 0]
+
+    common = {
+        "scale": scale,
+        "swarms": [{"buffer": "leo_to_moon_ships", "status": "leo_to_moon_status", "colors": [WHITE, DARK_GRAY, RED, LIMEGREEN]}],
+        "bodies": [{"buffer": "leo_to_moon_bodies", "colors": [YELLOW, BLUE, GRAY], "radius": 0.08}],
+    }
+    soi = [
+        {"type": "circle", "at": [0., 0.], "radius": 3.902, "color": BLUE},
+        {"type": "text", "text": "Earth SOI", "at": [-3.902, 0.], "side": "left", "size": 20, "color": BLUE},
+    ]
+    hohmann = {"type": "text", "text": "Hohmann\ntransfer", "at": moon_early.tolist(), "side": "down", "size": 20, "color": WHITE}
+    slides = [
+        {
+            **common, "scene": "LeoToMoon", "slide": 1, "duration": 5.,
+            "time": [{"start": 0., "end": 4., "from": 0., "to": 0.05, "rate": "smooth"}],
+            "traces": [],
+            "overlays": soi + [
+                {"type": "text", "text": "Low Earth Orbit", "at": body_start[1].tolist(), "side": "down", "size": 20, "color": WHITE, "fade": [0., 1., 1., 0.]},
+                {**hohmann, "fade": [4., 5., 0., 1.]},
+            ],
+        },
+        {
+            **common, "scene": "LeoToMoon", "slide": 2, "duration": 21.,
+            "time": [{"start": 0., "end": 20., "from": 0.05, "to": arrival, "rate": "smooth"}],
+            "traces": [{"buffer": "leo_to_moon_ships", "ship": best, "color": LIMEGREEN, "width": 2, "dot": 0.08, "fade": [0., 1., 0., 1.]}],
+            "overlays": soi + [
+                {**hohmann, "fade": [0., 1., 1., 0.]},
+                {"type": "text", "text": "Ballistic capture!", "at": best_arrival.tolist(), "side": "down", "size": 20, "color": WHITE, "fade": [20., 21., 0., 1.]},
+            ],
+        },
+    ]
+    return buffers, slides
+
+def halo_orbits(frames: int) -> tuple[dict[str, tuple[bytes, dict]], list[dict]]:
+    """
+    Slides 1 (search for the orbit) and 2 (best orbit shown) of `HaloOrbits`.
+    """
+    search = np.load("data/halo_orbits_search.npy")
+    l1 = np.load("data/halo_orbits_l1.npy")
+    search = search - l1.reshape((1, 1, 2))
+    np.clip(search[:, :, 1], 0, None, out=search[:, :, 1])
+    steps = _frames(len(search), frames)
+    scale = 20
+    buffers = {"halo_orbits_search": encode_positions(search[steps], scale)}
+
+    mu = 1 * 0.0123 / (1 + 0.0123)
+    moon = np.array([1 - mu, 0]) - l1
+    earth = np.array([-mu, 0]) - l1
+    overlays = [
+        {"type": "line", "from": [-8 / scale, 0.], "to": [8 / scale, 0.], "color": WHITE},
+        {"type": "dot", "at": [0., 0.], "radius": 0.08, "color": WHITE},
+        {"type": "text", "text": "L₁", "at": [0., 0.], "side": "down", "size": 36, "color": WHITE},
+        {"type": "dot", "at": moon.tolist(), "radius": 0.08, "color": GRAY},
+        {"type": "text", "text": "Moon", "at": moon.tolist(), "side": "down", "size": 14, "color": WHITE},
+        {"type": "dot", "at": earth.tolist(), "radius": 0.08, "color": GRAY},
+        {"type": "text", "text": "Earth", "at": earth.tolist(), "side": "down", "size": 14, "color": WHITE},
+    ]
+    ships = search.shape[1]
+    others = [{"buffer": "halo_orbits_search", "ship": i, "color": WHITE, "width": 1} for i in range(1, ships)]
+    common = {
+        "scene": "HaloOrbits", "scale": scale,
+        "swarms": [{"buffer": "halo_orbits_search", "colors": [WHITE]}],
+        "bodies": [],
+        "overlays": overlays,
+    }
+    slides = [
+        {
+            **common, "slide": 1, "duration": 4.,
+            "time": [{"start": 0., "end": 4., "from": 0., "to": 1., "rate": "smooth"}],
+            "traces": others,
+        },
+        {
+            **common, "slide": 2, "duration": 1.,
+            "time": [{"start": 0., "end": 0., "from": 1., "to": 1., "rate": "linear"}],
+            "traces": others + [{"buffer": "halo_orbits_search", "ship": 0, "color": LIMEGREEN, "width": 4}],
+        },
+    ]
+    return buffers, slides
+
+EXPORTS: dict[str, Callable[[int], tuple[dict[str, tuple[bytes, dict]], list[dict]]]] = {
+    "LeoToMoon": leo_to_moon,
+    "HaloOrbits": halo_orbits,
+}
+
+def export(out: str, scenes: list[str], frames: int) -> int:
+    """
+    Write the buffers, manifest and player of `scenes` into `out`. Returns the bytes written.
+    """
+    os.makedirs(out, exist_ok=True)
+    manifest = {"buffers": {}, "slides": {}}
+    written = 0
+    for scene in scenes:
+        buffers, slides = EXPORTS[scene](frames)
+        for name, (data, meta) in buffers.items():
+            with open(os.path.join(out, f"{name}.bin"), "wb") as f:
+                f.write(data)
+            manifest["buffers"][name] = {"file": f"{name}.bin", **meta}
+            written += len(data)
+            print(f"{name}: {meta['shape']} in {len(data) / 1e6:.2f} MB")
+        for slide in slides:
+            manifest["slides"][f"{slide['scene']}/{slide['slide']}"] = slide
+    with open(os.path.join(out, "manifest.js"), "w") as f:
+        f.write(f"window.TRAJECTORY_SLIDES = {json.dumps(manifest)};\n")
+    shutil.copy2("trajectory_player.js", os.path.join(out, "player.js"))
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export data-driven slides for the in-browser trajectory player.")
+    parser.add_argument("scenes", nargs="*", default=list(EXPORTS), help="scenes to export (default: all)")
+    parser.add_argument("--out", default="docs/trajectories")
+    parser.add_argument("--frames", type=int, default=1200, help="frames kept per trajectory")
+    args = parser.parse_args()
+
+    unknown = set(args.scenes) - set(EXPORTS)
+    assert not unknown, f"unknown scenes: {', '.join(sorted(unknown))}"
+    written = export(args.out, args.scenes, args.frames)
+    print(f"Wrote {written / 1e6:.2f} MB of trajectories to {args.out}")